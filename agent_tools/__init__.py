@@ -0,0 +1 @@
+"""Shared tool helpers for the agents under src/ (imported as agent_tools.* from the repo root)."""
@@ -0,0 +1,182 @@
+"""
+Async-native tool adapter.
+
+ADK awaits async tools on the event loop but calls plain functions inline, so a
+sync tool doing file or network I/O stalls every other session on that loop.
+`async_tool` turns any tool into a coroutine function that:
+- runs sync tools on a dedicated bounded thread pool (or a process pool for
+  CPU-heavy tools with cpu_bound=True),
+- enforces a per-call deadline and cancels the call when it is exceeded,
+- records how long each tool kept the event loop busy (see tool_stats()).
+
+    @async_tool(deadline=5)
+    def get_current_time() -> dict:
+        ...
+"""
+import asyncio
+import functools
+import importlib
+import inspect
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+IO_WORKERS = int(os.environ.get("ADK_TOOL_IO_WORKERS", "16"))
+CPU_WORKERS = int(os.environ.get("ADK_TOOL_CPU_WORKERS", str(os.cpu_count() or 2)))
+BLOCKING_WARN_S = 0.05
+
+_io_executor = None
+_cpu_executor = None
+_executor_lock = threading.Lock()
+_stats = {}
+
+
+def _get_executor(cpu_bound: bool):
+    global _io_executor, _cpu_executor
+    with _executor_lock:
+        if cpu_bound:
+            if _cpu_executor is None:
+                _cpu_executor = ProcessPoolExecutor(max_workers=CPU_WORKERS)
+            return _cpu_executor
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="adk-tool")
+        return _io_executor
+
+
+def shutdown_executors(wait: bool = True):
+    global _io_executor, _cpu_executor
+    with _executor_lock:
+        for executor in (_io_executor, _cpu_executor):
+            if executor is not None:
+                executor.shutdown(wait=wait, cancel_futures=True)
+        _io_executor = _cpu_executor = None
+
+
+# --- STATS ---
+class ToolStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.loop_blocked_s = 0.0
+        self.loop_blocked_max_s = 0.0
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def _stats_for(name: str) -> ToolStats:
+    if name not in _stats:
+        _stats[name] = ToolStats()
+    return _stats[name]
+
+
+def tool_stats() -> dict:
+    """ {tool name: {calls, errors, timeouts, total_s, max_s, loop_blocked_s, loop_blocked_max_s}} """
+    return {name: s.as_dict() for name, s in _stats.items()}
+
+
+def reset_tool_stats():
+    _stats.clear()
+
+
+def _note_blocking(name: str, stats: ToolStats, elapsed: float):
+    stats.loop_blocked_s += elapsed
+    if elapsed > stats.loop_blocked_max_s:
+        stats.loop_blocked_max_s = elapsed
+    if elapsed > BLOCKING_WARN_S:
+        logger.warning("Tool %s blocked the event loop for %.0f ms", name, elapsed * 1000)
+
+
+class _Timed:
+    """ Awaitable that times every step of a coroutine spent on the loop thread. """
+
+    def __init__(self, coro, name: str, stats: ToolStats):
+        self._coro = coro
+        self._name = name
+        self._stats = stats
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            start = time.perf_counter()
+            try:
+                if error is not None:
+                    yielded = self._coro.throw(error)
+                else:
+                    yielded = self._coro.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                _note_blocking(self._name, self._stats, time.perf_counter() - start)
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+
+def _call_original(module_name: str, qualname: str, args, kwargs):
+    """ Process-pool entry point: looks the undecorated tool up by name. """
+    target = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        target = getattr(target, part)
+    return inspect.unwrap(target)(*args, **kwargs)
+
+
+def async_tool(func=None, *, deadline: float = 30.0, cpu_bound: bool = False, offload: bool = True):
+    """
+    Wraps a tool for ADK. Sync tools are offloaded (offload=False keeps them on
+    the loop, still timed); async tools run on the loop under the deadline.
+    On timeout the tool returns {"status": "error", ...} instead of raising so
+    the model can react to it.
+    """
+    if func is None:
+        return functools.partial(async_tool, deadline=deadline, cpu_bound=cpu_bound, offload=offload)
+
+    name = func.__name__
+    is_async = inspect.iscoroutinefunction(func)
+
+    async def _execute(args, kwargs):
+        stats = _stats_for(name)
+        if is_async:
+            return await _Timed(func(*args, **kwargs), name, stats)
+        if not offload:
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _note_blocking(name, stats, time.perf_counter() - start)
+        loop = asyncio.get_running_loop()
+        if cpu_bound:
+            call = functools.partial(_call_original, func.__module__, func.__qualname__, args, kwargs)
+        else:
+            call = functools.partial(func, *args, **kwargs)
+        return await loop.run_in_executor(_get_executor(cpu_bound), call)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        stats = _stats_for(name)
+        stats.calls += 1
+        start = time.perf_counter()
+        try:
+            # wait_for cancels the task; queued executor jobs are dropped, a
+            # running thread finishes in the background with its result ignored.
+            return await asyncio.wait_for(_execute(args, kwargs), deadline)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            return {"status": "error", "error_message": f"{name} exceeded its {deadline:g}s deadline"}
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.total_s += elapsed
+            stats.max_s = max(stats.max_s, elapsed)
+
+    return wrapper
@@ -0,0 +1,103 @@
+"""
+Benchmark: particle step kernels, pure Python vs numpy vs numba.
+
+Fills the beam of test3.py's double slit with N particles spread between the
+gun and the screen, then runs the same physics steps with every kernel
+backend: advance (move, barrier and screen tests), landing targets drawn from
+an identically seeded sampler, retarget, removal. Reports the kernel time per
+step and checks that each backend ends with a bit-identical hit histogram and
+particle state. numba is skipped when it is not installed; pure Python is
+skipped above --python-limit particles.
+
+# to run from root folder
+python -m benchmarks.bench_kernels --counts 1000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from slit_lab.kernels import BACKENDS, BLOCKED, LANDED, PASSED, barrier_gaps_array
+from slit_lab.particles import ParticleStore, TO_SCREEN, TO_SLIT
+from slit_lab.physics import intensity_profile
+from slit_lab.sampler import LandingSampler
+
+# test3.py geometry (pixels)
+HEIGHT = 600
+GUN_X, BARRIER_X, SCREEN_X = 90, 300, 1050
+SLIT_WIDTH, SLIT_DISTANCE, WAVELENGTH = 15, 120, 25
+GAPS = barrier_gaps_array([(HEIGHT / 2 + c - SLIT_WIDTH, HEIGHT / 2 + c + SLIT_WIDTH, HEIGHT / 2 + c)
+                           for c in (-SLIT_DISTANCE / 2, SLIT_DISTANCE / 2)])
+PATTERN = intensity_profile("double", WAVELENGTH, SLIT_WIDTH, SLIT_DISTANCE, SCREEN_X - BARRIER_X,
+                            -HEIGHT / 2, HEIGHT / 2, 2000)
+
+
+def fill_beam(count, seed):
+    """ `count` particles in flight: heading for the slits before the barrier, fanned out behind it. """
+    rng = np.random.default_rng(seed)
+    store = ParticleStore(count)
+    x = rng.uniform(GUN_X, SCREEN_X, count)
+    behind = x >= BARRIER_X
+    slope = rng.uniform(-0.4, 0.4, count)
+    y = np.where(behind, rng.uniform(0, HEIGHT, count), HEIGHT / 2 + (x - GUN_X) * slope)
+    vy = np.where(behind, rng.uniform(-3, 3, count), slope * 10)
+    store.spawn(count, x=x, y=y, vx=10.0, vy=vy, state=np.where(behind, TO_SCREEN, TO_SLIT))
+    return store
+
+
+def run(backend, count, steps, seed):
+    """ (kernel ms per step, hit histogram, final particle arrays) of one backend. """
+    advance, retarget = BACKENDS[backend]
+    store = fill_beam(count, seed)
+    sampler = LandingSampler(-HEIGHT / 2, HEIGHT / 2, PATTERN, seed=seed + 1)
+    hist = np.zeros(HEIGHT, dtype=np.int64)
+    kernel = 0.0
+    for _ in range(steps):
+        start = time.perf_counter()
+        events = advance(store.x, store.y, store.vx, store.vy, store.state, 1.0, BARRIER_X, SCREEN_X, GAPS)
+        kernel += time.perf_counter() - start
+        through = np.flatnonzero(events == PASSED)
+        target = sampler.sample(len(through)) + HEIGHT / 2
+        start = time.perf_counter()
+        retarget(store.y, store.vx, store.vy, through, target, SCREEN_X - BARRIER_X)
+        kernel += time.perf_counter() - start
+        landed = events == LANDED
+        rows = np.clip(store.y[landed], 0, HEIGHT - 1).astype(int)
+        hist += np.bincount(rows, minlength=HEIGHT)
+        store.remove(landed | (events == BLOCKED))
+    final = np.concatenate([store.x, store.y, store.vx, store.vy, store.state])
+    return kernel / steps * 1000, hist, final
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--python-limit", type=int, default=1000000,
+                        help="largest particle count to run the pure Python backend at")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    backends = [b for b in ("python", "numpy", "numba") if b in BACKENDS]
+    if "numba" in BACKENDS:
+        # Compile outside the timings
+        run("numba", 10, 1, args.seed)
+    else:
+        print("numba is not installed, only the python and numpy backends are compared\n")
+
+    print(f"{'particles':>10} " + " ".join(f"{b + ' ms/step':>16}" for b in backends) + f" {'hits':>9} identical")
+    for count in args.counts:
+        results = {}
+        for backend in backends:
+            if backend == "python" and count > args.python_limit:
+                continue
+            results[backend] = run(backend, count, args.steps, args.seed)
+        reference = results["numpy"]
+        same = all(np.array_equal(r[1], reference[1]) and np.array_equal(r[2], reference[2])
+                   for r in results.values())
+        cells = " ".join(f"{results[b][0]:>16.2f}" if b in results else f"{'skipped':>16}" for b in backends)
+        print(f"{count:>10} {cells} {int(reference[1].sum()):>9} {'yes' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: per-call pygame drawing vs batched surfarray rendering.
+
+Draws N particles plus the accumulation graph the way test2.py/test3.py used
+to (one pygame.draw call per particle and per histogram row) and with
+slit_lab.render, on a headless 1200x600 display. A second table compares
+redrawing the static scene (barrier, beam fan, buttons, labels) every frame
+with the cached layers and dirty rects of LayeredScreen.
+
+# to run from root folder
+python -m benchmarks.bench_render --counts 1000 10000 100000
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import numpy as np
+import pygame
+
+from slit_lab.render import BarGraph, LayeredScreen, draw_particles, paired_rows
+
+WIDTH, HEIGHT = 1200, 600
+SCREEN_X = 1050
+PALETTE = np.array([(50, 255, 100), (200, 255, 200)], dtype=np.uint8)
+RADII = [2, 2]
+
+
+def draw_per_call(screen, x, y, state, hits):
+    for px, py, st in zip(x.astype(int), y.astype(int), state):
+        pygame.draw.circle(screen, tuple(PALETTE[st]), (px, py), RADII[st])
+    max_val = max(np.max(hits), 1)
+    for row in range(0, HEIGHT, 2):
+        if hits[row] > 0:
+            green = min(255, 100 + hits[row] * 5)
+            pygame.draw.line(screen, (0, green, 0), (SCREEN_X, row), (SCREEN_X + hits[row] / max_val * 120, row), 2)
+
+
+def draw_batched(screen, graph, x, y, state, hits):
+    draw_particles(screen, x, y, state, PALETTE, RADII)
+    max_val = max(np.max(hits), 1)
+    lengths = np.where(hits > 0, hits / max_val * 120 + 1, 0)
+    colors = np.zeros((HEIGHT, 3))
+    colors[:, 1] = np.minimum(255, 100 + hits * 5)
+    graph.draw(screen, (SCREEN_X, 0), paired_rows(lengths), paired_rows(colors))
+
+
+def time_frames(draw, screen, frames):
+    samples = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        screen.fill((10, 10, 20))
+        draw()
+        pygame.display.flip()
+        samples.append(time.perf_counter() - start)
+    return np.median(samples) * 1000
+
+
+def draw_static(surface, font):
+    """ Roughly what test3.py draws around the particles: barrier, fan, buttons. """
+    surface.fill((10, 10, 20))
+    fan = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+    pygame.draw.polygon(fan, (0, 200, 255, 20), [(300, 240), (300, 360), (SCREEN_X, HEIGHT), (SCREEN_X, 0)])
+    surface.blit(fan, (0, 0))
+    pygame.draw.line(surface, (70, 70, 80), (300, 0), (300, HEIGHT), 8)
+    for top in (225, 345):
+        pygame.draw.line(surface, (10, 10, 20), (300, top), (300, top + 30), 10)
+    pygame.draw.line(surface, (150, 150, 150), (SCREEN_X, 0), (SCREEN_X, HEIGHT), 2)
+    for i, label in enumerate(["Tennis Cannon", "Laser Beam", "Electron Gun", "Single Slit", "Double Slit", "FIRE", "CLEAR"]):
+        rect = (30 + (i % 3) * 140, 50 + (i // 3) * 60, 130, 40)
+        pygame.draw.rect(surface, (40, 40, 50), rect, border_radius=5)
+        pygame.draw.rect(surface, (100, 100, 100), rect, 2, border_radius=5)
+        surface.blit(font.render(label, True, (255, 255, 255)), (rect[0] + 10, rect[1] + 10))
+
+
+def time_scene(screen, font, graph, x, y, state, hits, frames, cached):
+    layers = LayeredScreen(screen, lambda surface: draw_static(surface, font))
+    samples = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        if cached:
+            layers.begin("scene")
+        else:
+            draw_static(screen, font)
+        draw_batched(screen, graph, x, y, state, hits)
+        if cached:
+            layers.mark_points(x, y, max(RADII))
+            layers.mark((SCREEN_X, 0, graph.width, graph.height))
+            layers.finish()
+        else:
+            pygame.display.flip()
+        samples.append(time.perf_counter() - start)
+    return np.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--frames", type=int, default=30)
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    graph = BarGraph(122, HEIGHT)
+    rng = np.random.default_rng(0)
+    hits = rng.poisson(20, HEIGHT).astype(float)
+
+    print(f"{'particles':>10} {'per-call ms':>12} {'batched ms':>11} {'speedup':>8}")
+    for count in args.counts:
+        x = rng.uniform(50, SCREEN_X, count)
+        y = rng.uniform(0, HEIGHT, count)
+        state = (x > 300).astype(np.uint8)
+        old = time_frames(lambda: draw_per_call(screen, x, y, state, hits), screen, args.frames)
+        new = time_frames(lambda: draw_batched(screen, graph, x, y, state, hits), screen, args.frames)
+        print(f"{count:>10} {old:>12.2f} {new:>11.2f} {old / new:>7.1f}x")
+
+    font = pygame.font.SysFont("Arial", 16, bold=True)
+    print(f"\n{'particles':>10} {'full redraw ms':>15} {'cached layers ms':>17} {'speedup':>8}")
+    for count in [c for c in (100, 500, 2000) if c <= max(args.counts)]:
+        x = rng.uniform(50, SCREEN_X, count)
+        y = rng.normal(HEIGHT / 2, 60, count)
+        state = (x > 300).astype(np.uint8)
+        old = time_scene(screen, font, graph, x, y, state, hits, args.frames, cached=False)
+        new = time_scene(screen, font, graph, x, y, state, hits, args.frames, cached=True)
+        print(f"{count:>10} {old:>15.2f} {new:>17.2f} {old / new:>7.1f}x")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
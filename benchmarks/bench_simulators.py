@@ -0,0 +1,154 @@
+"""
+Benchmark: whole-frame rate of the simulators, headless.
+
+Builds each simulator, switches it to every setup it offers, presses fire and
+runs a fixed number of frames, timing each one:
+- test3.py: classical / wave / quantum x single / double, quantum also with
+  the observer on (the other models have no observer)
+- test2.py: single / double / triple slit and grating
+- test.py:  the same four barriers, in a Tk window placed off-screen (needs an
+  X display, e.g. xvfb-run; skipped when Tk cannot open one)
+
+The pygame simulators run on SDL's dummy video driver and are fed a fixed
+1/60 s per frame, so every frame does the same physics work however fast the
+machine is; test.py moves its particles a fixed distance per step(). Frames
+run back to back, with no frame-rate cap. Hit logs go to a temporary folder,
+so every run starts from an empty screen and hit_logs/ is left alone.
+
+Reports frames/sec, frame time percentiles, the peak number of particles in
+flight and the growth of the process's resident memory over the timed frames
+(after --warmup frames, so filling the beam and first-use caches don't count).
+
+# to run from root folder
+python -m benchmarks.bench_simulators --frames 600
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import numpy as np
+import pygame
+
+from slit_lab.profiling import trace_path
+
+FRAME_SECONDS = 1 / 60
+
+TEST3_SETUPS = [dict(particle_mode=model, slit_mode=slits, observer_on=observer)
+                for model in ("classical", "wave", "quantum")
+                for slits in ("single", "double")
+                for observer in ((False, True) if model == "quantum" else (False,))]
+BARRIERS = ("single", "double", "triple", "grating")
+
+
+def rss_mb():
+    """ Resident memory of this process in MB (peak resident memory where /proc is unavailable). """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(step, count, frames, warmup):
+    """ Runs `warmup` + `frames` frames of step(); (frame times in s, peak particles, MB of memory growth). """
+    for _ in range(warmup):
+        step()
+    gc.collect()
+    before = rss_mb()
+    times = np.zeros(frames)
+    peak = 0
+    for i in range(frames):
+        start = time.perf_counter()
+        step()
+        times[i] = time.perf_counter() - start
+        peak = max(peak, count())
+    gc.collect()
+    return times, peak, rss_mb() - before
+
+
+def run_pygame(module, setup, frames, warmup, log_dir):
+    """ One setup of test2.py/test3.py's SlitSimulator, firing for the whole run. """
+    sim = module.SlitSimulator(log_dir=log_dir)
+    sim.set_modes(**setup)
+    sim.is_firing = True
+    try:
+        return measure(lambda: sim.frame(FRAME_SECONDS, pygame.event.get()),
+                       lambda: len(sim.particles), frames, warmup) + (sim.profiler,)
+    finally:
+        sim.close()
+
+
+def run_tk(mode, frames, warmup, log_dir):
+    """
+    One barrier of test.py's QuantumSimulator; a frame is Tk's redraw and
+    event pass plus one step(). None when Tk cannot open a window.
+    """
+    import tkinter as tk
+    import test
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    root.geometry("+-4000+-4000")  # mapped and drawn like a real window, but out of sight
+    app = test.QuantumSimulator(root, log_dir=log_dir, start=False)
+    app.mode_var.set(mode)
+    app.reset_screen()
+    app.toggle_fire()
+
+    def frame():
+        root.update()
+        app.step()
+    try:
+        return measure(frame, lambda: len(app.particles), frames, warmup) + (app.profiler,)
+    finally:
+        app.hit_log.close()
+        root.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scripts", nargs="+", choices=["test", "test2", "test3"], default=["test", "test2", "test3"])
+    parser.add_argument("--frames", type=int, default=600, help="timed frames per setup")
+    parser.add_argument("--warmup", type=int, default=60, help="untimed frames fired first")
+    parser.add_argument("--traces", action="store_true",
+                        help="also write each run's per-phase trace to profiles/bench_<script>_<setup>.csv")
+    args = parser.parse_args()
+
+    runs = []
+    if "test3" in args.scripts:
+        import test3
+        for setup in TEST3_SETUPS:
+            name = f"{setup['particle_mode']} {setup['slit_mode']}" + (" observed" if setup["observer_on"] else "")
+            runs.append(("test3", name, lambda log_dir, setup=setup: run_pygame(test3, setup, args.frames, args.warmup, log_dir)))
+    if "test2" in args.scripts:
+        import test2
+        for mode in BARRIERS:
+            runs.append(("test2", mode, lambda log_dir, mode=mode: run_pygame(test2, dict(mode=mode), args.frames, args.warmup, log_dir)))
+    if "test" in args.scripts:
+        for mode in BARRIERS:
+            runs.append(("test", mode, lambda log_dir, mode=mode: run_tk(mode, args.frames, args.warmup, log_dir)))
+
+    print(f"{args.frames} frames per setup after {args.warmup} warm-up frames, firing throughout\n")
+    print(f"{'script':<6} {'setup':<26} {'fps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'peak particles':>15} {'memory MB':>10}")
+    with tempfile.TemporaryDirectory() as log_dir:
+        for script, name, run in runs:
+            result = run(log_dir)
+            if result is None:
+                print(f"{script:<6} {name:<26} skipped (no display)")
+                continue
+            times, peak, growth, profiler = result
+            p50, p95, p99 = np.percentile(times, [50, 95, 99]) * 1000
+            print(f"{script:<6} {name:<26} {len(times) / times.sum():>8.1f} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f} "
+                  f"{times.max() * 1000:>8.2f} {peak:>15} {growth:>+10.1f}")
+            if args.traces:
+                profiler.dump(trace_path(f"bench_{script}_{name.replace(' ', '_')}"))
+
+
+if __name__ == "__main__":
+    main()
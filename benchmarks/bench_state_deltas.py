@@ -0,0 +1,85 @@
+"""
+Benchmark: per-platform state_delta updates vs rewriting the whole preferences.
+
+Both variants go through the same InMemorySessionService and persist every
+change to disk; "full" re-serializes the complete preferences dict per edit,
+"delta" appends only the edited platform through StateJournal.
+
+# to run from root folder
+python -m benchmarks.bench_state_deltas --edits 2000 --platforms 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+# The agent module reads its model from the environment at import time
+os.environ.setdefault("GOOGLE_GENAI_MODEL", "gemini-2.5-flash-lite")
+from google.adk.sessions import InMemorySessionService
+
+from src.Sessions_memory.state_deltas import StateJournal, apply_state_delta, preference_delta, preference_key
+
+APP_NAME = "bench"
+USER_ID = "bench"
+
+
+def make_preferences(platforms: int, size: int) -> dict:
+    return {preference_key(f"platform {i}"): f"preference text {i} " * (size // 20) for i in range(platforms)}
+
+
+async def bench_full(preferences: dict, edits: int, workdir: str) -> float:
+    service = InMemorySessionService()
+    session = await service.create_session(app_name=APP_NAME, user_id=USER_ID, state={"prefs": preferences})
+    path = os.path.join(workdir, "full.jsonl")
+    start = time.perf_counter()
+    with open(path, "a", encoding="utf-8") as f:
+        for i in range(edits):
+            prefs = dict(session.state["prefs"])
+            prefs[preference_key(f"platform {i % len(prefs)}")] = f"edit {i}"
+            await apply_state_delta(service, session, {"prefs": prefs})
+            f.write(json.dumps({"prefs": prefs}) + "\n")
+    return time.perf_counter() - start
+
+
+async def bench_delta(preferences: dict, edits: int, workdir: str) -> float:
+    service = InMemorySessionService()
+    session = await service.create_session(app_name=APP_NAME, user_id=USER_ID, state=preferences)
+    journal = StateJournal(os.path.join(workdir, "journal"), snapshot_every=500)
+    journal.record(session.id, preferences)
+    start = time.perf_counter()
+    for i in range(edits):
+        delta = preference_delta(f"platform {i % len(preferences)}", f"edit {i}")
+        await apply_state_delta(service, session, delta, journal=journal)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--edits", type=int, default=2000)
+    parser.add_argument("--platforms", type=int, default=20)
+    parser.add_argument("--size", type=int, default=1000, help="Characters per platform preference")
+    args = parser.parse_args()
+
+    preferences = make_preferences(args.platforms, args.size)
+    with tempfile.TemporaryDirectory() as workdir:
+        full = asyncio.run(bench_full(preferences, args.edits, workdir))
+        delta = asyncio.run(bench_delta(preferences, args.edits, workdir))
+
+        journal = StateJournal(os.path.join(workdir, "journal"), snapshot_every=500)
+        sid = os.listdir(os.path.join(workdir, "journal"))[0].split(".")[0]
+        start = time.perf_counter()
+        journal.load(sid)
+        load = time.perf_counter() - start
+
+    per_full = full / args.edits * 1e6
+    per_delta = delta / args.edits * 1e6
+    print(f"{args.edits} edits, {args.platforms} platforms x {args.size} chars")
+    print(f"full rewrite : {per_full:8.1f} us/edit")
+    print(f"state_delta  : {per_delta:8.1f} us/edit  ({per_full / per_delta:.1f}x faster)")
+    print(f"journal load (snapshot + replay): {load * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
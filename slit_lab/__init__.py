@@ -0,0 +1 @@
+"""Shared physics and simulation helpers for the double-slit simulators (test*.py)."""
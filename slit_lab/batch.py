@@ -0,0 +1,215 @@
+"""
+Headless batch runs of the slit models.
+
+Runs the same physics as the simulators, without a window or frame loop, for
+millions of particles. Work is split into fixed-size chunks with one seed each
+(spawned from a single SeedSequence), so a run is reproducible for a given
+--seed whatever the number of workers. Chunk histograms are merged and written
+per (barrier, model) as .npz and .csv.
+
+Models (test3.py physics):
+- classical: tennis balls, Gaussian pile behind each opening
+- quantum:   electrons, wave interference pattern
+- observer:  electrons measured at the slit with distinguishability --which-path
+             (1: no fringes left, 0: same as quantum); double slit only
+- wave:      the exact intensity pattern itself (no particles to sample)
+
+# to run from root folder
+python -m slit_lab.batch --slits single double --models classical quantum wave --particles 5000000 --out batch_results
+python -m slit_lab.batch --slits double --models observer --which-path 0.5 --particles 5000000 --out batch_results
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .convergence import ConvergenceTracker
+from .decoherence import mixture_table
+from .physics import BARRIERS, barrier_gaps
+from .sampler import LandingSampler, gaussian_sampler, wave_sampler
+
+MODELS = ("classical", "quantum", "observer", "wave")
+CHUNK = 1_000_000
+
+# Defaults match test3.py (pixels, screen center at 0)
+DEFAULTS = {
+    "wavelength": 25.0,
+    "slit_width": 15.0,
+    "slit_distance": 120.0,
+    "screen_dist": 750.0,  # SCREEN_X - BARRIER_X
+    "height": 600,
+    "spread_factor": 2000.0,  # variance of the classical piles
+    "which_path": 1.0,  # distinguishability of the observer's measurement
+    "source_frames": 21,  # frames from the gun tip to the barrier
+}
+SOURCE_SPREAD = {"classical": 6.0, "quantum": 4.0, "observer": 4.0}
+
+
+def landing_sampler(config) -> LandingSampler:
+    """ Shared (cached) sampler of landing offsets for the configured barrier and model. """
+    half = config["height"] / 2
+    centers = tuple(c for c, _ in barrier_gaps(config["slits"], config["slit_width"], config["slit_distance"]))
+    if config["model"] == "classical":
+        return gaussian_sampler(centers, math.sqrt(config["spread_factor"]), -half, half)
+    if config["model"] == "observer":
+        if config["slits"] != "double":
+            raise ValueError(f"the observer model needs the double slit, not {config['slits']!r}")
+        table = mixture_table(config["wavelength"], config["slit_width"], config["slit_distance"],
+                              config["screen_dist"], -half, half)
+        return table.sampler(config["which_path"])
+    return wave_sampler(config["slits"], config["wavelength"], config["slit_width"],
+                        config["slit_distance"], config["screen_dist"], -half, half)
+
+
+def bin_edges(config, bins: int) -> np.ndarray:
+    half = config["height"] / 2
+    return np.linspace(-half, half, bins + 1)
+
+
+def expected_fractions(config, bins: int) -> np.ndarray:
+    """ Probability of each bin for one particle that passed the barrier. """
+    return landing_sampler(config).bin_probabilities(bin_edges(config, bins))
+
+
+def simulate_chunk(config, count: int, bins: int, seed):
+    """
+    Fires `count` particles and returns (histogram of landing offsets, passed).
+    Particles leave the gun with a uniform vertical spread, are blocked unless
+    they reach an opening, and land where the model's distribution says.
+    """
+    rng = np.random.default_rng(seed)
+    half = config["height"] / 2
+    gaps = barrier_gaps(config["slits"], config["slit_width"], config["slit_distance"])
+
+    spread = SOURCE_SPREAD[config["model"]]
+    at_barrier = rng.uniform(-spread, spread, count) * config["source_frames"]
+    slit = np.full(count, np.nan)
+    for center, half_gap in gaps:
+        inside = np.isnan(slit) & (np.abs(at_barrier - center) < half_gap)
+        slit[inside] = center
+    slit = slit[~np.isnan(slit)]
+
+    sampler = LandingSampler(-half, half, landing_sampler(config).pdf, seed=rng)
+    landed = sampler.sample(len(slit))
+    # Off-screen hits pile up on the edge rows, as in the simulators
+    idx = np.clip(((landed + half) / config["height"] * bins).astype(np.int64), 0, bins - 1)
+    return np.bincount(idx, minlength=bins), len(slit)
+
+
+def _chunks(total: int, chunk: int = CHUNK):
+    full, rest = divmod(total, chunk)
+    return [chunk] * full + ([rest] if rest else [])
+
+
+def _chunk_results(config, sizes, bins, seeds, workers):
+    """ Chunk histograms in chunk order; later chunks are only started as needed. """
+    if workers <= 1 or len(sizes) == 1:
+        yield from map(simulate_chunk, [config] * len(sizes), sizes, [bins] * len(sizes), seeds)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        try:
+            for args in zip([config] * len(sizes), sizes, [bins] * len(sizes), seeds):
+                pending.append(pool.submit(simulate_chunk, *args))
+                # Keep every worker busy plus one chunk queued
+                if len(pending) > workers:
+                    yield pending.pop(0).result()
+            while pending:
+                yield pending.pop(0).result()
+        finally:
+            # Reached early when the caller stops (converged): drop queued chunks
+            for future in pending:
+                future.cancel()
+
+
+def run(config, particles: int, bins: int, seed: int = 0, workers: int = 1,
+        chunk: int = CHUNK, target_kl: float = None):
+    """
+    Returns {"edges", "counts", "expected", "passed", "fired", "kl", "reduced_chi2",
+    "visibility", "theory_visibility"} for one barrier and model. `counts` sums
+    the chunk histograms; `expected` is the exact per-bin count for the
+    particles that passed. With `target_kl`, chunks are merged in order and
+    the run stops after the first chunk that brings KL(empirical || theory)
+    down to the target, so `fired` may be less than `particles`. The stopping
+    chunk does not depend on the number of workers.
+    """
+    fractions = expected_fractions(config, bins)
+    edges = bin_edges(config, bins)
+    tracker = ConvergenceTracker(fractions)
+    if config["model"] == "wave":
+        # A continuous wave has nothing to sample: the pattern is the answer
+        expected = fractions * particles
+        return {"edges": edges, "counts": expected, "expected": expected, "passed": particles, "fired": particles,
+                "kl": 0.0, "reduced_chi2": 0.0, "visibility": tracker.theory_visibility,
+                "theory_visibility": tracker.theory_visibility}
+
+    sizes = _chunks(particles, chunk)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    fired = 0
+    results = _chunk_results(config, sizes, bins, seeds, workers)
+    for size, (hist, n) in zip(sizes, results):
+        tracker.add_counts(hist)
+        fired += size
+        if target_kl is not None and tracker.converged(target_kl):
+            results.close()  # cancels the chunks still queued
+            break
+    return {"edges": edges, "counts": tracker.counts.copy(), "expected": fractions * tracker.n,
+            "passed": tracker.n, "fired": fired, "kl": tracker.kl, "reduced_chi2": tracker.reduced_chi2,
+            "visibility": tracker.visibility, "theory_visibility": tracker.theory_visibility}
+
+
+def save(result, config, path_stem: str):
+    """ Writes <stem>.npz (arrays + JSON config) and <stem>.csv (one row per bin). """
+    np.savez_compressed(path_stem + ".npz", config=json.dumps(config), **result)
+    centers = (result["edges"][:-1] + result["edges"][1:]) / 2
+    table = np.column_stack([centers, result["counts"], result["expected"]])
+    np.savetxt(path_stem + ".csv", table, delimiter=",", header="y,count,expected", comments="", fmt="%.6g")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless batch simulation of the slit experiments")
+    parser.add_argument("--slits", nargs="+", default=["double"], choices=sorted(BARRIERS))
+    parser.add_argument("--models", nargs="+", default=["quantum"], choices=MODELS)
+    parser.add_argument("--particles", type=float, default=1e6, help="particles fired per run (1e6 style allowed)")
+    parser.add_argument("--bins", type=int, default=DEFAULTS["height"], help="histogram bins across the screen")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--out", default="batch_results", help="output directory")
+    parser.add_argument("--chunk", type=float, default=CHUNK, help="particles per seeded work unit")
+    parser.add_argument("--target-kl", type=float, default=None,
+                        help="stop early once KL(empirical || theory) is at most this (nats)")
+    for name in ("wavelength", "slit_width", "slit_distance", "screen_dist", "which_path"):
+        parser.add_argument("--" + name.replace("_", "-"), dest=name, type=float, default=DEFAULTS[name])
+    args = parser.parse_args()
+    if "observer" in args.models and set(args.slits) != {"double"}:
+        parser.error("--models observer needs --slits double (which-path data is only modelled for two slits)")
+
+    os.makedirs(args.out, exist_ok=True)
+    particles = int(args.particles)
+    for slits in args.slits:
+        for model in args.models:
+            config = dict(DEFAULTS, slits=slits, model=model,
+                          **{k: getattr(args, k) for k in ("wavelength", "slit_width", "slit_distance", "screen_dist",
+                                                           "which_path")})
+            start = time.perf_counter()
+            result = run(config, particles, args.bins, seed=args.seed, workers=args.workers,
+                         chunk=int(args.chunk), target_kl=args.target_kl)
+            elapsed = time.perf_counter() - start
+            stem = os.path.join(args.out, f"{slits}_{model}")
+            save(result, config, stem)
+            if model == "wave":
+                print(f"{slits:>8} {model:>10}: exact pattern scaled to {particles:,} -> {stem}.npz/.csv")
+            else:
+                fired = result["fired"]
+                print(f"{slits:>8} {model:>10}: {result['passed']:,} of {fired:,} through the barrier "
+                      f"in {elapsed:.2f}s ({fired / max(elapsed, 1e-9) / 1e6:.1f}M/s), KL {result['kl']:.2e}, "
+                      f"chi2/dof {result['reduced_chi2']:.2f}, visibility {result['visibility']:.3f} "
+                      f"(theory {result['theory_visibility']:.3f}) -> {stem}.npz/.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Streaming goodness-of-fit of an accumulating hit histogram.
+
+The tracker keeps a few running sums next to the bin counts, so adding a batch
+of hits costs O(bins) (one bincount) however many hits came before:
+
+    chi2 = sum (O - n p)^2 / (n p)          = S / n - n,   S = sum O^2 / p
+    KL(empirical || theory) = sum q log(q / p) = A / n - log n - B / n,
+                              A = sum O log O,  B = sum O log p
+
+Fringe visibility (Imax - Imin) / (Imax + Imin) is measured on fixed windows
+around the central maximum and its neighbouring minima of the theoretical
+pattern, whose counts are kept as running sums as well.
+"""
+import math
+
+import numpy as np
+
+P_FLOOR = 1e-12
+
+
+def _xlogx(x):
+    x = np.asarray(x, dtype=np.float64)
+    return np.where(x > 0, x * np.log(np.where(x > 0, x, 1)), 0.0)
+
+
+def clipped_gaussian_fractions(centers, sigma, edges):
+    """
+    Bin probabilities of an equal mix of Gaussians at `centers`, with the tails
+    piled onto the first and last bin (the simulators clip hits to the screen).
+    """
+    erf = np.vectorize(math.erf)
+    edges = np.asarray(edges, dtype=np.float64)
+    cdf = sum(0.5 * (1 + erf((edges - c) / (sigma * math.sqrt(2)))) for c in centers) / len(centers)
+    cdf[0], cdf[-1] = 0.0, 1.0
+    return np.diff(cdf)
+
+
+def fringe_windows(p):
+    """
+    (max bins, min bins) of the theoretical pattern: bins around its peak and
+    around the nearest local minimum on either side, each window a quarter of
+    the peak-to-minimum distance wide. Empty min bins if the pattern has none.
+    """
+    p = np.asarray(p, dtype=np.float64)
+    peak = int(np.argmax(p))
+    interior = np.arange(1, len(p) - 1)
+    is_min = (p[interior] <= p[interior - 1]) & (p[interior] <= p[interior + 1]) & (p[interior] < p[peak])
+    minima = interior[is_min]
+    left, right = minima[minima < peak], minima[minima > peak]
+    neighbours = ([int(left[-1])] if len(left) else []) + ([int(right[0])] if len(right) else [])
+    if not neighbours:
+        return np.array([peak]), np.array([], dtype=int)
+    half = max(1, min(abs(m - peak) for m in neighbours) // 8)
+    span = lambda c: np.arange(max(c - half, 0), min(c + half + 1, len(p)))
+    return span(peak), np.concatenate([span(m) for m in neighbours])
+
+
+def visibility(max_mean, min_mean):
+    total = max_mean + min_mean
+    return (max_mean - min_mean) / total if total > 0 else 0.0
+
+
+class ConvergenceTracker:
+    """
+    Running chi-square, KL divergence and fringe visibility of hits against
+    `expected`, the theoretical probability (or any non-negative weight) per bin.
+    """
+
+    def __init__(self, expected):
+        p = np.clip(np.asarray(expected, dtype=np.float64), 0, None)
+        self.p = np.maximum(p / p.sum(), P_FLOOR)
+        self._inv_p = 1 / self.p
+        self._log_p = np.log(self.p)
+        self.dof = max(int(np.count_nonzero(p > 0)) - 1, 1)
+        self._max_bins, self._min_bins = fringe_windows(self.p)
+        self.theory_visibility = visibility(self.p[self._max_bins].mean(),
+                                            self.p[self._min_bins].mean() if len(self._min_bins) else 0.0)
+        self.reset()
+
+    def reset(self):
+        self.counts = np.zeros(len(self.p), dtype=np.int64)
+        self.n = 0
+        self._s = 0.0  # sum O^2 / p
+        self._a = 0.0  # sum O log O
+        self._b = 0.0  # sum O log p
+        self._max_hits = 0
+        self._min_hits = 0
+
+    def add(self, bins):
+        """ Adds one hit per entry of `bins` (bin indices, out-of-range entries ignored). """
+        bins = np.asarray(bins, dtype=np.int64)
+        bins = bins[(bins >= 0) & (bins < len(self.p))]
+        if len(bins):
+            self.add_counts(np.bincount(bins, minlength=len(self.p)))
+
+    def add_counts(self, increments):
+        """ Adds a histogram of new hits (same binning as `expected`). """
+        c = np.asarray(increments, dtype=np.int64)
+        touched = np.flatnonzero(c)
+        if len(touched) == 0:
+            return
+        old = self.counts[touched]
+        new = old + c[touched]
+        self._s += float(((new * new - old * old) * self._inv_p[touched]).sum())
+        self._a += float((_xlogx(new) - _xlogx(old)).sum())
+        self._b += float((c[touched] * self._log_p[touched]).sum())
+        self._max_hits += int(c[self._max_bins].sum())
+        self._min_hits += int(c[self._min_bins].sum())
+        self.counts[touched] = new
+        self.n += int(c[touched].sum())
+
+    # --- METRICS ---
+    @property
+    def chi2(self) -> float:
+        return self._s / self.n - self.n if self.n else 0.0
+
+    @property
+    def reduced_chi2(self) -> float:
+        """ chi2 / degrees of freedom, about 1 once the hits follow the theory. """
+        return self.chi2 / self.dof
+
+    @property
+    def kl(self) -> float:
+        """ KL(empirical || theory) in nats; shrinks like dof / 2n for a matching pattern. """
+        if not self.n:
+            return math.inf
+        return max(self._a / self.n - math.log(self.n) - self._b / self.n, 0.0)
+
+    @property
+    def visibility(self) -> float:
+        if not len(self._min_bins):
+            return 1.0 if self.n else 0.0
+        return visibility(self._max_hits / len(self._max_bins), self._min_hits / len(self._min_bins))
+
+    def converged(self, target_kl: float, min_hits: int = 100) -> bool:
+        return self.n >= min_hits and self.kl <= target_kl
+
+    def summary(self) -> dict:
+        return {
+            "hits": self.n,
+            "chi2": self.chi2,
+            "reduced_chi2": self.reduced_chi2,
+            "kl": self.kl,
+            "visibility": self.visibility,
+            "theory_visibility": self.theory_visibility,
+        }
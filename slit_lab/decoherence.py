@@ -0,0 +1,83 @@
+"""
+Partial which-path measurement for the double slit.
+
+A detector at the slits that tells the paths apart with distinguishability D
+(0 = learns nothing, 1 = always knows the slit) leaves the screen pattern
+
+    I_D = sqrt(1 - D^2) * I_coherent + (1 - sqrt(1 - D^2)) * I_incoherent
+        = envelope * (1 + V cos(k d sin(theta))) / 2,      V = sqrt(1 - D^2)
+
+where I_coherent is the usual interference pattern and I_incoherent the sum
+of the two single-slit patterns (the envelope, halved). The fringe visibility
+V falls continuously from 1 to 0 as D goes from 0 to 1.
+
+MixtureTable precomputes the blended pattern for a grid of D values and one
+landing sampler (CDF) per value. Moving a slider therefore only picks another
+precomputed sampler, and no pattern is evaluated per frame.
+"""
+import functools
+
+import numpy as np
+
+from .physics import GRID_POINTS, screen_grid, two_slit_intensity
+from .sampler import LandingSampler
+
+LEVELS = 65
+
+
+def fringe_visibility(distinguishability):
+    """ V = sqrt(1 - D^2): how much interference survives a which-path measurement. """
+    d = np.clip(distinguishability, 0.0, 1.0)
+    return np.sqrt(1 - d * d)
+
+
+def partial_which_path(y, wavelength, slit_width, slit_distance, screen_dist, distinguishability):
+    """ Double-slit intensity at offsets `y` with which-path distinguishability D (peak 1 at D = 0). """
+    theta = np.arctan(np.asarray(y, dtype=np.float64) / screen_dist)
+    envelope = two_slit_intensity(y, "single", wavelength, slit_width, slit_distance, screen_dist)
+    phase = (2 * np.pi / wavelength) * slit_distance * np.sin(theta)
+    return envelope * (1 + fringe_visibility(distinguishability) * np.cos(phase)) / 2
+
+
+class MixtureTable:
+    """
+    Blended patterns of one double-slit setup on screen_grid(lo, hi, points),
+    for `levels` distinguishabilities evenly spaced over 0..1, each with a
+    ready landing sampler.
+    """
+
+    def __init__(self, wavelength, slit_width, slit_distance, screen_dist, lo, hi,
+                 levels=LEVELS, points=GRID_POINTS):
+        self.lo, self.hi = lo, hi
+        self.distinguishability = np.linspace(0.0, 1.0, levels)
+        y = screen_grid(lo, hi, points)
+        # Both terms are computed once; each level is a weighted sum of them
+        envelope = two_slit_intensity(y, "single", wavelength, slit_width, slit_distance, screen_dist)
+        fringes = np.cos((2 * np.pi / wavelength) * slit_distance * np.sin(np.arctan(y / screen_dist)))
+        visibility = fringe_visibility(self.distinguishability)
+        self.patterns = envelope * (1 + visibility[:, None] * fringes) / 2
+        self.samplers = [LandingSampler(lo, hi, pattern) for pattern in self.patterns]
+
+    def level(self, distinguishability) -> int:
+        """ Index of the precomputed level nearest to D. """
+        d = min(max(float(distinguishability), 0.0), 1.0)
+        return int(round(d * (len(self.distinguishability) - 1)))
+
+    def snap(self, distinguishability) -> float:
+        """ D rounded to the precomputed level that sampling will use. """
+        return float(self.distinguishability[self.level(distinguishability)])
+
+    def sampler(self, distinguishability) -> LandingSampler:
+        return self.samplers[self.level(distinguishability)]
+
+    def pattern(self, distinguishability) -> np.ndarray:
+        return self.patterns[self.level(distinguishability)]
+
+    def bin_probabilities(self, distinguishability, edges) -> np.ndarray:
+        return self.sampler(distinguishability).bin_probabilities(edges)
+
+
+@functools.lru_cache(maxsize=16)
+def mixture_table(wavelength, slit_width, slit_distance, screen_dist, lo, hi, levels=LEVELS, points=GRID_POINTS):
+    """ Shared table for one double-slit setup. """
+    return MixtureTable(wavelength, slit_width, slit_distance, screen_dist, lo, hi, levels, points)
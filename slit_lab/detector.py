@@ -0,0 +1,145 @@
+"""
+2D detector accumulation buffer shown as a texture in the Ursina lab.
+
+Hits are binned into a numpy count image at any resolution, so a hit costs an
+array increment instead of a scene-graph update. The count image is colour
+mapped into the RAM image of a single Panda3D texture at most `upload_hz`
+times per second. Only the rows touched since the last upload are recoloured
+on the CPU, but Panda 1.10 has no sub-region upload for RAM images, so the
+GPU copy of the whole texture is refreshed each time. Colours are scaled
+against a reference level that doubles when the peak outgrows it, so the
+whole image is only recoloured when the scale changes.
+ProfilePlot draws a 1D profile (e.g. a zoomed window of the hits) as bars in
+a second small texture for the HUD.
+"""
+import numpy as np
+from panda3d.core import SamplerState, Texture
+
+
+def fringe_colormap(levels: int = 256) -> np.ndarray:
+    """ (levels, 4) RGBA uint8: black -> green -> white, like the old bars. """
+    t = np.linspace(0, 1, levels)
+    rgba = np.zeros((levels, 4))
+    rgba[:, 1] = np.clip(t * 1.6, 0, 1)
+    rgba[:, 0] = rgba[:, 2] = np.clip((t - 0.6) / 0.4, 0, 1)
+    rgba[:, 3] = 1
+    return (rgba * 255).astype(np.uint8)
+
+
+def _rgba_texture(name: str, cols: int, rows: int) -> Texture:
+    texture = Texture(name)
+    texture.setup_2d_texture(cols, rows, Texture.T_unsigned_byte, Texture.F_rgba8)
+    texture.set_wrap_u(SamplerState.WM_clamp)
+    texture.set_wrap_v(SamplerState.WM_clamp)
+    return texture
+
+
+def _ram_image(texture: Texture, cols: int, rows: int) -> np.ndarray:
+    """ (rows, cols, 4) BGRA view of the texture's RAM image; the whole texture is re-uploaded after this call. """
+    image = np.frombuffer(memoryview(texture.modify_ram_image()), dtype=np.uint8)
+    return image.reshape(rows, cols, 4)
+
+
+class DetectorTexture:
+    """
+    Count image of `resolution` (columns, rows) covering `x_range` x `y_range`
+    in world units, mirrored into `texture` (row 0 at the bottom, as Panda
+    stores it).
+    """
+
+    def __init__(self, resolution=(512, 64), x_range=(-20, 20), y_range=(-2.5, 2.5), upload_hz: float = 5.0):
+        self.cols, self.rows = resolution
+        self.x_range = x_range
+        self.y_range = y_range
+        self.upload_interval = 1.0 / upload_hz
+        self.counts = np.zeros((self.rows, self.cols), dtype=np.int64)
+        self.colormap = fringe_colormap()
+        # Panda keeps RAM images as BGRA
+        self._lut = self.colormap[:, [2, 1, 0, 3]]
+
+        self.texture = _rgba_texture("detector", self.cols, self.rows)
+        self._since_upload = 0.0
+        self.reset()
+
+    def reset(self):
+        self.counts[:] = 0
+        self.total = 0
+        self._scale = 4  # counts mapped to the top colour
+        self._dirty = None  # (first row, last row + 1) touched since the last upload
+        self._rescaled = True
+        self.upload()
+
+    def bin(self, x, y):
+        """ (row, column) of each world position, -1 where it misses the detector. """
+        (x0, x1), (y0, y1) = self.x_range, self.y_range
+        col = np.floor((np.asarray(x) - x0) / (x1 - x0) * self.cols).astype(np.int64)
+        row = np.floor((np.asarray(y) - y0) / (y1 - y0) * self.rows).astype(np.int64)
+        inside = (col >= 0) & (col < self.cols) & (row >= 0) & (row < self.rows)
+        return np.where(inside, row, -1), np.where(inside, col, -1)
+
+    def add(self, x, y):
+        """ Counts hits at world positions (x, y); misses are dropped. """
+        row, col = self.bin(x, y)
+        hit = row >= 0
+        if not hit.any():
+            return
+        row, col = row[hit], col[hit]
+        # Scales with the number of hits, not the resolution
+        np.add.at(self.counts, (row, col), 1)
+        self.total += len(row)
+        first, last = int(row.min()), int(row.max()) + 1
+        if self._dirty is not None:
+            first, last = min(first, self._dirty[0]), max(last, self._dirty[1])
+        self._dirty = (first, last)
+
+        # Only the hit cells grew, so the new peak is among them
+        peak = int(self.counts[row, col].max())
+        if peak > self._scale:
+            while self._scale < peak:
+                self._scale *= 2
+            self._rescaled = True
+
+    def tick(self, dt: float) -> bool:
+        """ Call once per frame; uploads pending changes when the interval has passed. """
+        self._since_upload += dt
+        if self._since_upload < self.upload_interval or (self._dirty is None and not self._rescaled):
+            return False
+        self.upload()
+        return True
+
+    def upload(self):
+        """ Recolours the dirty rows (all rows after a rescale) into the texture's RAM image, then Panda re-uploads it. """
+        first, last = (0, self.rows) if self._rescaled else self._dirty or (0, 0)
+        if last > first:
+            image = _ram_image(self.texture, self.cols, self.rows)
+            # Square-root scaling keeps single hits visible next to bright fringes
+            level = np.sqrt(np.minimum(self.counts[first:last] / self._scale, 1.0))
+            image[first:last] = self._lut[(level * (len(self._lut) - 1)).astype(np.intp)]
+        self._dirty = None
+        self._rescaled = False
+        self._since_upload = 0.0
+
+    def column_profile(self) -> np.ndarray:
+        """ Hits per column summed over the detector height (the 1D fringe pattern). """
+        return self.counts.sum(axis=0)
+
+
+class ProfilePlot:
+    """ Bar chart of one value per column, `size` (columns, rows) pixels, bars scaled to the tallest. """
+
+    def __init__(self, size=(512, 128), background=(10, 10, 20, 200)):
+        self.cols, self.rows = size
+        self._lut = fringe_colormap()[:, [2, 1, 0, 3]]
+        self._background = np.array(background, dtype=np.uint8)[[2, 1, 0, 3]]
+        self._row_index = np.arange(self.rows)[:, None]
+        self.texture = _rgba_texture("profile", self.cols, self.rows)
+        self.draw(np.zeros(self.cols))
+
+    def draw(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        level = values / values.max() if values.max() > 0 else values
+        heights = np.where(values > 0, np.maximum(level * self.rows, 1), 0)
+        bar = self._lut[(np.sqrt(level) * (len(self._lut) - 1)).astype(np.intp)]
+        filled = self._row_index < heights[None, :]
+        image = _ram_image(self.texture, self.cols, self.rows)
+        image[:] = np.where(filled[:, :, None], bar[None, :, :], self._background)
@@ -0,0 +1,306 @@
+"""
+Append-only binary log of detector hits.
+
+The simulators only keep per-row histograms, which are lost when the window
+closes or the screen is cleared. A hit log stores every hit position as a
+packed fixed-size record, so a run can be resumed, replayed or re-binned at
+any resolution later without simulating it again. Hits are buffered in numpy
+and written in chunks, and the reader memory-maps the records. Re-binning
+millions of hits is a few bincounts over the mapped array.
+
+File layout:
+    FILE_MAGIC | u32 header length | JSON header (space padded to 64 bytes)
+    [record]...   one value per column, little-endian float32 or uint16
+
+The JSON header holds the column names, the record dtype, the value range of
+each column (uint16 records are quantized over it) and the run metadata.
+Reopening a log for writing resumes it as long as the header matches.
+Clearing a run, or reopening it with other settings, moves the log aside to
+<name>.<timestamp>.hitlog; the newest ARCHIVE_KEEP archives of each log are
+kept and older ones deleted.
+
+# to run from root folder
+python -m slit_lab.hitlog hit_logs/test3_quantum_double_unobserved.hitlog --bins 300 --out rebinned.csv
+"""
+import argparse
+import json
+import os
+import re
+import struct
+import time
+
+import numpy as np
+
+FILE_MAGIC = b"SLITHIT1"
+HEADER_LEN = struct.Struct("<I")
+ALIGN = 64
+DTYPES = {"float32": np.dtype("<f4"), "uint16": np.dtype("<u2")}
+UINT16_CELLS = 65536
+LOG_DIR = "hit_logs"
+ARCHIVE_KEEP = 10  # archived runs kept per log by archive()
+
+
+def log_path(*parts, directory: str = LOG_DIR) -> str:
+    """ hit_logs/<part>_<part>.hitlog, one file per simulator setup. """
+    return os.path.join(directory, "_".join(str(p) for p in parts) + ".hitlog")
+
+
+def archive(path: str, keep: int = ARCHIVE_KEEP):
+    """
+    Moves an existing log aside so a fresh run can start at `path`, and
+    deletes all but the newest `keep` archives of it (None keeps them all).
+    Returns the archive's path, None if there was no log.
+    """
+    if not os.path.exists(path):
+        return None
+    stem, ext = os.path.splitext(path)
+    now = time.time()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now % 1 * 1e6):06d}"
+    target, n = f"{stem}.{stamp}{ext}", 1
+    while os.path.exists(target):  # never overwrite an earlier archive
+        n += 1
+        target = f"{stem}.{stamp}-{n}{ext}"
+    os.replace(path, target)
+    if keep is not None:
+        for old in archives(path)[:-keep or None]:
+            os.remove(old)
+    return target
+
+
+def archives(path: str) -> list:
+    """ Archived runs of the log at `path`, oldest first. """
+    directory, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    pattern = re.compile(re.escape(stem) + r"\.(\d{8}-\d{6}(?:-\d{6})?)(?:-(\d+))?" + re.escape(ext) + "$")
+    found = []
+    for entry in os.listdir(directory or "."):
+        match = pattern.match(entry)
+        if match:
+            found.append((match.group(1), int(match.group(2) or 1), os.path.join(directory, entry)))
+    return [entry[2] for entry in sorted(found)]
+
+
+def _read_header(f) -> tuple:
+    """ (header dict, offset of the first record) """
+    head = f.read(len(FILE_MAGIC) + HEADER_LEN.size)
+    if head[:len(FILE_MAGIC)] != FILE_MAGIC:
+        raise ValueError(f"{f.name} is not a hit log")
+    (length,) = HEADER_LEN.unpack_from(head, len(FILE_MAGIC))
+    return json.loads(f.read(length)), len(head) + length
+
+
+def _make_header(columns, meta, dtype, ranges) -> dict:
+    header = {"columns": list(columns), "dtype": dtype, "meta": meta or {},
+              "ranges": [list(map(float, r)) for r in ranges] if ranges is not None else None}
+    # Round-tripped so it compares equal to a header read back from a file
+    return json.loads(json.dumps(header))
+
+
+def _encode_header(header: dict) -> bytes:
+    body = json.dumps(header, sort_keys=True).encode("utf-8")
+    used = len(FILE_MAGIC) + HEADER_LEN.size + len(body)
+    body += b" " * (-used % ALIGN)  # records start on an aligned offset
+    return FILE_MAGIC + HEADER_LEN.pack(len(body)) + body
+
+
+class HitLogWriter:
+    """
+    Appends hits to `path`, one record per hit with one value per column.
+    `ranges` gives the (low, high) of each column; uint16 records split it
+    into 65536 cells and read back as cell centers (values outside are
+    clipped to the first or last cell). Hits are buffered and
+    written every `chunk` hits, or at the next append after `flush_seconds`.
+
+    An existing log is resumed; ValueError if it was written with different
+    columns, dtype, ranges or metadata (see open_log).
+    """
+
+    def __init__(self, path: str, columns=("y",), meta=None, dtype: str = "float32", ranges=None,
+                 chunk: int = 65536, flush_seconds: float = 2.0):
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {sorted(DTYPES)}")
+        if dtype == "uint16" and ranges is None:
+            raise ValueError("uint16 records need a value range per column")
+        self.path = path
+        self.columns = tuple(columns)
+        self.dtype = DTYPES[dtype]
+        self.header = _make_header(self.columns, meta, dtype, ranges)
+        self._lo, self._scale = _quantization(self.header)
+        self.flush_seconds = flush_seconds
+        self._buffer = np.empty((chunk, len(self.columns)), dtype=self.dtype)
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._record = self.dtype.itemsize * len(self.columns)
+        self._data_start = self._resume()
+        self._file = open(path, "ab")
+        if self._data_start is None:
+            self._file.write(_encode_header(self.header))
+            self._file.flush()
+            self._data_start = self._file.tell()
+        self.count = (self._file.tell() - self._data_start) // self._record
+
+    def _resume(self):
+        """ Offset of the first record of an existing log (torn tail dropped), None for a new one. """
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return None
+        with open(self.path, "r+b") as f:
+            header, start = _read_header(f)
+            if header != self.header:
+                raise ValueError(f"{self.path} was logged with different settings")
+            size = os.fstat(f.fileno()).st_size
+            torn = (size - start) % self._record
+            if torn:
+                f.truncate(size - torn)
+        return start
+
+    def append(self, *values):
+        """ Logs len(values[0]) hits; one array (or scalar) per column. """
+        cols = [np.atleast_1d(np.asarray(v, dtype=np.float64)) for v in values]
+        if len(cols) != len(self.columns):
+            raise ValueError(f"expected {len(self.columns)} columns, got {len(cols)}")
+        n = len(cols[0])
+        done = 0
+        while done < n:
+            take = min(n - done, len(self._buffer) - self._buffered)
+            rows = self._buffer[self._buffered:self._buffered + take]
+            for i, col in enumerate(cols):
+                rows[:, i] = self._encode(col[done:done + take], i)
+            self._buffered += take
+            done += take
+            if self._buffered == len(self._buffer):
+                self._write()
+        self.count += n
+        if self._buffered and time.monotonic() - self._last_flush > self.flush_seconds:
+            self.flush()
+
+    def _encode(self, values, i):
+        if self._scale is None:
+            return values
+        q = np.floor((values - self._lo[i]) * self._scale[i])
+        return np.clip(q, 0, UINT16_CELLS - 1)
+
+    def _write(self):
+        self._file.write(self._buffer[:self._buffered].tobytes())
+        self._buffered = 0
+
+    def flush(self):
+        """ Writes buffered hits and hands them to the OS, so readers see them. """
+        if self._buffered:
+            self._write()
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_log(path: str, columns=("y",), meta=None, dtype: str = "float32", ranges=None, **kwargs) -> HitLogWriter:
+    """ Resumes `path` if it was logged with the same settings, otherwise archives it and starts afresh. """
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, "rb") as f:
+            header, _ = _read_header(f)
+        if header != _make_header(columns, meta, dtype, ranges):
+            archive(path)
+    return HitLogWriter(path, columns, meta, dtype, ranges, **kwargs)
+
+
+def _quantization(header):
+    """ (low, scale) per column to map values onto uint16 records; (None, None) for float32. """
+    if header["dtype"] != "uint16":
+        return None, None
+    ranges = np.asarray(header["ranges"], dtype=np.float64)
+    return ranges[:, 0], UINT16_CELLS / (ranges[:, 1] - ranges[:, 0])
+
+
+class HitLog:
+    """
+    Read-only view of the hits in a log, memory-mapped (hits appended after
+    opening are not seen). `records` holds the raw packed values; column()
+    and chunks() return decoded float64 positions.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.header, start = _read_header(f)
+        self.columns = tuple(self.header["columns"])
+        self.meta = self.header["meta"]
+        self.ranges = self.header["ranges"]
+        dtype = DTYPES[self.header["dtype"]]
+        self._lo, self._scale = _quantization(self.header)
+        n = (os.path.getsize(path) - start) // (dtype.itemsize * len(self.columns))
+        if n:
+            self.records = np.memmap(path, dtype=dtype, mode="r", offset=start, shape=(n, len(self.columns)))
+        else:
+            self.records = np.empty((0, len(self.columns)), dtype=dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def _decode(self, raw, i):
+        if self._scale is None:
+            return raw.astype(np.float64)
+        return (raw + 0.5) / self._scale[i] + self._lo[i]
+
+    def column(self, name: str, start: int = 0, stop: int = None) -> np.ndarray:
+        i = self.columns.index(name)
+        return self._decode(self.records[start:stop, i], i)
+
+    def chunks(self, size: int = 1 << 20):
+        """ Replays the hits in logged order: yields {column: values} for `size` hits at a time. """
+        for start in range(0, len(self), size):
+            yield {name: self.column(name, start, start + size) for name in self.columns}
+
+    def histogram(self, name: str = "y", bins: int = 100, range=None, chunk: int = 1 << 20) -> tuple:
+        """
+        (counts, edges) of one column over `bins` equal bins spanning `range`
+        (default: the column's logged range). Hits outside are dropped.
+        """
+        lo, hi = range if range is not None else self._range(name)
+        counts = np.zeros(bins, dtype=np.int64)
+        for part in self.chunks(chunk):
+            idx = np.floor((part[name] - lo) * (bins / (hi - lo))).astype(np.int64)
+            counts += np.bincount(idx[(idx >= 0) & (idx < bins)], minlength=bins)
+        return counts, np.linspace(lo, hi, bins + 1)
+
+    def _range(self, name):
+        if self.ranges is not None:
+            return self.ranges[self.columns.index(name)]
+        values = self.column(name)
+        return (float(values.min()), float(values.max()) + 1e-9) if len(values) else (0.0, 1.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize and re-bin a hit log")
+    parser.add_argument("path")
+    parser.add_argument("--column", default="y")
+    parser.add_argument("--bins", type=int, default=100)
+    parser.add_argument("--range", type=float, nargs=2, default=None, metavar=("LOW", "HIGH"))
+    parser.add_argument("--out", default=None, help="write the histogram to this .csv")
+    args = parser.parse_args()
+
+    log = HitLog(args.path)
+    start = time.perf_counter()
+    counts, edges = log.histogram(args.column, args.bins, args.range)
+    elapsed = time.perf_counter() - start
+    print(f"{args.path}: {len(log):,} hits, columns {', '.join(log.columns)} ({log.header['dtype']})")
+    print(f"meta {json.dumps(log.meta, sort_keys=True)}")
+    print(f"{args.bins} bins over [{edges[0]:g}, {edges[-1]:g}) in {elapsed * 1000:.1f} ms, peak {counts.max()}")
+    if args.out:
+        centers = (edges[:-1] + edges[1:]) / 2
+        np.savetxt(args.out, np.column_stack([centers, counts]), delimiter=",",
+                   header=f"{args.column},count", comments="", fmt="%.6g")
+
+
+if __name__ == "__main__":
+    main()
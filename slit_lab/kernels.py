@@ -0,0 +1,125 @@
+"""
+Particle step kernels.
+
+One physics step of the simulators, on the particle arrays: move every
+particle, test the ones reaching the barrier against its gaps (snapping the
+survivors to their gap's center), and flag the ones reaching the screen. A
+second kernel aims the particles that just passed at their sampled landing
+positions. Sampling stays outside the kernels, so every backend draws the
+same random numbers and produces the same hits.
+
+Backends:
+- python: plain per-particle loops, the reference
+- numpy:  whole-array expressions
+- numba:  the python loops compiled with numba.njit, when numba is installed
+
+All three do the same float64 operations in the same order, so their results
+are bit-identical. `advance` and `retarget` below are the fastest available
+backend; set SLIT_KERNELS=python|numpy|numba to pick one.
+
+Kernels are written for a beam travelling along one axis ("along") and
+spreading across another ("across"): test2.py/test3.py move along x and
+spread in y, test4.py moves along z and spreads in x.
+
+    gaps = barrier_gaps_array([(292.5, 307.5, 300.0)])  # (low, high, snap) per gap
+    events = advance(x, y, vx, vy, state, 1.0, BARRIER_X, SCREEN_X, gaps)
+    through = np.flatnonzero(events == PASSED)
+    retarget(y, vx, vy, through, targets, SCREEN_X - BARRIER_X)
+
+# to run from root folder
+python -m benchmarks.bench_kernels --counts 1000 100000 1000000
+"""
+import os
+
+import numpy as np
+
+from .particles import TO_SCREEN, TO_SLIT
+
+try:
+    import numba
+except ImportError:  # optional: the numpy backend is used instead
+    numba = None
+
+# Per-particle result of advance()
+FLYING = 0
+PASSED = 1   # went through a gap this step (snapped, now TO_SCREEN)
+BLOCKED = 2  # hit the barrier between the gaps
+LANDED = 3   # reached the screen
+
+
+def barrier_gaps_array(gaps) -> np.ndarray:
+    """ (low, high, snap) rows as the float64 array the kernels take. The first gap containing a particle wins. """
+    return np.asarray(gaps, dtype=np.float64).reshape(-1, 3)
+
+
+# --- PYTHON ---
+def _advance_python(along, across, v_along, v_across, state, dt, barrier, screen, gaps):
+    """
+    One step for every particle: moves it by dt, passes or blocks it at
+    `barrier` against the (low, high, snap) rows of `gaps`, and flags it
+    LANDED once a TO_SCREEN particle reaches `screen`. Updates the arrays in
+    place and returns one event code (FLYING/PASSED/BLOCKED/LANDED) each.
+    """
+    events = np.zeros(len(along), dtype=np.uint8)
+    for i in range(len(along)):
+        along[i] += v_along[i] * dt
+        across[i] += v_across[i] * dt
+        if state[i] == TO_SLIT and along[i] >= barrier:
+            events[i] = BLOCKED
+            for g in range(len(gaps)):
+                if gaps[g, 0] < across[i] < gaps[g, 1]:
+                    across[i] = gaps[g, 2]
+                    state[i] = TO_SCREEN
+                    events[i] = PASSED
+                    break
+        if state[i] == TO_SCREEN and along[i] >= screen:
+            events[i] = LANDED
+    return events
+
+
+def _retarget_python(across, v_along, v_across, index, target, distance):
+    """ Sets the sideways velocity of particles `index` so they cover `distance` and land at `target`. """
+    for j in range(len(index)):
+        i = index[j]
+        v_across[i] = (target[j] - across[i]) / (distance / v_along[i])
+
+
+# --- NUMPY ---
+def _advance_numpy(along, across, v_along, v_across, state, dt, barrier, screen, gaps):
+    along += v_along * dt
+    across += v_across * dt
+    events = np.zeros(len(along), dtype=np.uint8)
+    arriving = np.flatnonzero((state == TO_SLIT) & (along >= barrier))
+    if len(arriving):
+        arrive = across[arriving]
+        passed = np.zeros(len(arriving), dtype=bool)
+        snapped = arrive.copy()
+        for low, high, snap in gaps:
+            inside = ~passed & (low < arrive) & (arrive < high)
+            snapped[inside] = snap
+            passed |= inside
+        through = arriving[passed]
+        across[through] = snapped[passed]
+        state[through] = TO_SCREEN
+        events[through] = PASSED
+        events[arriving[~passed]] = BLOCKED
+    events[(state == TO_SCREEN) & (along >= screen)] = LANDED
+    return events
+
+
+def _retarget_numpy(across, v_along, v_across, index, target, distance):
+    v_across[index] = (target - across[index]) / (distance / v_along[index])
+
+
+BACKENDS = {
+    "python": (_advance_python, _retarget_python),
+    "numpy": (_advance_numpy, _retarget_numpy),
+}
+if numba is not None:
+    # Compiled on first call; cache=True keeps the machine code between runs
+    BACKENDS["numba"] = (numba.njit(cache=True)(_advance_python), numba.njit(cache=True)(_retarget_python))
+
+BACKEND = os.environ.get("SLIT_KERNELS") or ("numba" if "numba" in BACKENDS else "numpy")
+if BACKEND not in BACKENDS:
+    raise ImportError(f"SLIT_KERNELS={BACKEND} is not available (have {', '.join(BACKENDS)})")
+advance, retarget = BACKENDS[BACKEND]
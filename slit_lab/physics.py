@@ -0,0 +1,150 @@
+"""
+Wave-intensity engine shared by all simulators.
+
+Patterns are computed as numpy arrays and memoized by their parameters. The
+single and double slit use the closed-form diffraction x interference formula;
+any other barrier (N slits, gratings, unequal widths) is described as a tuple
+of (center, width) openings and its Fraunhofer far field is computed by FFT of
+the aperture mask, so new layouts need no hand-derived formula.
+"""
+import functools
+
+import numpy as np
+
+GRID_POINTS = 8192
+
+
+# --- BARRIER LAYOUTS ---
+# Each layout maps (slit_width, slit_distance) to openings: tuple of (center, width)
+BARRIERS = {
+    "single": lambda w, d: ((0.0, w),),
+    "double": lambda w, d: ((-d / 2, w), (d / 2, w)),
+    "triple": lambda w, d: ((-d / 2, w), (0.0, w), (d / 2, w)),
+    "grating": lambda w, d: tuple(((i - 2) * d / 2, w) for i in range(5)),
+}
+
+
+def openings(mode, slit_width, slit_distance):
+    """ Openings for a named barrier layout. """
+    if mode not in BARRIERS:
+        raise ValueError(f"unknown barrier {mode!r}, expected one of {sorted(BARRIERS)}")
+    return tuple((float(c), float(w)) for c, w in BARRIERS[mode](slit_width, slit_distance))
+
+
+def barrier_gaps(mode, slit_width, slit_distance):
+    """
+    (center, half_height) of each gap as drawn and hit-tested by the simulators.
+    Gaps are drawn +/- slit_width around each center, narrowed when openings
+    sit close together so neighbouring gaps do not merge.
+    """
+    centers = sorted(c for c, _ in openings(mode, slit_width, slit_distance))
+    half = float(slit_width)
+    if len(centers) > 1:
+        half = min(half, 0.35 * min(b - a for a, b in zip(centers, centers[1:])))
+    return tuple((c, half) for c in centers)
+
+
+def grating(n, slit_width, pitch):
+    """ n equal slits, `pitch` apart, centered on 0. """
+    return tuple(((i - (n - 1) / 2) * pitch, float(slit_width)) for i in range(n))
+
+
+def screen_grid(lo, hi, points=GRID_POINTS):
+    """ Cell centers of `points` equal cells covering [lo, hi). """
+    cell = (hi - lo) / points
+    return lo + (np.arange(points) + 0.5) * cell
+
+
+# --- CLOSED FORM ---
+def two_slit_intensity(y, mode, wavelength, slit_width, slit_distance, screen_dist):
+    """ Diffraction x interference at screen offsets `y` (array or scalar), peak 1. """
+    theta = np.arctan(np.asarray(y, dtype=np.float64) / screen_dist)
+    k = (2 * np.pi) / wavelength
+    # 1. Diffraction (single slit envelope), np.sinc(x) = sin(pi x) / (pi x)
+    beta = (k * slit_width * np.sin(theta)) / 2
+    diffraction = np.sinc(beta / np.pi) ** 2
+    if mode == "single":
+        return diffraction
+    # 2. Interference (double slit fringes)
+    alpha = (k * slit_distance * np.sin(theta)) / 2
+    return diffraction * np.cos(alpha) ** 2
+
+
+def intensity_at(y, mode, wavelength, slit_width, slit_distance, screen_dist):
+    """ Uncached pattern for a named barrier at arbitrary offsets `y`. """
+    if mode in ("single", "double"):
+        return two_slit_intensity(y, mode, wavelength, slit_width, slit_distance, screen_dist)
+    return far_field(y, openings(mode, slit_width, slit_distance), wavelength, screen_dist)
+
+
+def gaussian_piles(y, centers, sigma):
+    """ Classical pattern: one Gaussian pile behind each opening. """
+    y = np.asarray(y, dtype=np.float64)
+    return sum(np.exp(-((y - c) ** 2) / (2 * sigma ** 2)) for c in centers)
+
+
+# --- FFT FAR FIELD ---
+def aperture_mask(apertures, dx, extent):
+    """
+    Transmission of `apertures` sampled every `dx` over [-extent, extent).
+    Edge cells get their fractional coverage so slit widths are not quantized.
+    """
+    n = int(np.ceil(2 * extent / dx))
+    left = -extent + np.arange(n) * dx
+    mask = np.zeros(n)
+    for center, width in apertures:
+        a, b = center - width / 2, center + width / 2
+        mask += np.clip(np.minimum(left + dx, b) - np.maximum(left, a), 0, None) / dx
+    return np.clip(mask, 0, 1)
+
+
+def far_field(y, apertures, wavelength, screen_dist, oversample=16):
+    """
+    Fraunhofer intensity of arbitrary `apertures` at screen offsets `y`,
+    normalized like the closed form (1 at the center of equal, in-phase slits).
+    """
+    y = np.asarray(y, dtype=np.float64)
+    widths = [w for _, w in apertures]
+    extent = max(abs(c) + w / 2 for c, w in apertures) * 1.05
+    # Nyquist (1 / 2dx) must stay above the largest frequency 1 / wavelength
+    dx = min(min(widths) / oversample, wavelength / 4)
+    mask = aperture_mask(apertures, dx, extent)
+
+    # Spatial frequency f = sin(theta) / wavelength; zero-padding sets the
+    # frequency step, which must resolve the finest fringes (period ~ 1 / 2 extent).
+    df = 1 / (64 * 2 * extent)
+    n = int(2 ** np.ceil(np.log2(max(len(mask), 1 / (df * dx)))))
+    spectrum = np.fft.fftshift(np.fft.fft(mask, n)) * dx
+    freqs = np.fft.fftshift(np.fft.fftfreq(n, dx))
+    power = np.abs(spectrum) ** 2 / sum(widths) ** 2
+
+    f = np.sin(np.arctan(y / screen_dist)) / wavelength
+    return np.interp(f, freqs, power)
+
+
+# --- MEMOIZED PROFILES ---
+def _frozen(a):
+    a.setflags(write=False)
+    return a
+
+
+@functools.lru_cache(maxsize=128)
+def intensity_profile(mode, wavelength, slit_width, slit_distance, screen_dist, lo, hi, points=GRID_POINTS):
+    """
+    Read-only intensity on screen_grid(lo, hi, points) for a named barrier.
+    Single/double use the closed form, other layouts the FFT far field.
+    """
+    y = screen_grid(lo, hi, points)
+    return _frozen(intensity_at(y, mode, wavelength, slit_width, slit_distance, screen_dist))
+
+
+@functools.lru_cache(maxsize=128)
+def aperture_profile(apertures, wavelength, screen_dist, lo, hi, points=GRID_POINTS):
+    """ Read-only FFT far field on screen_grid(lo, hi, points) for explicit openings. """
+    return _frozen(far_field(screen_grid(lo, hi, points), apertures, wavelength, screen_dist))
+
+
+@functools.lru_cache(maxsize=128)
+def gaussian_profile(centers, sigma, lo, hi, points=GRID_POINTS):
+    """ Read-only classical pattern on screen_grid(lo, hi, points). """
+    return _frozen(gaussian_piles(screen_grid(lo, hi, points), centers, sigma))
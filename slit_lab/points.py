@@ -0,0 +1,124 @@
+"""
+Single-node point clouds for the Ursina (Panda3D) lab.
+
+One Entity per particle means one scene-graph node per particle, created and
+destroyed at the firing rate. A PointCloud is one GeomNode holding a
+fixed-capacity vertex buffer: every frame the live positions and colors are
+copied from numpy arrays straight into the buffer's memory and the point
+primitive is resized to the live count. SplatRing keeps screen splats in a
+fixed ring of slots that fade out and are overwritten oldest first.
+"""
+import numpy as np
+from panda3d.core import (
+    Geom,
+    GeomNode,
+    GeomPoints,
+    GeomVertexArrayFormat,
+    GeomVertexData,
+    GeomVertexFormat,
+    OmniBoundingVolume,
+    TransparencyAttrib,
+)
+
+
+def _point_format():
+    # Positions and colors in two separate float32 arrays so each maps to a
+    # plain (capacity, 3) / (capacity, 4) numpy view
+    positions = GeomVertexArrayFormat()
+    positions.add_column("vertex", 3, Geom.NT_float32, Geom.C_point)
+    colors = GeomVertexArrayFormat()
+    colors.add_column("color", 4, Geom.NT_float32, Geom.C_color)
+    fmt = GeomVertexFormat()
+    fmt.add_array(positions)
+    fmt.add_array(colors)
+    return GeomVertexFormat.register_format(fmt)
+
+
+class PointCloud:
+    """ Up to `capacity` points drawn by one node under `parent`; sizes are in world units. """
+
+    def __init__(self, parent, capacity: int, thickness: float = 0.3, name: str = "points"):
+        self.capacity = capacity
+        self._vdata = GeomVertexData(name, _point_format(), Geom.UH_dynamic)
+        self._vdata.unclean_set_num_rows(capacity)
+        geom = Geom(self._vdata)
+        geom.add_primitive(GeomPoints(Geom.UH_dynamic))
+        node = GeomNode(name)
+        node.add_geom(geom)
+        # Points move every frame; never cull the node on stale bounds
+        node.set_bounds(OmniBoundingVolume())
+        node.set_final(True)
+        self.node = parent.attach_new_node(node)
+        self.node.set_render_mode_perspective(True)
+        self.node.set_light_off()
+        self.node.set_transparency(TransparencyAttrib.M_alpha)
+        self.set_thickness(thickness)
+        self.count = 0
+
+    def set_thickness(self, thickness: float):
+        self.node.set_render_mode_thickness(thickness)
+
+    def _view(self, index: int, width: int):
+        handle = self._vdata.modify_array(index)
+        return np.frombuffer(memoryview(handle).cast("B"), dtype=np.float32).reshape(-1, width)
+
+    def update(self, positions, colors):
+        """ Draws exactly these points: `positions` (n, 3), `colors` (n, 4) RGBA in 0..1. """
+        n = min(len(positions), self.capacity)
+        if n:
+            self._view(0, 3)[:n] = positions[:n]
+            self._view(1, 4)[:n] = colors[:n]
+        if n != self.count:
+            prim = self.node.node().modify_geom(0).modify_primitive(0)
+            prim.clear_vertices()
+            if n:
+                prim.add_consecutive_vertices(0, n)
+            self.count = n
+
+    def clear(self):
+        self.update(np.empty((0, 3)), np.empty((0, 4)))
+
+    def remove(self):
+        self.node.remove_node()
+
+
+class SplatRing:
+    """
+    Short-lived marks in a fixed ring of `capacity` slots. Each splat fades
+    over `lifetime` seconds; when the ring is full the oldest is overwritten.
+    """
+
+    def __init__(self, parent, capacity: int = 4096, lifetime: float = 1.0, thickness: float = 0.3):
+        self.capacity = capacity
+        self.lifetime = lifetime
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.colors = np.zeros((capacity, 4), dtype=np.float32)
+        self.born = np.full(capacity, -np.inf)
+        self._head = 0
+        self.now = 0.0
+        self.cloud = PointCloud(parent, capacity, thickness, name="splats")
+
+    def add(self, positions, colors):
+        n = len(positions)
+        if n == 0:
+            return
+        if n > self.capacity:
+            positions, colors, n = positions[-self.capacity:], colors[-self.capacity:], self.capacity
+        slots = (self._head + np.arange(n)) % self.capacity
+        self.positions[slots] = positions
+        self.colors[slots] = colors
+        self.born[slots] = self.now
+        self._head = int((self._head + n) % self.capacity)
+
+    def update(self, dt: float):
+        """ Ages the splats and uploads the live ones with their faded alpha. """
+        self.now += dt
+        age = self.now - self.born
+        live = np.flatnonzero(age < self.lifetime)
+        colors = self.colors[live].copy()
+        colors[:, 3] *= 1 - age[live] / self.lifetime
+        self.cloud.update(self.positions[live], colors)
+
+    def clear(self):
+        self.born[:] = -np.inf
+        self.cloud.clear()
@@ -0,0 +1,116 @@
+"""
+Multi-resolution hit histogram for zooming into the detector.
+
+Hits are counted in 2**levels fine bins over [lo, hi), and again in every
+coarser power-of-two level (a level-k cell covers 2**k fine bins). Adding a
+hit touches one cell per level. Any window can then be binned at any bin
+count from prefix sums. The hits below fine bin p are the sum of one cell
+per set bit of p, so each output edge costs `levels` lookups however wide
+the window is, and a view costs O(output bins) rather than a pass over the
+fine bins. Edges that fall inside a fine bin are linearly interpolated.
+
+    pyramid = HistogramPyramid(0, 600, levels=12)   # 4096 fine bins
+    pyramid.add(hit_y)
+    counts, edges = pyramid.window(250, 350, 300)   # 300 bins over y 250..350
+"""
+import numpy as np
+
+
+class HistogramPyramid:
+    def __init__(self, lo: float, hi: float, levels: int = 12):
+        self.lo = lo
+        self.hi = hi
+        self.levels = levels
+        self.bins = 1 << levels
+        self.bin_width = (hi - lo) / self.bins
+        # counts[k][i]: hits in fine bins [i * 2**k, (i + 1) * 2**k)
+        self.counts = [np.zeros(self.bins >> k, dtype=np.int64) for k in range(levels + 1)]
+        self.total = 0
+
+    def reset(self):
+        for level in self.counts:
+            level[:] = 0
+        self.total = 0
+
+    def fine_index(self, values) -> np.ndarray:
+        return np.floor((np.asarray(values, dtype=np.float64) - self.lo) / self.bin_width).astype(np.int64)
+
+    def add(self, values):
+        """ Counts hits at `values`; hits outside [lo, hi) are dropped. """
+        idx = self.fine_index(values)
+        idx = idx[(idx >= 0) & (idx < self.bins)]
+        for k, level in enumerate(self.counts):
+            np.add.at(level, idx >> k, 1)
+        self.total += len(idx)
+
+    def add_counts(self, fine):
+        """ Adds a histogram of hits over the `bins` fine bins (e.g. re-binned from a hit log). """
+        fine = np.asarray(fine, dtype=np.int64)
+        for k, level in enumerate(self.counts):
+            level += fine.reshape(-1, 1 << k).sum(axis=1)
+        self.total += int(fine.sum())
+
+    def prefix(self, p) -> np.ndarray:
+        """ Hits in fine bins [0, p), for integer p in 0..bins. """
+        p = np.asarray(p, dtype=np.int64)
+        out = np.zeros(p.shape, dtype=np.int64)
+        for k, level in enumerate(self.counts):
+            cell = p >> k
+            odd = (cell & 1).astype(bool)
+            out[odd] += level[cell[odd] - 1]
+        return out
+
+    def cumulative(self, x) -> np.ndarray:
+        """ Hits below position `x`, spread evenly within the fine bin containing it. """
+        f = np.clip((np.asarray(x, dtype=np.float64) - self.lo) / self.bin_width, 0, self.bins)
+        p = np.floor(f).astype(np.int64)
+        inside = np.where(p < self.bins, self.counts[0][np.minimum(p, self.bins - 1)], 0)
+        return self.prefix(p) + inside * (f - p)
+
+    def window(self, lo: float, hi: float, bins: int) -> tuple:
+        """ (counts, edges) of `bins` equal bins over [lo, hi); counts are fractional at split fine bins. """
+        edges = np.linspace(lo, hi, bins + 1)
+        return np.diff(self.cumulative(edges)), edges
+
+
+class ZoomView:
+    """ Visible [lo, hi) of an axis spanning [low, high], zoomed about a point and panned, never past the ends. """
+
+    def __init__(self, low: float, high: float, min_span: float):
+        self.low = low
+        self.high = high
+        self.min_span = min_span
+        self.reset()
+
+    def reset(self):
+        self.lo, self.hi = self.low, self.high
+
+    @property
+    def span(self) -> float:
+        return self.hi - self.lo
+
+    @property
+    def magnification(self) -> float:
+        return (self.high - self.low) / self.span
+
+    @property
+    def zoomed(self) -> bool:
+        return self.span < self.high - self.low
+
+    def at(self, fraction: float) -> float:
+        """ Axis value `fraction` (0..1) of the way across the view. """
+        return self.lo + fraction * self.span
+
+    def zoom(self, factor: float, about: float = None):
+        """ Magnifies by `factor` (< 1 zooms out), keeping `about` (default: the center) in place. """
+        about = (self.lo + self.hi) / 2 if about is None else about
+        span = min(max(self.span / factor, self.min_span), self.high - self.low)
+        frac = (about - self.lo) / self.span
+        self._place(about - frac * span, span)
+
+    def pan(self, delta: float):
+        self._place(self.lo + delta, self.span)
+
+    def _place(self, lo: float, span: float):
+        lo = min(max(lo, self.low), self.high - span)
+        self.lo, self.hi = lo, lo + span
@@ -0,0 +1,189 @@
+"""
+Batched pygame rendering through surfarray.
+
+Instead of one pygame.draw call per particle and per histogram row, particle
+pixels are written straight into the target surface from numpy arrays and
+the accumulation graph is built as one RGB array and blitted in one go.
+LayeredScreen caches the static scene and only pushes dirty rects.
+"""
+import functools
+
+import numpy as np
+import pygame
+
+
+@functools.lru_cache(maxsize=16)
+def disk_offsets(radius: int):
+    """ (dx, dy) offsets of the pixels covered by a filled circle of `radius`. """
+    r = np.arange(-radius, radius + 1)
+    dx, dy = np.meshgrid(r, r, indexing="ij")
+    inside = dx ** 2 + dy ** 2 <= radius ** 2
+    return dx[inside], dy[inside]
+
+
+def _stamp(pixels, xi, yi, radius, value, width, height):
+    """ Writes `value` at every disk pixel; `pixels` is a (width, height) view. """
+    dx, dy = disk_offsets(radius)
+    inner = (xi >= radius) & (xi < width - radius) & (yi >= radius) & (yi < height - radius)
+    flat = pixels.T.reshape(-1) if pixels.T.flags.c_contiguous else None
+    if flat is not None:
+        # Common case: one linear index per pixel into the contiguous buffer
+        offsets = dy * width + dx
+        flat[((yi[inner] * width + xi[inner])[:, None] + offsets[None, :]).ravel()] = value
+        xi, yi = xi[~inner], yi[~inner]
+    # Particles near (or beyond) the border are clipped pixel by pixel
+    px = (xi[:, None] + dx[None, :]).ravel()
+    py = (yi[:, None] + dy[None, :]).ravel()
+    visible = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+    pixels[px[visible], py[visible]] = value
+
+
+def draw_particles(surface, x, y, color_index, palette, radii):
+    """
+    Stamps filled circles for all particles into `surface`.
+    `palette` is a list of RGB colors and `radii` the radius per color index.
+    """
+    if len(x) == 0:
+        return
+    width, height = surface.get_size()
+    xi = x.astype(np.int32)
+    yi = y.astype(np.int32)
+    packed = surface.get_bytesize() == 4
+    # 32-bit surfaces take one mapped int per pixel, others an RGB triple
+    pixels = pygame.surfarray.pixels2d(surface) if packed else pygame.surfarray.pixels3d(surface)
+    try:
+        for ci in np.unique(color_index):
+            sel = color_index == ci
+            value = surface.map_rgb(palette[ci]) if packed else palette[ci]
+            _stamp(pixels, xi[sel], yi[sel], int(radii[ci]), value, width, height)
+    finally:
+        # The surface stays locked while the pixel view is alive
+        del pixels
+
+
+class BarGraph:
+    """
+    Horizontal bar per screen row, rendered into one surface with numpy and
+    blitted in a single call. Black is transparent.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.surface = pygame.Surface((width, height))
+        self.surface.set_colorkey((0, 0, 0))
+        self._columns = np.arange(width)[:, None]
+
+    def render(self, lengths, colors):
+        """ `lengths` (height,) in pixels, 0 for no bar; `colors` (height, 3) RGB. """
+        lengths = np.asarray(lengths)
+        colors = np.asarray(colors, dtype=np.uint8)
+        filled = (self._columns < lengths[None, :]) & (lengths[None, :] > 0)
+        rgb = np.where(filled[:, :, None], colors[None, :, :], 0).astype(np.uint8)
+        pygame.surfarray.blit_array(self.surface, rgb)
+        return self.surface
+
+    def draw(self, target, pos, lengths, colors):
+        target.blit(self.render(lengths, colors), pos)
+
+
+def paired_rows(values):
+    """
+    Repeats every even row into the odd row below it, matching the original
+    2 px lines drawn at every other row.
+    """
+    values = np.asarray(values)
+    out = np.repeat(values[::2], 2, axis=0)
+    return out[:len(values)]
+
+
+class LayeredScreen:
+    """
+    Static scene cached in surfaces, plus dirty-rect bookkeeping.
+
+    `draw_background` paints everything under the moving content (source,
+    barrier, detector), `draw_overlay` everything on top of it (buttons,
+    labels) onto a transparent surface. Both are called again only when the
+    key passed to begin() changes. A frame restores last frame's dirty rects
+    from the cache, draws the moving content, marks what it touched and
+    pushes only those rects to the display.
+
+        layers.begin((mode, is_firing))
+        draw_particles(screen, ...)
+        layers.mark_points(x, y, radius)
+        layers.finish()
+    """
+
+    def __init__(self, screen, draw_background, draw_overlay=None, tile: int = 32):
+        self.screen = screen
+        self.tile = tile
+        self._draw_background = draw_background
+        self._draw_overlay = draw_overlay
+        size = screen.get_size()
+        self._bounds = pygame.Rect((0, 0), size)
+        self._grid = (-(-size[1] // tile), -(-size[0] // tile))
+        self.static = pygame.Surface(size).convert()
+        self.overlay = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+        self._key = None
+        self._full = True
+        self._previous = []
+        self._current = []
+
+    def invalidate(self):
+        """ Forces a rebuild of the cached layers on the next begin(). """
+        self._key = None
+
+    def begin(self, key):
+        """ Starts a frame: rebuilds the layers if `key` changed, else erases last frame's rects. """
+        if self._key is None or key != self._key:
+            self._key = key
+            self.static.fill((0, 0, 0))
+            self._draw_background(self.static)
+            self.overlay.fill((0, 0, 0, 0))
+            if self._draw_overlay is not None:
+                self._draw_overlay(self.overlay)
+                self.static.blit(self.overlay, (0, 0))
+            self.screen.blit(self.static, (0, 0))
+            self._full = True
+        else:
+            for rect in self._previous:
+                self.screen.blit(self.static, rect, rect)
+        self._current = []
+
+    def mark(self, rect):
+        rect = pygame.Rect(rect).clip(self._bounds)
+        if rect.width and rect.height:
+            self._current.append(rect)
+
+    def mark_points(self, x, y, radius: int):
+        """
+        Marks the tiles touched by circles of `radius` at (x, y). Occupied
+        tiles are merged into one rect per horizontal run.
+        """
+        if len(x) == 0:
+            return
+        t = self.tile
+        rows, cols = self._grid
+        occupied = np.zeros((rows, cols + 2), dtype=np.int8)
+        # Circles are smaller than a tile, so their box corners cover every touched tile
+        for dx in (-radius, radius):
+            tx = np.clip((x + dx) // t, 0, cols - 1).astype(np.intp) + 1
+            for dy in (-radius, radius):
+                ty = np.clip((y + dy) // t, 0, rows - 1).astype(np.intp)
+                occupied[ty, tx] = 1
+        edges = np.diff(occupied, axis=1)
+        starts, ends = np.argwhere(edges == 1), np.argwhere(edges == -1)
+        for (row, c0), (_, c1) in zip(starts, ends):
+            self.mark((c0 * t, row * t, (c1 - c0) * t, t))
+
+    def finish(self):
+        """ Puts the overlay back on top of this frame's rects and updates the display. """
+        if self._draw_overlay is not None:
+            for rect in self._current:
+                self.screen.blit(self.overlay, rect, rect)
+        if self._full:
+            pygame.display.flip()
+            self._full = False
+        else:
+            pygame.display.update(self._previous + self._current)
+        self._previous = self._current
@@ -0,0 +1,241 @@
+"""
+Parameter sweeps of the slit patterns.
+
+Evaluates the intensity pattern, and optionally a sampled hit histogram, for
+every combination of wavelength, slit width, slit distance and screen distance
+on a grid. Single and double slits are computed for a whole block of the grid
+at once by broadcasting the closed form over the parameter axes. Other
+barriers go through the FFT far field one setup at a time. Large grids are
+split along their longest axis over a process pool.
+
+Results are cached on disk under the hash of everything that determines them,
+so repeating a sweep (or viewing it) never recomputes. A dataset is one .npz:
+float32 `intensity` of shape (wavelength, slit_width, slit_distance,
+screen_dist, points), optional uint32 `hist` (..., bins), the axis values,
+the screen positions and the JSON config.
+
+# to run from root folder
+python -m slit_lab.sweep run --slits double --wavelength 10:40:16 --slit-distance 60:180:13 --particles 20000
+python -m slit_lab.sweep view sweep_cache/<hash>.npz
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .physics import BARRIERS, intensity_at, screen_grid, two_slit_intensity
+from .sampler import LandingSampler
+
+AXES = ("wavelength", "slit_width", "slit_distance", "screen_dist")
+# Defaults match test3.py (pixels, screen center at 0)
+DEFAULTS = {"wavelength": 25.0, "slit_width": 15.0, "slit_distance": 120.0, "screen_dist": 750.0}
+CACHE_DIR = "sweep_cache"
+FORMAT_VERSION = 1
+
+
+def parse_axis(spec: str) -> np.ndarray:
+    """ 'start:stop:count' (inclusive linspace), 'a,b,c' or a single value. """
+    if ":" in spec:
+        start, stop, count = spec.split(":")
+        return np.linspace(float(start), float(stop), int(count))
+    return np.array([float(v) for v in spec.split(",")])
+
+
+def grid_shape(grid) -> tuple:
+    return tuple(len(grid[a]) for a in AXES)
+
+
+def grid_intensity(slits, grid, y) -> np.ndarray:
+    """ Pattern at screen offsets `y` for every setup of `grid`, shape grid_shape(grid) + (len(y),). """
+    shape = grid_shape(grid) + (len(y),)
+    if slits in ("single", "double"):
+        # Each axis gets its own dimension, so the closed form broadcasts over the whole block
+        axes = [np.asarray(grid[a], dtype=np.float64).reshape([-1 if i == j else 1 for j in range(len(AXES))] + [1])
+                for i, a in enumerate(AXES)]
+        return np.broadcast_to(two_slit_intensity(y, slits, *axes), shape)
+    out = np.empty(shape)
+    for index in np.ndindex(*shape[:-1]):
+        params = [grid[a][i] for a, i in zip(AXES, index)]
+        out[index] = intensity_at(y, slits, *params)
+    return out
+
+
+def _block(config, grid, seeds):
+    """ Intensity (and histograms) for one block of the grid; `seeds` has one entry per setup. """
+    lo, hi = config["lo"], config["hi"]
+    y = screen_grid(lo, hi, config["points"])
+    intensity = grid_intensity(config["slits"], grid, y)
+    hist = None
+    if config["particles"]:
+        bins = config["bins"]
+        hist = np.zeros(intensity.shape[:-1] + (bins,), dtype=np.uint32)
+        for index, seed in zip(np.ndindex(*intensity.shape[:-1]), seeds):
+            landed = LandingSampler(lo, hi, intensity[index], seed=seed).sample(config["particles"])
+            idx = np.minimum(((landed - lo) / (hi - lo) * bins).astype(np.int64), bins - 1)
+            hist[index] = np.bincount(idx, minlength=bins)
+    return intensity.astype(np.float32), hist
+
+
+def cache_key(config, grid) -> str:
+    payload = json.dumps({"config": config, "grid": {a: [float(v) for v in grid[a]] for a in AXES},
+                          "version": FORMAT_VERSION}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def sweep(slits="double", grid=None, lo=-300.0, hi=300.0, points=600, particles=0, bins=300, seed=0,
+          workers=1, cache_dir=CACHE_DIR):
+    """
+    Returns (dataset dict, path of its .npz). `grid` maps any of AXES to the
+    values to sweep; missing axes stay at DEFAULTS. With `particles`, each
+    setup also gets a histogram of that many sampled hits over `bins` bins,
+    seeded per setup so the result does not depend on `workers`.
+    """
+    grid = {a: np.atleast_1d(np.asarray((grid or {}).get(a, DEFAULTS[a]), dtype=np.float64)) for a in AXES}
+    config = {"slits": slits, "lo": float(lo), "hi": float(hi), "points": int(points),
+              "particles": int(particles), "bins": int(bins), "seed": int(seed)}
+    path = os.path.join(cache_dir, cache_key(config, grid) + ".npz")
+    if os.path.exists(path):
+        return load(path), path
+
+    # Split along the longest axis, one block per worker
+    shape = grid_shape(grid)
+    split = int(np.argmax(shape))
+    parts = [p for p in np.array_split(np.arange(shape[split]), max(1, min(workers, shape[split]))) if len(p)]
+    # One seed per setup in grid order, handed to the block holding that setup
+    seed_grid = np.empty(int(np.prod(shape)), dtype=object)
+    seed_grid[:] = np.random.SeedSequence(seed).spawn(len(seed_grid))
+    seed_grid = seed_grid.reshape(shape)
+    blocks = []
+    for part in parts:
+        sub = dict(grid, **{AXES[split]: grid[AXES[split]][part]})
+        blocks.append((sub, list(np.take(seed_grid, part, axis=split).ravel())))
+    if len(blocks) > 1:
+        with ProcessPoolExecutor(max_workers=len(blocks)) as pool:
+            results = list(pool.map(_block, [config] * len(blocks), *zip(*blocks)))
+    else:
+        results = [_block(config, *blocks[0])]
+
+    dataset = {"intensity": np.concatenate([r[0] for r in results], axis=split),
+               "y": screen_grid(lo, hi, points), "config": json.dumps(config)}
+    dataset.update({a: grid[a] for a in AXES})
+    if particles:
+        dataset["hist"] = np.concatenate([r[1] for r in results], axis=split)
+        dataset["edges"] = np.linspace(lo, hi, bins + 1)
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez_compressed(path, **dataset)
+    return dataset, path
+
+
+def load(path: str) -> dict:
+    with np.load(path) as data:
+        dataset = {k: data[k] for k in data.files}
+    dataset["config"] = str(dataset["config"])
+    return dataset
+
+
+# --- SLIDER VIEWER ---
+def view(path: str, width: int = 1000, height: int = 600):
+    """
+    Pygame window with one slider per swept axis, showing the cached frame
+    (pattern, and histogram if sampled) of the selected setup.
+    """
+    import pygame
+
+    data = load(path)
+    config = json.loads(data["config"])
+    intensity = data["intensity"]
+    hist = data.get("hist")
+    swept = [a for a in AXES if len(data[a]) > 1]
+    index = {a: 0 for a in AXES}
+    plot_h = height - 60 - 50 * len(swept)
+    sliders = {a: pygame.Rect(220, plot_h + 40 + 50 * i, width - 260, 12) for i, a in enumerate(swept)}
+
+    pygame.init()
+    screen = pygame.display.set_mode((width, height))
+    pygame.display.set_caption(f"Sweep: {config['slits']} slit, {os.path.basename(path)}")
+    font = pygame.font.SysFont("Arial", 16, bold=True)
+    clock = pygame.time.Clock()
+    dragging = None
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                dragging = next((a for a, r in sliders.items() if r.inflate(0, 20).collidepoint(event.pos)), None)
+            if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                dragging = None
+            if dragging and event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION):
+                r = sliders[dragging]
+                frac = min(max((event.pos[0] - r.x) / r.width, 0), 1)
+                index[dragging] = int(round(frac * (len(data[dragging]) - 1)))
+
+        frame = tuple(index[a] for a in AXES)
+        screen.fill((20, 20, 30))
+        # Histogram bars under the exact pattern, both scaled to their peak
+        if hist is not None:
+            counts = hist[frame].astype(np.float64)
+            bar_w = (width - 40) / len(counts)
+            peak = max(counts.max(), 1)
+            for i, c in enumerate(counts):
+                h = int(c / peak * (plot_h - 20))
+                if h:
+                    pygame.draw.rect(screen, (40, 120, 60), (20 + int(i * bar_w), plot_h - h, max(int(bar_w), 1), h))
+        curve = intensity[frame]
+        xs = 20 + np.arange(len(curve)) * (width - 40) / (len(curve) - 1)
+        ys = plot_h - curve / max(curve.max(), 1e-12) * (plot_h - 20)
+        pygame.draw.lines(screen, (0, 200, 255), False, np.column_stack([xs, ys]).tolist(), 2)
+
+        for a in AXES:
+            label = f"{a} {data[a][index[a]]:g}"
+            if a in sliders:
+                r = sliders[a]
+                pygame.draw.rect(screen, (70, 70, 90), r, border_radius=6)
+                knob = r.x + r.width * index[a] / (len(data[a]) - 1)
+                pygame.draw.circle(screen, (255, 255, 255), (int(knob), r.centery), 9)
+                screen.blit(font.render(label, True, (200, 200, 200)), (20, r.y - 4))
+        fixed = "   ".join(f"{a} {data[a][0]:g}" for a in AXES if a not in sliders)
+        screen.blit(font.render(fixed, True, (120, 120, 140)), (20, height - 28))
+        pygame.display.flip()
+        clock.tick(60)
+    pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the slit patterns over a parameter grid")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="compute (or fetch from the cache) a sweep")
+    run.add_argument("--slits", default="double", choices=sorted(BARRIERS))
+    for a in AXES:
+        run.add_argument("--" + a.replace("_", "-"), dest=a, type=parse_axis, default=None,
+                         help=f"start:stop:count or comma list (default {DEFAULTS[a]:g})")
+    run.add_argument("--lo", type=float, default=-300.0, help="screen range, offsets from the center")
+    run.add_argument("--hi", type=float, default=300.0)
+    run.add_argument("--points", type=int, default=600, help="pattern samples across the screen")
+    run.add_argument("--particles", type=float, default=0, help="sampled hits per setup (0: pattern only)")
+    run.add_argument("--bins", type=int, default=300)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    run.add_argument("--cache", default=CACHE_DIR)
+    show = commands.add_parser("view", help="browse a cached sweep with sliders")
+    show.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "view":
+        view(args.path)
+        return
+    grid = {a: getattr(args, a) for a in AXES if getattr(args, a) is not None}
+    start = time.perf_counter()
+    dataset, path = sweep(args.slits, grid, args.lo, args.hi, args.points, int(args.particles), args.bins,
+                          args.seed, args.workers, args.cache)
+    shape = dataset["intensity"].shape
+    print(f"{args.slits}: {int(np.prod(shape[:-1])):,} setups x {shape[-1]} points "
+          f"({' x '.join(f'{a} {n}' for a, n in zip(AXES, shape))}) in {time.perf_counter() - start:.2f}s -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Fixed-timestep clock for the simulator loops.
+
+Physics advances in steps of a fixed simulated duration, decoupled from how
+often the window is drawn: every rendered frame feeds its real duration into
+an accumulator (scaled by the speed setting) and runs as many whole steps as
+fit. The leftover fraction of a step (`alpha`) lets the renderer draw
+particles between their last two positions.
+
+    clock = FixedStep(hz=60)
+    while running:
+        for _ in range(clock.advance(pygame_clock.tick(fps) / 1000)):
+            physics_step()
+        draw(alpha=clock.alpha)
+"""
+
+
+class FixedStep:
+    def __init__(self, hz: float = 60.0, speed: float = 1.0, max_frame: float = 0.25):
+        self.dt = 1.0 / hz
+        self.speed = speed
+        # A frame longer than this (window dragged, debugger) is not caught up on
+        self.max_frame = max_frame
+        self.accumulator = 0.0
+        self.steps = 0
+
+    def advance(self, frame_seconds: float) -> int:
+        """ Number of physics steps to run for a frame that took `frame_seconds`. """
+        self.accumulator += min(frame_seconds, self.max_frame) * self.speed
+        n = int(self.accumulator / self.dt)
+        self.accumulator -= n * self.dt
+        self.steps += n
+        return n
+
+    @property
+    def alpha(self) -> float:
+        """ How far (0..1) the display time is past the last physics step. """
+        return self.accumulator / self.dt
+
+    def reset(self):
+        self.accumulator = 0.0
+
+
+class Spawner:
+    """ Emits a rate in particles per second as whole particles per step, carrying the fraction. """
+
+    def __init__(self, rate: float = 0.0):
+        self.rate = rate
+        self._carry = 0.0
+
+    def take(self, dt: float) -> int:
+        self._carry += self.rate * dt
+        n = int(self._carry)
+        self._carry -= n
+        return n
@@ -2,11 +2,15 @@ from google.adk.agents.llm_agent import LlmAgent
 from google.adk.agents import Agent ,LlmAgent
 from google.adk.tools import google_search
 import datetime
+# Shared with Tool_agent; agent_tools sits at the repo root, so run from the root folder
+from agent_tools.async_tools import async_tool
 
+@async_tool(deadline=5)
 def get_current_time() -> dict:
     
     return {"time": datetime.datetime.now().strftime("%H:%M")}
 
+@async_tool(deadline=5)
 def get_current_name() -> dict:
     
     return {"name": "LiteLLM"}
@@ -1,19 +1,36 @@
-import os 
+import os
 from dotenv import load_dotenv
 load_dotenv()
 from google.adk.agents import LlmAgent
+from google.adk.agents.readonly_context import ReadonlyContext
 
+from .state_deltas import PREFERENCE_PREFIX
+
+
+def build_instruction(context: ReadonlyContext) -> str:
+    # Preferences live under one state key per platform so a single platform
+    # can be updated with a small state_delta instead of rewriting all of them.
+    state = context.state
+    preferences = [
+        f"- {key[len(PREFERENCE_PREFIX):].replace('_', ' ').title()}: {value}"
+        for key, value in state.items() if key.startswith(PREFERENCE_PREFIX)
+    ]
+    if "user_post_preferences" in state:
+        preferences.append(str(state["user_post_preferences"]))
+    preferences_text = "\n".join(preferences)
+    return f"""
+        You are a helpful assistant that can respond about the user and their post preferences.
+
+    The information about the user and their post preferences is given in the state context.
+    Name: {state.get("user_name", "")}
+    Post Preferences:
+    {preferences_text}
+    """
 
 
 root_agent = LlmAgent(
     name="PostAgent",
     description="An agent that knows some things about the user and their posts preferences",
     model=os.environ.get("GOOGLE_GENAI_MODEL"),
-    instruction="""
-        You are a helpful assistant that can respond about the user and their post preferences.
-
-    The information about the user and their post preferences is given in the state context.
-    Name: {user_name}
-    Post Preferences: {user_post_preferences}
-    """,
-)
\ No newline at end of file
+    instruction=build_instruction,
+)
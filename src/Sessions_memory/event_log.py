@@ -0,0 +1,363 @@
+"""
+Append-only binary event log for session analytics.
+
+Every ADK event is written as a length-prefixed record whose fixed-size header
+already holds what analytics need (timestamp, session, author, token counts);
+the full event is kept as a compact JSON payload that is only decoded on demand.
+After every `block_size` events (and on flush/close) an index block is appended
+with the block's time range, record count and bloom filters of the sessions and
+authors in it. The reader memory-maps the file, walks the index chain backwards
+from the end of the file and skips whole blocks that cannot match a query.
+
+File layout:
+    FILE_MAGIC
+    [record]...                   record = u32 length | u8 kind | body
+    kind EVENT:  f64 ts | u64 session | u64 author | u32 prompt | u32 output | u32 total | json
+    kind STRING: u64 hash | utf-8 text  (hash -> name, re-emitted per block)
+    kind INDEX:  u64 block_start | u64 prev_index | u32 count | f64 min_ts | f64 max_ts
+                 | 32B session bloom | 32B author bloom | INDEX_MAGIC
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+from google.adk.events import Event
+from google.adk.plugins.base_plugin import BasePlugin
+
+FILE_MAGIC = b"ADKEVLG1"
+INDEX_MAGIC = b"EVIDXEND"
+
+KIND_EVENT = 1
+KIND_STRING = 2
+KIND_INDEX = 3
+
+RECORD_HEAD = struct.Struct("<IB")          # record length (incl. this head), kind
+EVENT_HEAD = struct.Struct("<dQQIII")       # ts, session, author, prompt, output, total
+STRING_HEAD = struct.Struct("<Q")
+INDEX_BODY = struct.Struct("<QQIdd32s32s8s")
+INDEX_SIZE = RECORD_HEAD.size + INDEX_BODY.size
+BLOOM_BITS = 256
+
+
+def name_hash(name: str) -> int:
+    return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _bloom_bits(h: int) -> int:
+    # Two probe positions taken from different parts of the 64-bit hash
+    return (1 << (h % BLOOM_BITS)) | (1 << ((h >> 32) % BLOOM_BITS))
+
+
+def _bloom_has(bloom: int, h: int) -> bool:
+    bits = _bloom_bits(h)
+    return bloom & bits == bits
+
+
+class _Block:
+    """ Location and summary of one indexed (or still open) block of records. """
+
+    def __init__(self, start, end, count=0, min_ts=float("inf"), max_ts=float("-inf"),
+                 session_bloom=(1 << BLOOM_BITS) - 1, author_bloom=(1 << BLOOM_BITS) - 1):
+        self.start = start
+        self.end = end
+        self.count = count
+        self.min_ts = min_ts
+        self.max_ts = max_ts
+        self.session_bloom = session_bloom
+        self.author_bloom = author_bloom
+
+    def may_match(self, session_h=None, author_h=None, start=None, end=None) -> bool:
+        if self.count and start is not None and self.max_ts < start:
+            return False
+        if self.count and end is not None and self.min_ts >= end:
+            return False
+        if session_h is not None and not _bloom_has(self.session_bloom, session_h):
+            return False
+        if author_h is not None and not _bloom_has(self.author_bloom, author_h):
+            return False
+        return True
+
+
+def _walk_records(buf, start: int, end: int):
+    """ Yields (offset, length, kind) for every complete record in buf[start:end]. """
+    pos = start
+    while pos + RECORD_HEAD.size <= end:
+        length, kind = RECORD_HEAD.unpack_from(buf, pos)
+        if length < RECORD_HEAD.size or pos + length > end:
+            break  # torn write at the tail
+        yield pos, length, kind
+        pos += length
+
+
+def _read_layout(buf, size: int):
+    """
+    Returns (indexed blocks in file order, start and end of the unindexed tail).
+    Fast path follows the index chain from the end of the file; if the file was
+    not closed cleanly it falls back to walking the record headers once.
+    """
+    header = len(FILE_MAGIC)
+    if size >= header + INDEX_SIZE and buf[size - len(INDEX_MAGIC):size] == INDEX_MAGIC:
+        blocks = []
+        pos = size - INDEX_SIZE
+        while True:
+            start, prev, count, min_ts, max_ts, sb, ab, _ = INDEX_BODY.unpack_from(buf, pos + RECORD_HEAD.size)
+            blocks.append(_Block(start, pos, count, min_ts, max_ts,
+                                 int.from_bytes(sb, "little"), int.from_bytes(ab, "little")))
+            if prev == 0:
+                break
+            pos = prev
+        blocks.reverse()
+        return blocks, size, size
+
+    blocks = []
+    block_start = header
+    tail = header
+    for pos, length, kind in _walk_records(buf, header, size):
+        if kind == KIND_INDEX:
+            start, _, count, min_ts, max_ts, sb, ab, _ = INDEX_BODY.unpack_from(buf, pos + RECORD_HEAD.size)
+            blocks.append(_Block(start, pos, count, min_ts, max_ts,
+                                 int.from_bytes(sb, "little"), int.from_bytes(ab, "little")))
+            block_start = pos + length
+        tail = pos + length
+    return blocks, block_start, tail
+
+
+class EventLogWriter:
+    """
+    Appends events to `path`. Writes are buffered by the file object; an index
+    block is appended every `block_size` events and on flush()/close().
+    """
+
+    def __init__(self, path: str, block_size: int = 1024):
+        self.path = path
+        self.block_size = block_size
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._prev_index = 0
+        self._recover()
+        self._file = open(path, "ab")
+        self._pos = self._file.tell()
+        if self._pos == 0:
+            self._file.write(FILE_MAGIC)
+            self._pos = len(FILE_MAGIC)
+            self._reset_block()
+
+    def _reset_block(self):
+        self._block = _Block(self._pos, self._pos, session_bloom=0, author_bloom=0)
+        self._names = set()
+
+    def _recover(self):
+        """ Truncates a torn tail record and re-opens the last unindexed block. """
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, "r+b") as f:
+            size = os.fstat(f.fileno()).st_size
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                if buf[:len(FILE_MAGIC)] != FILE_MAGIC:
+                    raise ValueError(f"{self.path} is not an event log")
+                blocks, block_start, tail = _read_layout(buf, size)
+                self._pos = block_start
+                self._reset_block()
+                self._prev_index = blocks[-1].end if blocks else 0
+                # Re-seed the open block's summary from records written before a crash
+                for pos, length, kind in _walk_records(buf, block_start, tail):
+                    if kind == KIND_EVENT:
+                        ts, s_h, a_h = EVENT_HEAD.unpack_from(buf, pos + RECORD_HEAD.size)[:3]
+                        self._note(ts, s_h, a_h)
+            if tail < size:
+                f.truncate(tail)
+
+    def _note(self, ts, session_h, author_h):
+        b = self._block
+        b.count += 1
+        b.min_ts = min(b.min_ts, ts)
+        b.max_ts = max(b.max_ts, ts)
+        b.session_bloom |= _bloom_bits(session_h)
+        b.author_bloom |= _bloom_bits(author_h)
+
+    def _write(self, kind: int, body: bytes):
+        self._file.write(RECORD_HEAD.pack(RECORD_HEAD.size + len(body), kind))
+        self._file.write(body)
+        self._pos += RECORD_HEAD.size + len(body)
+
+    def _intern(self, name: str) -> int:
+        h = name_hash(name)
+        if h not in self._names:
+            # Every block carries its own name table so blocks can be read in isolation
+            self._write(KIND_STRING, STRING_HEAD.pack(h) + name.encode("utf-8"))
+            self._names.add(h)
+        return h
+
+    def append(self, event: Event, session_id: str):
+        session_h = self._intern(session_id)
+        author_h = self._intern(event.author or "")
+        usage = event.usage_metadata
+        prompt = (usage.prompt_token_count or 0) if usage else 0
+        output = (usage.candidates_token_count or 0) if usage else 0
+        total = (usage.total_token_count or 0) if usage else 0
+        payload = event.model_dump_json(exclude_none=True, by_alias=True).encode("utf-8")
+        self._write(KIND_EVENT, EVENT_HEAD.pack(event.timestamp, session_h, author_h, prompt, output, total) + payload)
+        self._note(event.timestamp, session_h, author_h)
+        if self._block.count >= self.block_size:
+            self._write_index()
+
+    def _write_index(self):
+        b = self._block
+        if b.count == 0:
+            return
+        index_pos = self._pos
+        self._write(KIND_INDEX, INDEX_BODY.pack(
+            b.start, self._prev_index, b.count, b.min_ts, b.max_ts,
+            b.session_bloom.to_bytes(32, "little"), b.author_bloom.to_bytes(32, "little"), INDEX_MAGIC))
+        self._prev_index = index_pos
+        self._reset_block()
+
+    def sync(self):
+        """ Pushes buffered records to the OS without closing the current block. """
+        self._file.flush()
+
+    def flush(self):
+        self._write_index()
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventLogReader:
+    """
+    Memory-mapped reader. Filters and aggregates work on the fixed record
+    headers only; event payloads are decoded just for `events()`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if self._buf[:len(FILE_MAGIC)] != FILE_MAGIC:
+            raise ValueError(f"{path} is not an event log")
+        self.blocks, tail_start, tail_end = _read_layout(self._buf, size)
+        if tail_start < tail_end:
+            # Unindexed tail left by a writer that is still running or crashed
+            self.blocks.append(_Block(tail_start, tail_end))
+        self._names = {}
+
+    def close(self):
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _scan(self, session_id=None, author=None, start=None, end=None):
+        """ Yields (offset, length, ts, session_h, author_h, prompt, output, total). """
+        session_h = name_hash(session_id) if session_id is not None else None
+        author_h = name_hash(author) if author is not None else None
+        buf = self._buf
+        for block in self.blocks:
+            if not block.may_match(session_h, author_h, start, end):
+                continue
+            for pos, length, kind in _walk_records(buf, block.start, block.end):
+                if kind == KIND_STRING:
+                    (h,) = STRING_HEAD.unpack_from(buf, pos + RECORD_HEAD.size)
+                    if h not in self._names:
+                        self._names[h] = bytes(buf[pos + RECORD_HEAD.size + STRING_HEAD.size:pos + length]).decode("utf-8")
+                    continue
+                if kind != KIND_EVENT:
+                    continue
+                ts, s_h, a_h, prompt, output, total = EVENT_HEAD.unpack_from(buf, pos + RECORD_HEAD.size)
+                if session_h is not None and s_h != session_h:
+                    continue
+                if author_h is not None and a_h != author_h:
+                    continue
+                if start is not None and ts < start:
+                    continue
+                if end is not None and ts >= end:
+                    continue
+                yield pos, length, ts, s_h, a_h, prompt, output, total
+
+    def count(self, **filters) -> int:
+        return sum(1 for _ in self._scan(**filters))
+
+    def tokens_by_author(self, **filters) -> dict:
+        """ {author: {"events", "prompt_tokens", "output_tokens", "total_tokens"}} """
+        totals = {}
+        for _, _, _, _, a_h, prompt, output, total in self._scan(**filters):
+            row = totals.get(a_h)
+            if row is None:
+                row = totals[a_h] = [0, 0, 0, 0]
+            row[0] += 1
+            row[1] += prompt
+            row[2] += output
+            row[3] += total
+        return {
+            self._names.get(a_h, f"{a_h:016x}"): {
+                "events": r[0], "prompt_tokens": r[1], "output_tokens": r[2], "total_tokens": r[3],
+            }
+            for a_h, r in totals.items()
+        }
+
+    def events(self, **filters):
+        """ Yields (session_id, Event) for matching records, decoding payloads lazily. """
+        payload_start = RECORD_HEAD.size + EVENT_HEAD.size
+        for pos, length, _, s_h, _, _, _, _ in self._scan(**filters):
+            payload = bytes(self._buf[pos + payload_start:pos + length])
+            yield self._names.get(s_h, f"{s_h:016x}"), Event.model_validate(json.loads(payload))
+
+
+class EventLogPlugin(BasePlugin):
+    """ Runner plugin that appends every non-partial event to an EventLogWriter. """
+
+    def __init__(self, path: str, block_size: int = 1024, name: str = "event_log"):
+        super().__init__(name=name)
+        self.writer = EventLogWriter(path, block_size=block_size)
+
+    async def on_event_callback(self, *, invocation_context, event):
+        if not event.partial:
+            self.writer.append(event, invocation_context.session.id)
+        return None
+
+    async def after_run_callback(self, *, invocation_context):
+        self.writer.sync()
+
+    async def close(self):
+        self.writer.close()
+
+
+def main():
+    import argparse
+    import datetime
+
+    parser = argparse.ArgumentParser(description="Query an ADK binary event log.")
+    parser.add_argument("path")
+    parser.add_argument("--session")
+    parser.add_argument("--author")
+    parser.add_argument("--since", help="ISO timestamp")
+    parser.add_argument("--until", help="ISO timestamp")
+    args = parser.parse_args()
+
+    start = datetime.datetime.fromisoformat(args.since).timestamp() if args.since else None
+    end = datetime.datetime.fromisoformat(args.until).timestamp() if args.until else None
+    with EventLogReader(args.path) as reader:
+        rows = reader.tokens_by_author(session_id=args.session, author=args.author, start=start, end=end)
+    for author, row in sorted(rows.items()):
+        print(f"{author}: {row['events']} events, {row['prompt_tokens']} in / "
+              f"{row['output_tokens']} out / {row['total_tokens']} total tokens")
+
+
+if __name__ == "__main__":
+    main()
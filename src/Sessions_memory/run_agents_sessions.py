@@ -1,18 +1,21 @@
 
 from .agent import root_agent
+from .event_log import EventLogPlugin
+from .state_deltas import StateJournal, StateJournalPlugin, apply_state_delta, preference_delta, preference_key
+from .warmup import WarmPool
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
-import uuid
 import asyncio
 from google.adk.events import Event, EventActions
 import time
+import os
 
 session_service = InMemorySessionService()
 state_context = {
     "user_name": "Atef",
-    "user_post_preferences": """
-        - LinkedIn: Professional, engaging, and relevant to the topic.
+    # One key per platform so a single preference can be changed with a state_delta
+    preference_key("LinkedIn"): """Professional, engaging, and relevant to the topic.
             should have a primary hook, not more than 60 characters.
             should have a line break after the hook.
             should have a post-hook that is either supporting the hook or completely inverse of the hook to grab attention.
@@ -23,29 +26,46 @@ state_context = {
             should ask the audience to share their thoughts in the comments. And to repost.
             should use emojis to make the post more engaging.
             should use hashtags to make the post more discoverable.
-        - Instagram: Engaging, fast paced, and relevant to the topic.
+        """,
+    preference_key("Instagram"): """Engaging, fast paced, and relevant to the topic.
             should have a primary hook, which grabs the attention of the audience.
             should have a call to action at the end.
         """,
 }
 
-SESSION_ID = str(uuid.uuid4())
 USER_ID = "atef"
 APP_NAME = "post_generator"
+# Stable id, so a restart resumes the session's state from the journal (ADK_SESSION_ID picks another one)
+SESSION_ID = os.environ.get("ADK_SESSION_ID", f"{USER_ID}-{APP_NAME}")
+ADK_DIR = os.path.join(os.path.dirname(__file__), ".adk")
+journals = {}  # app name -> StateJournal, shared by the app's plugin and the code below
+
+
+def app_plugins(app_name):
+    """ Fresh plugins per app: .adk/<app>/events.bin and .adk/<app>/state hold only that app's records. """
+    journal = journals.setdefault(app_name, StateJournal(os.path.join(ADK_DIR, app_name, "state")))
+    return [EventLogPlugin(os.path.join(ADK_DIR, app_name, "events.bin")), StateJournalPlugin(journal)]
+
+
+# Runners and model clients are built and warmed once per process
+pool = WarmPool(session_service, plugins=app_plugins)
+pool.add(APP_NAME, root_agent)
 print("1")
 
 async def main():   
+    await pool.start(warm_request=os.environ.get("ADK_WARMUP_REQUEST") == "1")
+    journal = journals[APP_NAME]
+    # Resume the journaled state (edited preferences, output_key results) over the defaults
+    saved = journal.load(SESSION_ID)
     session = await session_service.create_session(
         session_id=SESSION_ID,
         user_id=USER_ID,
         app_name=APP_NAME,
-        state = state_context,
+        state = {**state_context, **saved},
     )       
-    runner = Runner(
-        agent=root_agent,
-        session_service=session_service,
-        app_name=APP_NAME,
-    )
+    if not saved:
+        journal.record(SESSION_ID, state_context)
+    runner = pool.runner(APP_NAME)
 
 
     print("Agent: Hello! I am your Assistant. How can I help you with your post today?")
@@ -78,8 +98,15 @@ async def main():
         app_name=APP_NAME,
     )
     print("usage:",event.usage_metadata.total_token_count)
+
+    # Edit one platform's preference without rewriting the whole state
+    edit = input("Update a preference (platform: text), or press Enter to skip: ")
+    if ":" in edit:
+        platform, text = edit.split(":", 1)
+        await apply_state_delta(session_service, session, preference_delta(platform, text.strip()), journal=journal)
     for key, value in session.state.items():
         print(f'{key}: {value}')
+    await pool.close()
 
 # 4. Entry point to run the async function
 if __name__ == "__main__":
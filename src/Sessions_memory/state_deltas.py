@@ -0,0 +1,138 @@
+"""
+Delta-based session state updates.
+
+Small changes (e.g. one platform's post preference) are applied through an
+`Event` carrying `EventActions(state_delta=...)`, so ADK merges just those keys
+into the session instead of the whole state being rebuilt. `StateJournal`
+persists the same deltas as JSON lines and writes a full snapshot every
+`snapshot_every` deltas, which bounds how much has to be replayed on load.
+"""
+import json
+import os
+import time
+import uuid
+
+from google.adk.events import Event, EventActions
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.sessions import Session
+from google.adk.sessions.base_session_service import BaseSessionService
+from google.adk.sessions.state import State
+
+PREFERENCE_PREFIX = "post_pref_"
+
+
+def preference_key(platform: str) -> str:
+    """ State key holding one platform's preferences, e.g. post_pref_linkedin. """
+    return PREFERENCE_PREFIX + platform.strip().lower().replace(" ", "_")
+
+
+def preference_delta(platform: str, text: str) -> dict:
+    return {preference_key(platform): text}
+
+
+def make_delta_event(delta: dict, author: str = "user", invocation_id: str = None) -> Event:
+    return Event(
+        invocation_id=invocation_id or f"state-{uuid.uuid4()}",
+        author=author,
+        actions=EventActions(state_delta=dict(delta)),
+        timestamp=time.time(),
+    )
+
+
+async def apply_state_delta(session_service: BaseSessionService, session: Session, delta: dict,
+                            author: str = "user", journal: "StateJournal" = None) -> Event:
+    """
+    Applies `delta` to `session` through the session service (which updates
+    session.state in place and stores the event) and records it in `journal`.
+    """
+    event = await session_service.append_event(session, make_delta_event(delta, author))
+    if journal is not None:
+        journal.record(session.id, delta)
+    return event
+
+
+class StateJournal:
+    """
+    Per-session delta log with periodic snapshots, stored under `directory`:
+        <session_id>.snapshot.json   {"seq": n, "state": {...}}
+        <session_id>.deltas.jsonl    {"seq": n, "delta": {...}} per line
+    The materialized state is kept in memory and updated incrementally.
+    """
+
+    def __init__(self, directory: str, snapshot_every: int = 50):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self._states = {}
+        self._seq = {}
+        self._since_snapshot = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, session_id: str):
+        base = os.path.join(self.directory, session_id)
+        return base + ".snapshot.json", base + ".deltas.jsonl"
+
+    def load(self, session_id: str) -> dict:
+        """ Returns the persisted state: last snapshot plus the deltas after it. """
+        if session_id in self._states:
+            return dict(self._states[session_id])
+        snapshot_path, deltas_path = self._paths(session_id)
+        state, seq, replayed = {}, 0, 0
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            state, seq = snapshot["state"], snapshot["seq"]
+        if os.path.exists(deltas_path):
+            with open(deltas_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # torn last line
+                    # Deltas already folded into the snapshot are skipped
+                    if entry["seq"] > seq:
+                        state.update(entry["delta"])
+                        seq = entry["seq"]
+                        replayed += 1
+        self._states[session_id] = state
+        self._seq[session_id] = seq
+        self._since_snapshot[session_id] = replayed
+        return dict(state)
+
+    def record(self, session_id: str, delta: dict):
+        # temp: keys only live for one invocation and are never persisted
+        delta = {k: v for k, v in delta.items() if not k.startswith(State.TEMP_PREFIX)}
+        if not delta:
+            return
+        if session_id not in self._states:
+            self.load(session_id)
+        self._states[session_id].update(delta)
+        self._seq[session_id] += 1
+        _, deltas_path = self._paths(session_id)
+        with open(deltas_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"seq": self._seq[session_id], "delta": delta}) + "\n")
+        self._since_snapshot[session_id] += 1
+        if self._since_snapshot[session_id] >= self.snapshot_every:
+            self.snapshot(session_id)
+
+    def snapshot(self, session_id: str):
+        snapshot_path, deltas_path = self._paths(session_id)
+        tmp = snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"seq": self._seq[session_id], "state": self._states[session_id]}, f)
+        os.replace(tmp, snapshot_path)
+        # A crash between these two steps is harmless: load() skips seq <= snapshot
+        open(deltas_path, "w").close()
+        self._since_snapshot[session_id] = 0
+
+
+class StateJournalPlugin(BasePlugin):
+    """ Records state deltas produced during runner invocations (e.g. output_key). """
+
+    def __init__(self, journal: StateJournal, name: str = "state_journal"):
+        super().__init__(name=name)
+        self.journal = journal
+
+    async def on_event_callback(self, *, invocation_context, event):
+        if not event.partial and event.actions and event.actions.state_delta:
+            self.journal.record(invocation_context.session.id, event.actions.state_delta)
+        return None
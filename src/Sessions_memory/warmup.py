@@ -0,0 +1,159 @@
+"""
+Pre-warmed Runner and model client pool.
+
+When an agent's `model` is a string, ADK resolves it to a fresh `Gemini`
+instance (and therefore a fresh genai Client) for every request, so each
+request pays for client construction, TLS handshake and auth. `WarmPool`
+resolves every model once, pins the instance on the agent so its client and
+connection pool are reused, opens the connection up front, keeps it alive in
+the background and builds the runners before the first request arrives.
+
+Each runner is built from an `App` holding its own plugins: `plugins` is a
+factory called once per app name, so plugins that write files (event log,
+state journal) never receive events from more than one app.
+
+    pool = WarmPool(session_service, plugins=lambda app_name: [EventLogPlugin(...)])
+    pool.add(APP_NAME, root_agent)
+    await pool.start(warm_request=True)
+    runner = pool.runner(APP_NAME)
+"""
+import asyncio
+import logging
+import time
+
+from google.adk.agents import LlmAgent
+from google.adk.apps import App
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.registry import LLMRegistry
+from google.adk.runners import Runner
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+
+class WarmPool:
+    def __init__(self, session_service, plugins=None, keepalive_interval: float = 60.0, warmup_timeout: float = 15.0):
+        self.session_service = session_service
+        self.plugins = plugins or []
+        self.keepalive_interval = keepalive_interval
+        self.warmup_timeout = warmup_timeout
+        self._agents = {}
+        self._runners = {}
+        self._models = {}          # model name -> shared BaseLlm instance
+        self._status = {}          # model name -> "pending" | "warm" | error text
+        self._ready = asyncio.Event()
+        self._keepalive_task = None
+        self.warmup_seconds = None
+
+    def add(self, app_name: str, agent):
+        self._agents[app_name] = agent
+
+    # --- MODEL CLIENTS ---
+    def _pin_models(self, agent):
+        """ Replaces string models with one shared instance per model name. """
+        if isinstance(agent, LlmAgent) and agent.model:
+            if isinstance(agent.model, str):
+                if agent.model not in self._models:
+                    self._models[agent.model] = LLMRegistry.new_llm(agent.model)
+                agent.model = self._models[agent.model]
+            elif isinstance(agent.model, BaseLlm):
+                self._models.setdefault(agent.model.model, agent.model)
+        for sub_agent in agent.sub_agents:
+            self._pin_models(sub_agent)
+
+    async def _open_connection(self, llm: BaseLlm):
+        # Gemini keeps its genai Client on a cached property; a metadata call
+        # builds it and leaves an authenticated keep-alive connection in its pool.
+        client = getattr(llm, "api_client", None)
+        if client is not None:
+            await client.aio.models.get(model=llm.model)
+
+    async def _warm_request(self, llm: BaseLlm):
+        request = LlmRequest(
+            model=llm.model,
+            contents=[types.Content(role="user", parts=[types.Part(text="ping")])],
+            config=types.GenerateContentConfig(max_output_tokens=1),
+        )
+        async for _ in llm.generate_content_async(request):
+            pass
+
+    async def _warm_model(self, name: str, llm: BaseLlm, warm_request: bool):
+        try:
+            await asyncio.wait_for(self._open_connection(llm), self.warmup_timeout)
+            if warm_request:
+                await asyncio.wait_for(self._warm_request(llm), self.warmup_timeout)
+            self._status[name] = "warm"
+        except Exception as e:
+            # A failed warm-up only costs latency later, it must not stop the worker
+            logger.warning("Warm-up for %s failed: %s", name, e)
+            self._status[name] = f"{type(e).__name__}: {e}"
+
+    async def _keepalive(self):
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            for name, llm in self._models.items():
+                try:
+                    await asyncio.wait_for(self._open_connection(llm), self.warmup_timeout)
+                except Exception as e:
+                    logger.debug("Keep-alive for %s failed: %s", name, e)
+
+    # --- LIFECYCLE ---
+    async def start(self, warm_request: bool = False, keepalive: bool = True):
+        """ Builds runners and warms every model; readiness flips once this returns. """
+        start = time.perf_counter()
+        for app_name, agent in self._agents.items():
+            self._pin_models(agent)
+            app = App(name=app_name, root_agent=agent, plugins=list(self.plugins(app_name)) if self.plugins else [])
+            self._runners[app_name] = Runner(app=app, session_service=self.session_service)
+        self._status = {name: "pending" for name in self._models}
+        await asyncio.gather(*(self._warm_model(name, llm, warm_request) for name, llm in self._models.items()))
+        if keepalive and self._keepalive_task is None:
+            self._keepalive_task = asyncio.create_task(self._keepalive())
+        self.warmup_seconds = time.perf_counter() - start
+        self._ready.set()
+
+    async def close(self):
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+        for runner in self._runners.values():
+            await runner.close()
+
+    def runner(self, app_name: str) -> Runner:
+        if app_name not in self._runners:
+            raise KeyError(f"No runner for {app_name}; was it added before start()?")
+        return self._runners[app_name]
+
+    # --- READINESS ---
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    async def wait_ready(self):
+        await self._ready.wait()
+
+    def readiness(self) -> dict:
+        return {
+            "ready": self.is_ready,
+            "runners": sorted(self._runners),
+            "models": dict(self._status),
+            "warmup_seconds": self.warmup_seconds,
+        }
+
+    async def serve_readiness(self, host: str = "0.0.0.0", port: int = 8081):
+        """ Minimal HTTP probe: 200 once warm-up is done, 503 before. """
+        import json
+
+        async def handle(reader, writer):
+            await reader.readline()
+            body = json.dumps(self.readiness()).encode("utf-8")
+            status = "200 OK" if self.is_ready else "503 Service Unavailable"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii") + body
+            )
+            await writer.drain()
+            writer.close()
+
+        return await asyncio.start_server(handle, host, port)
@@ -0,0 +1,247 @@
+"""
+Parallel eval runner for the Test_agent.
+
+Loads test cases (input + expected behaviour) from a JSON file, runs them
+concurrently against `root_agent` with a bounded worker pool and a per-case
+timeout, and caches results by (agent config hash, case hash) so only new or
+changed cases are re-run.
+
+# to run from root folder
+python -m src.Test_agent.eval_runner --concurrency 8 --timeout 30 --min-pass-rate 0.9
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+
+from dotenv import load_dotenv
+load_dotenv()
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from .agent import root_agent
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CASES = os.path.join(HERE, "eval_cases.json")
+DEFAULT_CACHE = os.path.join(HERE, ".adk", "eval_cache.json")
+APP_NAME = "test_agent_eval"
+USER_ID = "eval"
+
+
+# --- CACHE KEYS ---
+def _digest(payload) -> str:
+    blob = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+def agent_config_hash(agent) -> str:
+    """ Hash of everything about the agent that can change its answers. """
+    model = agent.model if isinstance(agent.model, str) else getattr(agent.model, "model", repr(agent.model))
+    tools = [getattr(t, "__name__", None) or getattr(t, "name", repr(t)) for t in agent.tools]
+    return _digest({
+        "name": agent.name,
+        "model": model,
+        "description": agent.description,
+        "instruction": agent.instruction if isinstance(agent.instruction, str) else repr(agent.instruction),
+        "tools": tools,
+        "generate_content_config": agent.generate_content_config.model_dump(exclude_none=True)
+        if agent.generate_content_config else None,
+    })
+
+
+def case_hash(case: dict) -> str:
+    return _digest(case)
+
+
+def load_cache(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_cache(path: str, cache: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp, path)
+
+
+# --- GRADING ---
+def grade(case: dict, text: str) -> bool:
+    """ Case-insensitive substring checks against the final response. """
+    lowered = (text or "").lower()
+    for needle in case.get("expected_contains", []):
+        if needle.lower() not in lowered:
+            return False
+    for needle in case.get("expected_not_contains", []):
+        if needle.lower() in lowered:
+            return False
+    return True
+
+
+# --- RUNNING ---
+async def run_case(runner: Runner, session_service: InMemorySessionService, case: dict) -> dict:
+    """ Runs one case in a fresh session and returns its raw result. """
+    session_id = str(uuid.uuid4())
+    await session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+    user_input = types.Content(role="user", parts=[types.Part(text=case["input"])])
+
+    final_text = ""
+    prompt_tokens = output_tokens = 0
+    start = time.perf_counter()
+    async for event in runner.run_async(user_id=USER_ID, session_id=session_id, new_message=user_input):
+        if event.usage_metadata:
+            prompt_tokens += event.usage_metadata.prompt_token_count or 0
+            output_tokens += event.usage_metadata.candidates_token_count or 0
+        if event.is_final_response() and event.content and event.content.parts:
+            final_text = "".join(part.text or "" for part in event.content.parts)
+    latency = time.perf_counter() - start
+
+    return {
+        "output": final_text,
+        "latency_s": latency,
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+    }
+
+
+async def run_eval(cases: list, agent=root_agent, concurrency: int = 8, timeout: float = 30.0,
+                   cache_path: str = DEFAULT_CACHE, force: bool = False) -> list:
+    """
+    Runs all cases with at most `concurrency` in flight. Cached results for the
+    same (agent config, case) are reused unless `force` is set.
+    Returns one result dict per case, in input order.
+    """
+    config_hash = agent_config_hash(agent)
+    cache = load_cache(cache_path)
+    agent_cache = cache.setdefault(config_hash, {})
+
+    session_service = InMemorySessionService()
+    runner = Runner(agent=agent, app_name=APP_NAME, session_service=session_service)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(case: dict) -> dict:
+        key = case_hash(case)
+        if not force and key in agent_cache:
+            result = dict(agent_cache[key], cached=True)
+        else:
+            async with semaphore:
+                try:
+                    raw = await asyncio.wait_for(run_case(runner, session_service, case), timeout)
+                    result = dict(raw, error=None)
+                    # Only successful runs are cached, errors may be transient
+                    agent_cache[key] = result
+                except asyncio.TimeoutError:
+                    result = {"output": "", "latency_s": timeout, "prompt_tokens": 0,
+                              "output_tokens": 0, "error": "timeout"}
+                except Exception as e:
+                    result = {"output": "", "latency_s": None, "prompt_tokens": 0,
+                              "output_tokens": 0, "error": f"{type(e).__name__}: {e}"}
+            result = dict(result, cached=False)
+        result["id"] = case.get("id", case_hash(case))
+        result["passed"] = result["error"] is None and grade(case, result["output"])
+        return result
+
+    try:
+        results = await asyncio.gather(*(worker(case) for case in cases))
+    finally:
+        # Drop entries for cases that no longer exist, keep other agent configs
+        live = {case_hash(case) for case in cases}
+        cache[config_hash] = {k: v for k, v in agent_cache.items() if k in live}
+        save_cache(cache_path, cache)
+    return results
+
+
+# --- REPORTING ---
+def percentile(values: list, pct: float):
+    """ Nearest-rank percentile, None for an empty list. """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(-(-pct * len(ordered) // 100)))
+    return ordered[rank - 1]
+
+
+def summarize(results: list, input_price: float = 0.0, output_price: float = 0.0) -> dict:
+    """
+    Prices are per 1M tokens. Latency percentiles, tokens and cost cover the
+    cases run this time; timeouts count at the timeout, so they stay in the
+    tail. Cached cases made no model calls, their original tokens are
+    reported separately.
+    """
+    fresh = [r for r in results if not r["cached"]]
+    cached = [r for r in results if r["cached"]]
+    latencies = [r["latency_s"] for r in fresh if r["latency_s"] is not None]
+    prompt_tokens = sum(r["prompt_tokens"] for r in fresh)
+    output_tokens = sum(r["output_tokens"] for r in fresh)
+    passed = sum(1 for r in results if r["passed"])
+    return {
+        "cases": len(results),
+        "passed": passed,
+        "pass_rate": passed / len(results) if results else 0.0,
+        "errors": sum(1 for r in results if r["error"] is not None),
+        "timeouts": sum(1 for r in results if r["error"] == "timeout"),
+        "cached": len(cached),
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "p99_s": percentile(latencies, 99),
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+        "cost": (prompt_tokens * input_price + output_tokens * output_price) / 1_000_000,
+        "cached_prompt_tokens": sum(r["prompt_tokens"] for r in cached),
+        "cached_output_tokens": sum(r["output_tokens"] for r in cached),
+    }
+
+
+def print_report(results: list, summary: dict):
+    for r in results:
+        status = "PASS" if r["passed"] else "FAIL"
+        note = r["error"] or ("cached" if r["cached"] else "")
+        print(f"[{status}] {r['id']} {note}")
+
+    def fmt(v):
+        return "n/a" if v is None else f"{v:.2f}s"
+
+    print("-" * 40)
+    print(f"Pass rate: {summary['passed']}/{summary['cases']} ({summary['pass_rate']:.0%})"
+          f"  errors: {summary['errors']} ({summary['timeouts']} timeouts)  cached: {summary['cached']}")
+    print(f"Latency p50: {fmt(summary['p50_s'])}  p95: {fmt(summary['p95_s'])}  p99: {fmt(summary['p99_s'])}"
+          f"  (this run, timeouts at the limit)")
+    print(f"Tokens in: {summary['prompt_tokens']}  out: {summary['output_tokens']}  cost: ${summary['cost']:.4f}")
+    if summary["cached"]:
+        print(f"Cached (not re-run): tokens in: {summary['cached_prompt_tokens']}"
+              f"  out: {summary['cached_output_tokens']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Test_agent eval set in parallel.")
+    parser.add_argument("--cases", default=DEFAULT_CASES)
+    parser.add_argument("--cache", default=DEFAULT_CACHE)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-case timeout in seconds")
+    parser.add_argument("--force", action="store_true", help="Ignore cached results")
+    parser.add_argument("--input-price", type=float, default=0.0, help="$ per 1M prompt tokens")
+    parser.add_argument("--output-price", type=float, default=0.0, help="$ per 1M output tokens")
+    parser.add_argument("--min-pass-rate", type=float, default=None, help="Exit 1 below this rate (deploy gate)")
+    args = parser.parse_args()
+
+    with open(args.cases, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+
+    results = asyncio.run(run_eval(cases, concurrency=args.concurrency, timeout=args.timeout,
+                                   cache_path=args.cache, force=args.force))
+    summary = summarize(results, args.input_price, args.output_price)
+    print_report(results, summary)
+
+    if args.min_pass_rate is not None and summary["pass_rate"] < args.min_pass_rate:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,9 @@ from google.adk.agents.llm_agent import LlmAgent
 from google.adk.agents import Agent
 from google.adk.tools import google_search
 import datetime
+from agent_tools.async_tools import async_tool
 
+@async_tool(deadline=5)
 def get_current_time() -> dict:
     
     return {"time": datetime.datetime.now().strftime("%H:%M")}
@@ -1,10 +1,16 @@
 import tkinter as tk
-import math
 import random
+import numpy as np
+from slit_lab.hitlog import LOG_DIR, HitLog, archive, log_path, open_log
+from slit_lab.physics import barrier_gaps, intensity_at
+from slit_lab.profiling import FrameProfiler, trace_path
+from slit_lab.sampler import wave_sampler
 
 class QuantumSimulator:
-    def __init__(self, root):
+    def __init__(self, root, log_dir=LOG_DIR, start=True):
+        # With start=False the caller drives the frames with step() (see benchmarks/bench_simulators.py)
         self.root = root
+        self.log_dir = log_dir
         self.root.title("Young's Double Slit Experiment Simulator")
         self.root.configure(bg="#222222")
 
@@ -16,16 +22,24 @@ class QuantumSimulator:
         
         # Simulation State
         self.particles = []       # List of active particle objects
-        self.hits = []           # List of where particles landed (y-coords)
+        self.POOL_SIZE = 64       # Ovals created once and recycled (more than ever fly at once)
+        self.HIT_SPREAD = 2       # A hit lights its row and 2 rows either side
         self.is_firing = False
-        self.mode = "double"      # "single" or "double"
+        self.mode = "double"      # "single", "double", "triple" or "grating"
+        self.hit_log = None       # HitLogWriter of the current barrier's run
+        # Frame timings: "tk" is everything between two animate() calls (redraw, events, idle)
+        self.profiler = FrameProfiler(("tk", "particles", "histogram"))
 
         # --- GUI Layout ---
         self.create_controls()
         self.create_canvas()
+        self.reset_screen()       # Resume the logged run of the starting barrier
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.root.bind("<F3>", lambda event: self.toggle_profiler())
 
         # Start the animation loop
-        self.animate()
+        if start:
+            self.animate()
 
     def create_controls(self):
         control_frame = tk.Frame(self.root, bg="#333333", padx=10, pady=10)
@@ -39,15 +53,12 @@ class QuantumSimulator:
         tk.Label(control_frame, text="Select Barrier:", bg="#333333", fg="#AAAAAA").pack(anchor="w")
         self.mode_var = tk.StringVar(value="double")
         
-        rb1 = tk.Radiobutton(control_frame, text="Single Slit", variable=self.mode_var, 
-                             value="single", command=self.reset_screen, 
-                             bg="#333333", fg="white", selectcolor="#555555", activebackground="#333333")
-        rb1.pack(anchor="w", pady=2)
-        
-        rb2 = tk.Radiobutton(control_frame, text="Double Slit", variable=self.mode_var, 
-                             value="double", command=self.reset_screen,
-                             bg="#333333", fg="white", selectcolor="#555555", activebackground="#333333")
-        rb2.pack(anchor="w", pady=2)
+        for text, value in [("Single Slit", "single"), ("Double Slit", "double"),
+                            ("Triple Slit", "triple"), ("Grating (5 slits)", "grating")]:
+            rb = tk.Radiobutton(control_frame, text=text, variable=self.mode_var, 
+                                value=value, command=self.reset_screen, 
+                                bg="#333333", fg="white", selectcolor="#555555", activebackground="#333333")
+            rb.pack(anchor="w", pady=2)
 
         # Fire Button
         self.btn_fire = tk.Button(control_frame, text="FIRE PARTICLES", font=("Arial", 12, "bold"),
@@ -55,13 +66,17 @@ class QuantumSimulator:
         self.btn_fire.pack(pady=30, fill=tk.X)
 
         # Clear Button
-        tk.Button(control_frame, text="Clear Screen", command=self.reset_screen,
+        tk.Button(control_frame, text="Clear Screen", command=lambda: self.reset_screen(clear=True),
                   bg="#555555", fg="white").pack(fill=tk.X)
 
         # Explanation Label
         self.lbl_stats = tk.Label(control_frame, text="Particles: 0", bg="#333333", fg="#00FF00")
         self.lbl_stats.pack(pady=20)
 
+        # Frame profiler (F3), packed only while shown
+        self.lbl_profile = tk.Label(control_frame, text="", bg="#333333", fg="#FFFF00",
+                                    justify=tk.LEFT, font=("Courier", 9))
+
     def create_canvas(self):
         # Main simulation area
         self.width = 800
@@ -71,6 +86,8 @@ class QuantumSimulator:
 
         # Draw static elements
         self.draw_scene_setup()
+        self.create_histogram()
+        self.create_particle_pool()
 
     def draw_scene_setup(self):
         self.canvas.delete("static")
@@ -87,26 +104,83 @@ class QuantumSimulator:
         
         self.mode = self.mode_var.get()
         
-        if self.mode == "single":
-            # Draw top and bottom parts leaving one gap
-            gap_size = self.SLIT_WIDTH
-            self.canvas.create_line(self.barrier_x, 0, self.barrier_x, mid_y - gap_size, width=5, fill=barrier_color, tags="static")
-            self.canvas.create_line(self.barrier_x, mid_y + gap_size, self.barrier_x, self.height, width=5, fill=barrier_color, tags="static")
-        else:
-            # Draw parts leaving two gaps
-            gap_size = self.SLIT_WIDTH
-            dist = self.SLIT_DISTANCE / 2
-            # Top Wall
-            self.canvas.create_line(self.barrier_x, 0, self.barrier_x, mid_y - dist - gap_size, width=5, fill=barrier_color, tags="static")
-            # Middle Wall
-            self.canvas.create_line(self.barrier_x, mid_y - dist + gap_size, self.barrier_x, mid_y + dist - gap_size, width=5, fill=barrier_color, tags="static")
-            # Bottom Wall
-            self.canvas.create_line(self.barrier_x, mid_y + dist + gap_size, self.barrier_x, self.height, width=5, fill=barrier_color, tags="static")
+        # Draw wall segments between the gaps of the selected layout
+        wall_top = 0
+        for center, half_gap in barrier_gaps(self.mode, self.SLIT_WIDTH, self.SLIT_DISTANCE):
+            self.canvas.create_line(self.barrier_x, wall_top, self.barrier_x, mid_y + center - half_gap, width=5, fill=barrier_color, tags="static")
+            wall_top = mid_y + center + half_gap
+        self.canvas.create_line(self.barrier_x, wall_top, self.barrier_x, self.height, width=5, fill=barrier_color, tags="static")
 
         # 3. The Screen (Right)
         self.screen_x = 750
         self.canvas.create_line(self.screen_x, 0, self.screen_x, self.height, width=2, fill="#888888", tags="static")
 
+        # Keep the scene under the pooled particles and the hit histogram
+        self.canvas.tag_lower("static")
+
+    def create_histogram(self):
+        # Hits are counted per screen row and shown as one PhotoImage next to
+        # the detector, rewritten in place, so the canvas never gains items.
+        self.hist_x = self.screen_x + 2
+        self.hist_width = self.width - self.hist_x
+        self.hist_image = tk.PhotoImage(width=self.hist_width, height=self.height)
+        self.canvas.create_image(self.hist_x, 0, image=self.hist_image, anchor="nw")
+        self.hist_colors = ["#%02x%02x%02x" % (0, g, 0) for g in range(256)]
+        self.hit_counts = np.zeros(self.height, dtype=np.int64)
+        self.hit_total = 0
+        self.hist_max = 0
+        self.dirty_rows = set()
+        self.render_histogram(range(self.height))
+
+    def create_particle_pool(self):
+        mid_y = self.height / 2
+        self.pool = [
+            self.canvas.create_oval(self.gun_x, mid_y-3, self.gun_x+6, mid_y+3, fill="#00FF00", outline="", state="hidden")
+            for _ in range(self.POOL_SIZE)
+        ]
+        self.free_ovals = list(self.pool)
+
+    def render_histogram(self, rows):
+        """ Rewrites the given rows of the histogram image: bar length and green level follow count / max. """
+        rows = sorted(rows)
+        peak = max(self.hist_max, 1)
+        background = self.hist_colors[0]
+        # Contiguous rows go to Tk in one put() call
+        start = 0
+        while start < len(rows):
+            end = start
+            while end + 1 < len(rows) and rows[end + 1] == rows[end] + 1:
+                end += 1
+            data = []
+            for y in rows[start:end + 1]:
+                frac = self.hit_counts[y] / peak
+                length = int(round(frac * self.hist_width))
+                color = self.hist_colors[int(80 + 175 * frac)] if self.hit_counts[y] else background
+                data.append("{" + " ".join([color] * length + [background] * (self.hist_width - length)) + "}")
+            self.hist_image.put(" ".join(data), to=(0, rows[start]))
+            start = end + 1
+
+    def record_hit(self, y):
+        y = min(max(y, 0), self.height - 1)
+        self.hit_log.append(y)
+        row = int(y)
+        lo, hi = max(row - self.HIT_SPREAD, 0), min(row + self.HIT_SPREAD + 1, self.height)
+        self.hit_counts[lo:hi] += 1
+        self.hit_total += 1
+        self.dirty_rows.update(range(lo, hi))
+
+    def flush_histogram(self):
+        if not self.dirty_rows:
+            return
+        peak = int(self.hit_counts.max())
+        if peak != self.hist_max:
+            # The scale changed, every bar moves
+            self.hist_max = peak
+            self.render_histogram(range(self.height))
+        else:
+            self.render_histogram(self.dirty_rows)
+        self.dirty_rows.clear()
+
     def toggle_fire(self):
         self.is_firing = not self.is_firing
         if self.is_firing:
@@ -114,61 +188,75 @@ class QuantumSimulator:
         else:
             self.btn_fire.config(text="FIRE PARTICLES", bg="#00AA00")
 
-    def reset_screen(self):
-        self.hits = []
+    def reset_screen(self, clear=False):
+        """
+        Switches to the selected barrier's run, resumed from its hit log.
+        With `clear` the log is archived and the screen starts empty.
+        """
+        for p in self.particles:
+            self.canvas.itemconfigure(p["id"], state="hidden")
         self.particles = []
-        self.canvas.delete("particle")
-        self.canvas.delete("hit_marker")
+        self.free_ovals = list(self.pool)
         self.draw_scene_setup()
-        self.lbl_stats.config(text="Particles: 0")
+        self.open_hit_log(clear)
+        self.dirty_rows.clear()
+        self.hist_max = int(self.hit_counts.max())
+        self.render_histogram(range(self.height))
+        self.lbl_stats.config(text=f"Particles: {self.hit_total}")
 
-    # --- THE PHYSICS ENGINE ---
-    def get_wave_intensity(self, y_offset):
-        # Map screen position to angle theta
-        # y_offset is distance from center of screen
-        theta = math.atan(y_offset / self.SCREEN_DIST)
-        
-        # Constants for equations
-        k = (2 * math.pi) / self.WAVELENGTH
-        
-        # 1. Diffraction (Single Slit Envelope)
-        # Beta = (pi * a * sin(theta)) / lambda
-        beta = (k * self.SLIT_WIDTH * math.sin(theta)) / 2
-        
-        if beta == 0:
-            diffraction = 1.0
+    def open_hit_log(self, clear):
+        """ Opens the log of the current barrier and rebuilds the hit counts from it. """
+        if self.hit_log is not None:
+            self.hit_log.close()
+        path = log_path("test", self.mode, directory=self.log_dir)
+        if clear:
+            archive(path)
+        settings = {"mode": self.mode, "wavelength": self.WAVELENGTH, "slit_width": self.SLIT_WIDTH,
+                    "slit_distance": self.SLIT_DISTANCE, "screen_dist": self.SCREEN_DIST, "height": self.height}
+        self.hit_log = open_log(path, ("y",), settings)
+        rows, _ = HitLog(path).histogram("y", self.height, (0, self.height))
+        # Same spread as record_hit(): every hit counts on its row and HIT_SPREAD rows either side
+        spread = np.ones(2 * self.HIT_SPREAD + 1, dtype=np.int64)
+        self.hit_counts[:] = np.convolve(rows, spread, mode="same")
+        self.hit_total = int(rows.sum())
+
+    def toggle_profiler(self):
+        self.profiler.toggle()
+        if self.profiler.visible:
+            self.lbl_profile.pack(anchor="w")
         else:
-            diffraction = (math.sin(beta) / beta) ** 2
+            self.lbl_profile.pack_forget()
 
-        if self.mode == "single":
-            return diffraction
+    def close(self):
+        self.hit_log.close()
+        self.profiler.dump(trace_path("test"))
+        self.root.destroy()
 
-        # 2. Interference (Double Slit)
-        # Alpha = (pi * d * sin(theta)) / lambda
-        alpha = (k * self.SLIT_DISTANCE * math.sin(theta)) / 2
-        interference = math.cos(alpha) ** 2
-        
-        return diffraction * interference
+    # --- THE PHYSICS ENGINE ---
+    def get_wave_intensity(self, y_offset):
+        # Shared physics engine: diffraction x interference for single/double,
+        # FFT far field of the barrier openings for other layouts.
+        # y_offset is distance from center of screen (scalar or numpy array)
+        return intensity_at(y_offset, self.mode, self.WAVELENGTH, self.SLIT_WIDTH,
+                            self.SLIT_DISTANCE, self.SCREEN_DIST)
 
     def determine_landing_y(self):
-        # Uses Rejection Sampling to find a random Y coordinate 
-        # that fits the probability distribution of the wave function.
-        while True:
-            # 1. Pick a random spot on the screen (between -200 and +200 pixels from center)
-            rand_y = random.uniform(-200, 200)
-            
-            # 2. Calculate how likely a particle is to hit there (Intensity 0.0 to 1.0)
-            probability = self.get_wave_intensity(rand_y)
-            
-            # 3. Roll the dice
-            if random.random() < probability:
-                return rand_y + (self.height / 2)
+        # Inverse-CDF sampling: the wave intensity between -200 and +200 pixels
+        # from center is tabulated once per setup, so every draw costs the same.
+        sampler = wave_sampler(self.mode, self.WAVELENGTH, self.SLIT_WIDTH, self.SLIT_DISTANCE,
+                               self.SCREEN_DIST, -200, 200)
+        return sampler.draw() + (self.height / 2)
 
     def spawn_particle(self):
+        if not self.free_ovals:
+            return # Every pooled oval is in flight
         mid_y = self.height / 2
-        # Start at gun
+        # Start at gun, reusing a hidden oval from the pool
+        oval = self.free_ovals.pop()
+        self.canvas.coords(oval, self.gun_x, mid_y-3, self.gun_x+6, mid_y+3)
+        self.canvas.itemconfigure(oval, state="normal")
         particle = {
-            "id": self.canvas.create_oval(self.gun_x, mid_y-3, self.gun_x+6, mid_y+3, fill="#00FF00", outline="", tags="particle"),
+            "id": oval,
             "x": self.gun_x,
             "y": mid_y,
             "state": "traveling_to_slit",
@@ -177,6 +265,12 @@ class QuantumSimulator:
         self.particles.append(particle)
 
     def animate(self):
+        self.step()
+        self.root.after(20, self.animate)
+
+    def step(self):
+        """ One frame: spawns, moves and lands particles, repaints the changed histogram rows. """
+        self.profiler.lap("tk")
         # Spawn new particle if firing
         if self.is_firing:
             # Fire rate limiter (spawn every few frames)
@@ -211,20 +305,27 @@ class QuantumSimulator:
 
                 # Check if hit screen
                 if p["x"] >= self.screen_x:
-                    # Add to hits
-                    self.hits.append(p["target_y"])
+                    # Add to hits (rows of the histogram image)
+                    self.record_hit(p["target_y"])
                     self.particles.remove(p)
-                    self.canvas.delete(p["id"])
-                    
-                    # Draw visual marker on screen
-                    # Use a translucent rectangle to build up intensity visually
-                    self.canvas.create_line(self.screen_x, p["target_y"]-2, self.screen_x+10, p["target_y"]+2, 
-                                          fill="#00FF00", width=1, tags="hit_marker")
-                    
-                    self.lbl_stats.config(text=f"Particles: {len(self.hits)}")
 
-        # Loop
-        self.root.after(20, self.animate)
+                    # Back to the pool
+                    self.canvas.itemconfigure(p["id"], state="hidden")
+                    self.free_ovals.append(p["id"])
+
+                    self.lbl_stats.config(text=f"Particles: {self.hit_total}")
+
+        self.profiler.lap("particles")
+
+        # Repaint only the histogram rows that changed this frame
+        self.flush_histogram()
+        self.profiler.lap("histogram")
+        self.profiler.end(len(self.particles))
+        if self.profiler.visible and self.profiler.frames % 10 == 0:
+            profile = self.profiler
+            lines = [f"FPS {profile.fps:.1f}", f"p95 {profile.percentile(95):.1f} ms"]
+            lines += [f"{name} {ms:.2f} ms" for name, ms in profile.breakdown().items()]
+            self.lbl_profile.config(text="\n".join(lines))
 
 # --- RUNNER ---
 if __name__ == "__main__":
@@ -1,7 +1,15 @@
 import pygame
-import random
-import math
 import numpy as np
+from slit_lab.convergence import ConvergenceTracker
+from slit_lab.hitlog import LOG_DIR, HitLog, archive, log_path, open_log
+from slit_lab.kernels import BLOCKED, LANDED, PASSED, advance, barrier_gaps_array, retarget
+from slit_lab.particles import ParticleStore, TO_SLIT
+from slit_lab.physics import barrier_gaps, intensity_at
+from slit_lab.profiling import FrameProfiler, trace_path
+from slit_lab.pyramid import HistogramPyramid, ZoomView
+from slit_lab.render import BarGraph, LayeredScreen, draw_particles, paired_rows
+from slit_lab.sampler import wave_sampler
+from slit_lab.timestep import FixedStep, Spawner
 
 # --- CONFIGURATION ---
 WIDTH, HEIGHT = 1200, 600
@@ -9,6 +17,9 @@ BG_COLOR = (10, 10, 20)      # Dark Navy
 LASER_COLOR = (50, 255, 100) # Bright Neon Green
 WALL_COLOR = (50, 50, 70)
 TEXT_COLOR = (200, 200, 200)
+# Particle colors, indexed by particle state (to slit / past the barrier)
+PARTICLE_COLORS = [LASER_COLOR, (200, 255, 200)]
+PARTICLE_RADII = [2, 2]
 
 # Physics Constants
 WAVELENGTH = 20
@@ -17,226 +28,341 @@ SLIT_WIDTH = 15      # Width of slit (Widened so it's easier to hit)
 SCREEN_X = 1050      # Where the detector screen is
 BARRIER_X = 300      # Where the slits are
 
-# --- INIT ---
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Double Slit Interactive Lab (Fixed)")
-font = pygame.font.SysFont("Arial", 20, bold=True)
-header_font = pygame.font.SysFont("Arial", 28, bold=True)
-
-# --- STATE ---
-particles = [] 
-hits = np.zeros(HEIGHT) 
-mode = "double" 
-is_firing = False
-total_particles = 0
-
-def get_wave_probability(y_pos_on_screen, mode):
-    """ Calculates probability of landing at y_pos based on wave interference """
-    y = y_pos_on_screen - (HEIGHT / 2)
-    L = SCREEN_X - BARRIER_X
-    if L == 0: return 0
-    theta = math.atan(y / L)
-    k = (2 * math.pi) / WAVELENGTH
-    
-    # 1. Diffraction (Envelope)
-    beta = (k * SLIT_WIDTH * math.sin(theta)) / 2
-    diffraction = 1.0 if beta == 0 else (math.sin(beta) / beta)**2
-        
-    if mode == "single":
-        return diffraction
-    
-    # 2. Interference (Fringes)
-    alpha = (k * SLIT_DISTANCE * math.sin(theta)) / 2
-    interference = math.cos(alpha)**2
-    
-    return diffraction * interference
-
-def spawn_particle():
-    """ 
-    FIXED: Fires particles in a CONE (spread) instead of a straight line.
-    This ensures particles actually hit the top and bottom slits.
+# Timing: physics runs in fixed steps, independent of the drawing rate
+PHYSICS_HZ = 60      # Steps per simulated second (velocities are in px per step)
+SPAWN_RATE = 300     # Photons per simulated second while firing
+RENDER_FPS = 60
+TURBO_SPEED = 10     # Press T: physics 10x faster than real time...
+TURBO_FPS = 30       # ...while drawing at 30 FPS
+
+# Zoomable graph: hits are also kept at 2**ZOOM_LEVELS bins over the screen
+ZOOM_LEVELS = 12
+ZOOM_STEP = 1.25     # Magnification per mouse wheel notch over the graph
+
+
+class SlitSimulator:
+    """
+    The whole lab as one object, so it can be stepped from outside the window
+    loop (see benchmarks/bench_simulators.py). run() is the interactive loop;
+    frame() handles one frame's events, physics and drawing.
     """
-    start_y = HEIGHT // 2
-    
-    # Random angle spread so the beam widens
-    # We want the beam to be roughly 150px wide by the time it hits the barrier (x=300)
-    # Gun is at x=50. Dist = 250.
-    # We need spread of +/- 75. 
-    # Slope ~ 75/250 = 0.3
-    vy = random.uniform(-3.5, 3.5) # Vertical velocity spread
-    
-    particles.append({
-        "x": 50,
-        "y": start_y,
-        "vx": 8,       # Horizontal speed
-        "vy": vy,      # Vertical speed (The Spread)
-        "state": "to_slit"
-    })
-
-def reset_simulation():
-    global hits, particles, total_particles
-    hits = np.zeros(HEIGHT)
-    particles = []
-    total_particles = 0
-
-# --- MAIN LOOP ---
-running = True
-clock = pygame.time.Clock()
-
-while running:
-    # 1. Event Handling
-    for event in pygame.event.get():
+
+    def __init__(self, screen=None, log_dir=LOG_DIR):
+        # --- INIT ---
+        pygame.init()
+        self.screen = screen or pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Double Slit Interactive Lab (Fixed)")
+        self.font = pygame.font.SysFont("Arial", 20, bold=True)
+        self.header_font = pygame.font.SysFont("Arial", 28, bold=True)
+        self.graph = BarGraph(WIDTH - SCREEN_X, HEIGHT)
+        self.log_dir = log_dir
+
+        # --- STATE ---
+        self.particles = ParticleStore() # Parallel numpy arrays (x, y, vx, vy, state, color)
+        self.hits = np.zeros(HEIGHT)
+        self.mode = "double"
+        self.is_firing = False
+        self.total_particles = 0
+        self.rng = np.random.default_rng()
+        self.tracker = None # ConvergenceTracker for the current mode, see make_tracker()
+        self.timestep = FixedStep(PHYSICS_HZ)
+        self.spawner = Spawner(SPAWN_RATE)
+        self.turbo = False
+        self.hit_log = None # HitLogWriter of the current mode's run, see reset_simulation()
+        self.pyramid = HistogramPyramid(0, HEIGHT, ZOOM_LEVELS) # Multi-resolution copy of the hits
+        self.view = ZoomView(0, HEIGHT, min_span=32 * self.pyramid.bin_width) # Rows shown by the graph
+        self.drag_y = None  # Mouse y while panning the graph
+        self.profiler = FrameProfiler(("events", "wait", "physics", "draw", "flip")) # F3 shows it
+        self.running = True
+
+        self.layers = LayeredScreen(self.screen, self.draw_scene, self.draw_ui)
+        self.reset_simulation()
+
+    def get_wave_probability(self, y_pos_on_screen, mode):
+        """ Calculates probability of landing at y_pos based on wave interference """
+        y = y_pos_on_screen - (HEIGHT / 2)
+        L = SCREEN_X - BARRIER_X
+        if L == 0: return 0
+        return intensity_at(y, mode, WAVELENGTH, SLIT_WIDTH, SLIT_DISTANCE, L)
+
+    def spawn_particles(self, count):
+        """
+        FIXED: Fires particles in a CONE (spread) instead of a straight line.
+        This ensures particles actually hit the top and bottom slits.
+        """
+        start_y = HEIGHT // 2
+
+        # Random angle spread so the beam widens
+        # We want the beam to be roughly 150px wide by the time it hits the barrier (x=300)
+        # Gun is at x=50. Dist = 250.
+        # We need spread of +/- 75.
+        # Slope ~ 75/250 = 0.3
+        vy = self.rng.uniform(-3.5, 3.5, count) # Vertical velocity spread
+
+        self.particles.spawn(count,
+            x=50,
+            y=start_y,
+            vx=8,        # Horizontal speed
+            vy=vy,       # Vertical speed (The Spread)
+            state=TO_SLIT,
+        )
+
+    def slit_gaps(self):
+        """ (low, high, snap) rows of the current barrier's openings in screen rows, for the step kernel. """
+        mid = HEIGHT // 2
+        return barrier_gaps_array([(mid + center - half_gap, mid + center + half_gap, mid + center)
+                                   for center, half_gap in barrier_gaps(self.mode, SLIT_WIDTH, SLIT_DISTANCE)])
+
+    def make_tracker(self):
+        """ Live fit of the hit rows against the wave pattern of the current barrier. """
+        sampler = wave_sampler(self.mode, WAVELENGTH, SLIT_WIDTH, SLIT_DISTANCE,
+                               SCREEN_X - BARRIER_X, -HEIGHT / 2, HEIGHT / 2)
+        return ConvergenceTracker(sampler.bin_probabilities(np.arange(HEIGHT + 1) - HEIGHT / 2))
+
+    def run_settings(self):
+        """ Stored with each hit log; a log written with other settings is not resumed. """
+        return {"mode": self.mode, "wavelength": WAVELENGTH, "slit_width": SLIT_WIDTH, "slit_distance": SLIT_DISTANCE,
+                "screen_dist": SCREEN_X - BARRIER_X, "height": HEIGHT}
+
+    def reset_simulation(self, clear=False):
+        """
+        Switches to the current mode's run, resumed from its hit log. With
+        `clear` the log is archived and the run starts empty.
+        """
+        if self.hit_log is not None: self.hit_log.close()
+        path = log_path("test2", self.mode, directory=self.log_dir)
+        if clear: archive(path)
+        self.hit_log = open_log(path, ("y",), self.run_settings())
+        self.particles.clear()
+        self.tracker = self.make_tracker()
+
+        # Rebuild the histograms from the logged hits
+        log = HitLog(path)
+        rows, _ = log.histogram("y", HEIGHT, (0, HEIGHT))
+        self.hits = rows.astype(float)
+        self.total_particles = int(rows.sum())
+        self.tracker.add_counts(rows)
+        self.pyramid.reset()
+        self.pyramid.add_counts(log.histogram("y", self.pyramid.bins, (0, HEIGHT))[0])
+
+    def set_modes(self, **modes):
+        """ Changes the barrier `mode` ('single', 'double', 'triple', 'grating') and switches to its run. """
+        for name, value in modes.items():
+            setattr(self, name, value)
+        self.reset_simulation()
+
+    # --- STATIC LAYERS ---
+    def draw_scene(self, surface):
+        """ Everything under the particles: background, gun, barrier, detector. """
+        surface.fill(BG_COLOR)
+
+        # Draw Beam Source (Gun)
+        pygame.draw.polygon(surface, (80, 80, 80), [(20, HEIGHT//2-10), (20, HEIGHT//2+10), (60, HEIGHT//2)])
+
+        # Draw Barrier
+        mid = HEIGHT // 2
+        pygame.draw.line(surface, WALL_COLOR, (BARRIER_X, 0), (BARRIER_X, HEIGHT), 8)
+
+        # Cut holes in the barrier (by drawing background color over it)
+        for center, half_gap in barrier_gaps(self.mode, SLIT_WIDTH, SLIT_DISTANCE):
+            pygame.draw.line(surface, BG_COLOR, (BARRIER_X, mid + center - half_gap), (BARRIER_X, mid + center + half_gap), 10)
+
+        # Draw Detector Screen
+        pygame.draw.line(surface, (100, 100, 100), (SCREEN_X, 0), (SCREEN_X, HEIGHT), 2)
+
+    def draw_ui(self, surface):
+        """ Everything on top of the particles: header and buttons. """
+        font, header_font, mode = self.font, self.header_font, self.mode
+        surface.blit(header_font.render(f"MODE: {mode.upper()}", True, (255, 255, 255)), (WIDTH//2 - 80, 20))
+
+        # Button Graphics
+        btn_s_col = (0, 150, 0) if mode == "single" else (50, 50, 50)
+        btn_d_col = (0, 150, 0) if mode == "double" else (50, 50, 50)
+
+        pygame.draw.rect(surface, btn_s_col, (50, 50, 120, 40), border_radius=5)
+        surface.blit(font.render("Single Slit", True, (255,255,255)), (60, 60))
+
+        pygame.draw.rect(surface, btn_d_col, (200, 50, 120, 40), border_radius=5)
+        surface.blit(font.render("Double Slit", True, (255,255,255)), (210, 60))
+
+        btn_t_col = (0, 150, 0) if mode == "triple" else (50, 50, 50)
+        btn_g_col = (0, 150, 0) if mode == "grating" else (50, 50, 50)
+
+        pygame.draw.rect(surface, btn_t_col, (50, 100, 120, 40), border_radius=5)
+        surface.blit(font.render("Triple Slit", True, (255,255,255)), (60, 110))
+
+        pygame.draw.rect(surface, btn_g_col, (200, 100, 120, 40), border_radius=5)
+        surface.blit(font.render("Grating", True, (255,255,255)), (210, 110))
+
+        # Controls
+        fire_col = (200, 50, 50) if self.is_firing else (0, 150, 100)
+        pygame.draw.rect(surface, fire_col, (50, 500, 150, 50), border_radius=10)
+        surface.blit(header_font.render("STOP" if self.is_firing else "FIRE", True, (255,255,255)), (90, 510))
+
+        pygame.draw.rect(surface, (80, 80, 80), (220, 500, 150, 50), border_radius=10)
+        surface.blit(header_font.render("CLEAR", True, (255,255,255)), (255, 510))
+
+    # --- PHYSICS STEP ---
+    def physics_step(self):
+        """ Advances the simulation by one fixed step (timestep.dt of simulated time). """
+        particles = self.particles
+        if self.is_firing:
+            # Fire MORE particles for a fuller beam look
+            self.spawn_particles(self.spawner.take(self.timestep.dt))
+
+        # All particles move at once and are tested against the barrier and the
+        # screen in one kernel pass (numba when installed, numpy otherwise)
+        x, y, vx, vy = particles.x, particles.y, particles.vx, particles.vy
+        events = advance(x, y, vx, vy, particles.state, 1.0, BARRIER_X, SCREEN_X, self.slit_gaps())
+
+        # A. Hit Barrier Logic: particles inside a gap were snapped to its center
+        # (VISUAL TRICK, makes the diffraction look clearer), the rest hit the wall
+        through = np.flatnonzero(events == PASSED)
+        if len(through):
+            # QUANTUM COLLAPSE: Pick random destinations based on wave math
+            sampler = wave_sampler(self.mode, WAVELENGTH, SLIT_WIDTH, SLIT_DISTANCE,
+                                   SCREEN_X - BARRIER_X, -HEIGHT / 2, HEIGHT / 2)
+            target_y = sampler.sample(len(through)) + HEIGHT / 2
+
+            # Recalculate velocity to hit that specific target
+            retarget(y, vx, vy, through, target_y, SCREEN_X - BARRIER_X)
+
+        # B. Hit Screen Logic
+        landed = events == LANDED
+        y_hit = y[landed]
+        y_hit = y_hit[(0 <= y_hit) & (y_hit < HEIGHT)]
+        y_idx = y_hit.astype(int)
+        np.add.at(self.hits, y_idx, 1)
+        self.pyramid.add(y_hit)
+        self.hit_log.append(y_hit)
+        self.total_particles += len(y_idx)
+        self.tracker.add(y_idx)
+
+        particles.remove(landed | (events == BLOCKED))
+
+    # --- EVENT HANDLING ---
+    def handle_event(self, event):
+        view = self.view
         if event.type == pygame.QUIT:
-            running = False
-        
+            self.running = False
+
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_t:
+            self.turbo = not self.turbo
+            self.timestep.speed = TURBO_SPEED if self.turbo else 1
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            self.profiler.toggle()
+
+        # Graph zoom: wheel zooms about the cursor, drag pans, Z resets
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_z:
+            view.reset()
+        if event.type == pygame.MOUSEWHEEL:
+            mx, my = pygame.mouse.get_pos()
+            if mx >= SCREEN_X: view.zoom(ZOOM_STEP ** event.y, about=view.at(my / HEIGHT))
+        if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self.drag_y = None
+        if event.type == pygame.MOUSEMOTION and self.drag_y is not None:
+            view.pan((self.drag_y - event.pos[1]) / HEIGHT * view.span)
+            self.drag_y = event.pos[1]
+
         if event.type == pygame.MOUSEBUTTONDOWN:
             mx, my = pygame.mouse.get_pos()
+            if event.button == 1 and mx >= SCREEN_X:
+                self.drag_y = my
             # Buttons
             if 50 < mx < 200 and 50 < my < 90:
-                mode = "single"
-                reset_simulation()
+                self.set_modes(mode="single")
             if 220 < mx < 370 and 50 < my < 90:
-                mode = "double"
-                reset_simulation()
+                self.set_modes(mode="double")
+            if 50 < mx < 170 and 100 < my < 140:
+                self.set_modes(mode="triple")
+            if 200 < mx < 320 and 100 < my < 140:
+                self.set_modes(mode="grating")
             if 50 < mx < 200 and 500 < my < 550:
-                is_firing = not is_firing
+                self.is_firing = not self.is_firing
             if 220 < mx < 370 and 500 < my < 550:
-                reset_simulation()
-
-    # 2. Physics Update
-    if is_firing:
-        # Fire MORE particles for a fuller beam look
-        for _ in range(5):
-            spawn_particle()
-            
-    for p in particles[:]:
-        p["x"] += p["vx"]
-        p["y"] += p["vy"]
-        
-        # A. Hit Barrier Logic
-        if p["state"] == "to_slit" and p["x"] >= BARRIER_X:
-            
-            # Where are the holes?
-            mid = HEIGHT // 2
-            passed = False
-            
-            # Define slit boundaries
-            if mode == "single":
-                # One hole in center
-                if (mid - SLIT_WIDTH) < p["y"] < (mid + SLIT_WIDTH):
-                    passed = True
-            else:
-                # Two holes (Top and Bottom)
-                top_slit_y = mid - (SLIT_DISTANCE // 2)
-                bot_slit_y = mid + (SLIT_DISTANCE // 2)
-                
-                # Check if particle hits Top Slit OR Bottom Slit
-                if (top_slit_y - SLIT_WIDTH) < p["y"] < (top_slit_y + SLIT_WIDTH):
-                    passed = True
-                elif (bot_slit_y - SLIT_WIDTH) < p["y"] < (bot_slit_y + SLIT_WIDTH):
-                    passed = True
-            
-            if passed:
-                p["state"] = "to_screen"
-                
-                # VISUAL TRICK: Snap particle to exact slit center for cleaner animation
-                # (Optional, but makes the diffraction look clearer)
-                if mode == "double":
-                     if p["y"] < mid: p["y"] = mid - (SLIT_DISTANCE // 2)
-                     else: p["y"] = mid + (SLIT_DISTANCE // 2)
-                else:
-                    p["y"] = mid
-
-                # QUANTUM COLLAPSE: Pick a random destination based on wave math
-                while True:
-                    rand_y = random.randint(0, HEIGHT-1)
-                    prob = get_wave_probability(rand_y, mode)
-                    if random.random() < prob:
-                        target_y = rand_y
-                        break
-                
-                # Recalculate velocity to hit that specific target
-                dx = SCREEN_X - BARRIER_X
-                dy = target_y - p["y"]
-                frames_needed = dx / p["vx"]
-                p["vy"] = dy / frames_needed
-                
-            else:
-                # Hit the solid wall
-                particles.remove(p)
-                
-        # B. Hit Screen Logic
-        elif p["state"] == "to_screen" and p["x"] >= SCREEN_X:
-            y_idx = int(p["y"])
-            if 0 <= y_idx < HEIGHT:
-                hits[y_idx] += 1
-                total_particles += 1
-            if p in particles:
-                particles.remove(p)
-
-    # 3. Drawing
-    screen.fill(BG_COLOR)
-
-    # Draw Beam Source (Gun)
-    pygame.draw.polygon(screen, (80, 80, 80), [(20, HEIGHT//2-10), (20, HEIGHT//2+10), (60, HEIGHT//2)])
-    
-    # Draw Barrier
-    mid = HEIGHT // 2
-    pygame.draw.line(screen, WALL_COLOR, (BARRIER_X, 0), (BARRIER_X, HEIGHT), 8)
-    
-    # Cut holes in the barrier (by drawing background color over it)
-    if mode == "single":
-        pygame.draw.line(screen, BG_COLOR, (BARRIER_X, mid - SLIT_WIDTH), (BARRIER_X, mid + SLIT_WIDTH), 10)
-    else:
-        top = mid - (SLIT_DISTANCE // 2)
-        bot = mid + (SLIT_DISTANCE // 2)
-        pygame.draw.line(screen, BG_COLOR, (BARRIER_X, top - SLIT_WIDTH), (BARRIER_X, top + SLIT_WIDTH), 10)
-        pygame.draw.line(screen, BG_COLOR, (BARRIER_X, bot - SLIT_WIDTH), (BARRIER_X, bot + SLIT_WIDTH), 10)
-
-    # Draw Particles
-    for p in particles:
+                self.reset_simulation(clear=True)
+
+    # --- DRAWING ---
+    def draw(self):
+        screen, layers, view = self.screen, self.layers, self.view
+        particles, font, graph = self.particles, self.font, self.graph
+        # The static scene and buttons come from cached layers (rebuilt on mode /
+        # fire changes); only what moved this frame is redrawn and pushed.
+        layers.begin((self.mode, self.is_firing))
+
+        # Draw Particles (written straight into the screen pixels in one batch)
         # If past barrier, make them brighter/white to show they are "interfering"
-        col = (200, 255, 200) if p["state"] == "to_screen" else LASER_COLOR
-        pygame.draw.circle(screen, col, (int(p["x"]), int(p["y"])), 2)
-
-    # Draw Detector Screen
-    pygame.draw.line(screen, (100, 100, 100), (SCREEN_X, 0), (SCREEN_X, HEIGHT), 2)
-    
-    # Draw Accumulation Graph (The Result)
-    max_val = np.max(hits)
-    if max_val == 0: max_val = 1
-    
-    for y in range(0, HEIGHT, 2):
-        if hits[y] > 0:
-            bar_len = (hits[y] / max_val) * 120
-            # Color gradient: Green -> White
-            green = min(255, 100 + hits[y]*5)
-            pygame.draw.line(screen, (0, green, 0), (SCREEN_X, y), (SCREEN_X + bar_len, y), 2)
-
-    # UI Overlay
-    screen.blit(header_font.render(f"MODE: {mode.upper()}", True, (255, 255, 255)), (WIDTH//2 - 80, 20))
-    screen.blit(font.render(f"Photons: {total_particles}", True, LASER_COLOR), (WIDTH//2 - 50, 60))
-
-    # Button Graphics
-    btn_s_col = (0, 150, 0) if mode == "single" else (50, 50, 50)
-    btn_d_col = (0, 150, 0) if mode == "double" else (50, 50, 50)
-    
-    pygame.draw.rect(screen, btn_s_col, (50, 50, 120, 40), border_radius=5)
-    screen.blit(font.render("Single Slit", True, (255,255,255)), (60, 60))
-    
-    pygame.draw.rect(screen, btn_d_col, (200, 50, 120, 40), border_radius=5)
-    screen.blit(font.render("Double Slit", True, (255,255,255)), (210, 60))
-
-    # Controls
-    fire_col = (200, 50, 50) if is_firing else (0, 150, 100)
-    pygame.draw.rect(screen, fire_col, (50, 500, 150, 50), border_radius=10)
-    screen.blit(header_font.render("STOP" if is_firing else "FIRE", True, (255,255,255)), (90, 510))
-    
-    pygame.draw.rect(screen, (80, 80, 80), (220, 500, 150, 50), border_radius=10)
-    screen.blit(header_font.render("CLEAR", True, (255,255,255)), (255, 510))
-
-    pygame.display.flip()
-    clock.tick(60)
-
-pygame.quit()
\ No newline at end of file
+        # Drawn between the last two physics steps (velocity is constant within a step)
+        back = self.timestep.alpha - 1
+        draw_x, draw_y = particles.x + particles.vx * back, particles.y + particles.vy * back
+        draw_particles(screen, draw_x, draw_y, particles.state, PARTICLE_COLORS, PARTICLE_RADII)
+        layers.mark_points(draw_x, draw_y, max(PARTICLE_RADII))
+
+        # Draw Accumulation Graph (The Result)
+        # Zoomed in, each pair of rows shows its slice of the view, binned from the pyramid
+        if view.zoomed:
+            shown = np.repeat(self.pyramid.window(view.lo, view.hi, HEIGHT // 2)[0], 2)
+        else:
+            shown = self.hits
+        max_val = np.max(shown)
+        if max_val == 0: max_val = 1
+
+        # One bar per pair of rows, rendered as a single array and blitted once
+        bar_len = np.where(shown > 0, (shown / max_val) * 120 + 1, 0)
+        # Color gradient: Green -> White
+        bar_col = np.zeros((HEIGHT, 3))
+        bar_col[:, 1] = np.minimum(255, 100 + shown*5)
+        graph.draw(screen, (SCREEN_X, 0), paired_rows(bar_len), paired_rows(bar_col))
+        layers.mark((SCREEN_X, 0, graph.width, graph.height))
+        if view.zoomed:
+            zoom = f"{view.magnification:.1f}x  rows {view.lo:.1f}-{view.hi:.1f}  (Z resets)"
+            layers.mark(screen.blit(font.render(zoom, True, TEXT_COLOR), (SCREEN_X - 330, HEIGHT - 30)))
+
+        # Photon counter
+        speed = f"   {TURBO_SPEED}x (T)" if self.turbo else ""
+        layers.mark(screen.blit(font.render(f"Photons: {self.total_particles}{speed}", True, LASER_COLOR), (WIDTH//2 - 50, 60)))
+
+        # Live fit against the theoretical pattern
+        tracker = self.tracker
+        if tracker.n:
+            fit = (f"chi2/dof {tracker.reduced_chi2:.2f}   KL {tracker.kl:.4f}   "
+                   f"visibility {tracker.visibility:.2f} (theory {tracker.theory_visibility:.2f})")
+            layers.mark(screen.blit(font.render(fit, True, TEXT_COLOR), (WIDTH//2 - 200, 90)))
+
+        # Frame profiler overlay (F3)
+        if self.profiler.visible:
+            layers.mark(self.profiler.draw(screen, font, (400, HEIGHT - 110)))
+
+    # --- FRAME ---
+    def frame(self, frame_seconds, events=()):
+        """ One frame: handles `events`, runs the physics steps `frame_seconds` of real time cover, draws. """
+        profiler = self.profiler
+        for event in events:
+            self.handle_event(event)
+        profiler.lap("events")
+        for _ in range(self.timestep.advance(frame_seconds)):
+            self.physics_step()
+        profiler.lap("physics")
+        self.draw()
+        profiler.lap("draw")
+        self.layers.finish()
+        profiler.lap("flip")
+        profiler.end(len(self.particles))
+
+    def run(self):
+        """ The interactive loop, until the window is closed. """
+        clock = pygame.time.Clock()
+        while self.running:
+            frame_seconds = clock.tick(TURBO_FPS if self.turbo else RENDER_FPS) / 1000
+            self.profiler.lap("wait")
+            self.frame(frame_seconds, pygame.event.get())
+        self.close()
+        self.profiler.dump(trace_path("test2"))
+        pygame.quit()
+
+    def close(self):
+        self.hit_log.close()
+
+
+if __name__ == "__main__":
+    SlitSimulator().run()
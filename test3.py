@@ -1,20 +1,35 @@
 import pygame
-import random
 import math
 import numpy as np
+from slit_lab.convergence import ConvergenceTracker
+from slit_lab.decoherence import fringe_visibility, mixture_table, partial_which_path
+from slit_lab.hitlog import LOG_DIR, HitLog, archive, log_path, open_log
+from slit_lab.kernels import BLOCKED, LANDED, PASSED, advance, barrier_gaps_array, retarget
+from slit_lab.particles import ParticleStore, TO_SLIT
+from slit_lab.physics import gaussian_piles, intensity_at
+from slit_lab.profiling import FrameProfiler, trace_path
+from slit_lab.pyramid import HistogramPyramid, ZoomView
+from slit_lab.render import BarGraph, LayeredScreen, draw_particles, paired_rows
+from slit_lab.sampler import gaussian_sampler, wave_sampler
+from slit_lab.timestep import FixedStep, Spawner
 
 # --- CONFIGURATION ---
 WIDTH, HEIGHT = 1200, 600
-BG_COLOR = (20, 20, 30)       
+BG_COLOR = (20, 20, 30)
 TEXT_COLOR = (200, 200, 200)
 
 # Colors
-TENNIS_COLOR = (220, 255, 0)  
-WAVE_COLOR = (0, 200, 255)    
-ELECTRON_COLOR = (100, 255, 100) 
-OBSERVER_COLOR = (255, 50, 50) 
+TENNIS_COLOR = (220, 255, 0)
+WAVE_COLOR = (0, 200, 255)
+ELECTRON_COLOR = (100, 255, 100)
+OBSERVER_COLOR = (255, 50, 50)
 GUN_COLOR = (100, 100, 100)
 
+# Particle palette, indexed by the store's color field
+PARTICLE_COLORS = [TENNIS_COLOR, ELECTRON_COLOR, OBSERVER_COLOR]
+PARTICLE_RADII = [5, 3, 3]
+TENNIS, ELECTRON, OBSERVED = 0, 1, 2
+
 # Physics Constants
 WAVELENGTH = 25
 SLIT_DISTANCE = 120   # Distance between top and bottom slits
@@ -22,290 +37,491 @@ SLIT_WIDTH = 15
 SCREEN_X = 1050
 BARRIER_X = 300       # Barrier position
 GUN_X = 50
+SPREAD_FACTOR = 2000 # Variance of the classical piles
+WHICH_PATH_SLIDER = (470, 125, 130, 10) # Distinguishability slider next to the Eye button
+
+# Timing: physics runs in fixed steps, independent of the drawing rate
+PHYSICS_HZ = 60       # Steps per simulated second (velocities are in px per step)
+SPAWN_RATES = {"classical": 120, "quantum": 600} # Particles per simulated second
+RENDER_FPS = 60
+TURBO_SPEED = 10      # Press T: physics 10x faster than real time...
+TURBO_FPS = 30        # ...while drawing at 30 FPS
+WAVE_EASING = 0.1     # Fraction of the remaining gap closed per step in wave mode
+WAVE_TOLERANCE = 0.5  # Brightness levels; closer than this counts as settled
+
+# Zoomable screen: hits are also kept at 2**ZOOM_LEVELS bins over the screen
+ZOOM_LEVELS = 12
+ZOOM_STEP = 1.25      # Magnification per mouse wheel notch over the screen
+
 
-# --- INIT ---
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Physics Minute: Ultimate Slit Simulator")
-font = pygame.font.SysFont("Arial", 16, bold=True)
-header_font = pygame.font.SysFont("Arial", 22, bold=True)
-big_font = pygame.font.SysFont("Arial", 28, bold=True)
-
-# --- STATE ---
-screen_intensity = np.zeros(HEIGHT)
-particles = []
-particle_mode = "quantum" # 'classical', 'wave', 'quantum'
-slit_mode = "double"      # 'single', 'double'
-observer_on = False
-is_firing = False
-
-def get_probability(y_pos):
+class SlitSimulator:
     """
-    Calculates impact probability based on Slit Mode + Particle Mode.
+    The whole simulator as one object, so it can be stepped from outside the
+    window loop (see benchmarks/bench_simulators.py). run() is the
+    interactive loop; frame() handles one frame's events, physics and drawing.
     """
-    y = y_pos - (HEIGHT / 2)
-    
-    # --- 1. CLASSICAL / OBSERVED QUANTUM (Gaussian Piles) ---
-    if particle_mode == "classical" or (particle_mode == "quantum" and observer_on):
-        spread_factor = 2000
-        if slit_mode == "single":
-            # One pile in center
-            return math.exp(-(y**2) / (2 * spread_factor))
-        else:
-            # Two piles (Top and Bottom)
-            top_y = -(SLIT_DISTANCE / 2)
-            bot_y = (SLIT_DISTANCE / 2)
-            prob_top = math.exp(-((y - top_y)**2) / (2 * spread_factor))
-            prob_bot = math.exp(-((y - bot_y)**2) / (2 * spread_factor))
-            return prob_top + prob_bot
-
-    # --- 2. WAVE / UN-OBSERVED QUANTUM (Interference Math) ---
-    else:
+
+    def __init__(self, screen=None, log_dir=LOG_DIR):
+        # --- INIT ---
+        pygame.init()
+        self.screen = screen or pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Physics Minute: Ultimate Slit Simulator")
+        self.font = pygame.font.SysFont("Arial", 16, bold=True)
+        self.header_font = pygame.font.SysFont("Arial", 22, bold=True)
+        self.big_font = pygame.font.SysFont("Arial", 28, bold=True)
+        self.graph = BarGraph(WIDTH - SCREEN_X, HEIGHT)
+        self.log_dir = log_dir
+
+        # --- STATE ---
+        self.screen_intensity = np.zeros(HEIGHT)
+        self.particles = ParticleStore() # Parallel numpy arrays (x, y, vx, vy, state, color)
+        self.particle_mode = "quantum" # 'classical', 'wave', 'quantum'
+        self.slit_mode = "double"      # 'single', 'double'
+        self.observer_on = False
+        self.which_path = 1.0          # Distinguishability D of the observer's measurement (0 = none, 1 = full)
+        self.dragging_which_path = False
+        self.slider_which_path = None  # Level under the slider knob while it is dragged (applied on release)
+        self.is_firing = False
+        self.rng = np.random.default_rng()
+        self.tracker = None # ConvergenceTracker for the current modes, see make_tracker()
+        self.timestep = FixedStep(PHYSICS_HZ)
+        self.spawner = Spawner()
+        self.turbo = False
+        self.wave_target = None    # Wave mode: target brightness per row, computed once per setup
+        self.wave_settled = False  # True once screen_intensity has reached wave_target
+        self.graph_stale = True    # screen_intensity changed since the graph was last rendered
+        self.hit_log = None        # HitLogWriter of the current setup's run (None in wave mode)
+        self.pyramid = HistogramPyramid(0, HEIGHT, ZOOM_LEVELS) # Multi-resolution copy of the hits
+        self.view = ZoomView(0, HEIGHT, min_span=32 * self.pyramid.bin_width) # Rows shown on the screen graph
+        self.drag_y = None         # Mouse y while panning the screen graph
+        self.profiler = FrameProfiler(("events", "wait", "physics", "draw", "flip")) # F3 shows it
+        self.running = True
+
+        self.layers = LayeredScreen(self.screen, self.draw_scene, self.draw_ui)
+        self.reset_simulation()
+
+    def slit_centers(self):
+        """ Offsets (from screen center) of the classical piles, one per slit. """
+        if self.slit_mode == "single":
+            return (0.0,)
+        return (-(SLIT_DISTANCE / 2), SLIT_DISTANCE / 2)
+
+    def slit_gaps(self):
+        """ Slit Geometry for the step kernel: one center hole or two holes, (low, high, snap) in screen rows. """
+        mid = HEIGHT // 2
+        return barrier_gaps_array([(mid + c - SLIT_WIDTH, mid + c + SLIT_WIDTH, mid + c) for c in self.slit_centers()])
+
+    def measuring(self):
+        """ True when the observer's which-path measurement shapes the pattern (double slit only). """
+        return self.particle_mode == "quantum" and self.observer_on and self.slit_mode == "double"
+
+    def which_path_table(self):
+        """ Precomputed blends of the current double slit, one per distinguishability level. """
+        return mixture_table(WAVELENGTH, SLIT_WIDTH, SLIT_DISTANCE, SCREEN_X - BARRIER_X, -HEIGHT / 2, HEIGHT / 2)
+
+    def get_probability(self, y_pos):
+        """
+        Calculates impact probability based on Slit Mode + Particle Mode.
+        Accepts a single y or a numpy array of y positions.
+        """
+        y = np.asarray(y_pos, dtype=np.float64) - (HEIGHT / 2)
+
+        # --- 1. CLASSICAL (Gaussian Piles) ---
+        if self.particle_mode == "classical":
+            return gaussian_piles(y, self.slit_centers(), math.sqrt(SPREAD_FACTOR))
+
         L = SCREEN_X - BARRIER_X
-        if L == 0: return 0
-        theta = math.atan(y / L)
-        k = (2 * math.pi) / WAVELENGTH
-        
-        # Diffraction (Single Slit Envelope)
-        beta = (k * SLIT_WIDTH * math.sin(theta)) / 2
-        diffraction = 1.0 if beta == 0 else (math.sin(beta) / beta)**2
-        
-        if slit_mode == "single":
-            return diffraction
+        if L == 0: return np.zeros_like(y)
+        # --- 2. OBSERVED QUANTUM (Interference Washed Out by the Measurement) ---
+        if self.measuring():
+            return partial_which_path(y, WAVELENGTH, SLIT_WIDTH, SLIT_DISTANCE, L, self.which_path)
+
+        # --- 3. WAVE / UN-OBSERVED QUANTUM (Interference Math) ---
+        return intensity_at(y, self.slit_mode, WAVELENGTH, SLIT_WIDTH, SLIT_DISTANCE, L)
+
+    def landing_sampler(self):
+        """
+        Inverse-CDF sampler matching get_probability() for the current modes.
+        Samplers are cached per setup, so this is a dict lookup after the first call.
+        """
+        half = HEIGHT / 2
+        if self.particle_mode == "classical":
+            return gaussian_sampler(self.slit_centers(), math.sqrt(SPREAD_FACTOR), -half, half)
+        if self.measuring():
+            return self.which_path_table().sampler(self.which_path)
+        return wave_sampler(self.slit_mode, WAVELENGTH, SLIT_WIDTH, SLIT_DISTANCE, SCREEN_X - BARRIER_X, -half, half)
+
+    def make_tracker(self):
+        """ Live fit of the hit rows against the expected pattern (None in wave mode: no hits). """
+        if self.particle_mode == "wave":
+            return None
+        edges = np.arange(HEIGHT + 1) - HEIGHT / 2
+        return ConvergenceTracker(self.landing_sampler().bin_probabilities(edges))
+
+    def spawn_particles(self, count):
+        # Visual Source Logic
+        start_y = HEIGHT // 2
+
+        # 1. Classical (Tennis Ball Cannon - Messy)
+        if self.particle_mode == "classical":
+            vy = self.rng.uniform(-6, 6, count)
+            col = TENNIS
+
+        # 2. Quantum (Electron Gun - Precise)
+        elif self.particle_mode == "quantum":
+            vy = self.rng.uniform(-4, 4, count)
+            col = ELECTRON
+
+        self.particles.spawn(count,
+            x=GUN_X + 40, y=start_y, # Start at tip of gun
+            vx=10, vy=vy,
+            state=TO_SLIT,
+            color=col,
+        )
+
+    def hit_brightness(self, rows):
+        """ Added screen brightness for `rows` hits per row; each also lights its neighbours at half strength. """
+        val = 80 if self.particle_mode == "classical" else 30
+        added = rows * float(val)
+        added[:-1] += rows[1:] * (val / 2)
+        added[1:] += rows[:-1] * (val / 2)
+        return added
+
+    def run_settings(self):
+        """ Stored with each hit log; a log written with other settings is not resumed. """
+        return {"particle_mode": self.particle_mode, "slit_mode": self.slit_mode, "observer": self.observer_on,
+                "which_path": self.which_path if self.observer_on else 0.0,
+                "wavelength": WAVELENGTH, "slit_width": SLIT_WIDTH, "slit_distance": SLIT_DISTANCE,
+                "screen_dist": SCREEN_X - BARRIER_X, "spread_factor": SPREAD_FACTOR, "height": HEIGHT}
+
+    def reset_simulation(self, clear=False):
+        """
+        Switches to the current setup's run, resumed from its hit log. With
+        `clear` the log is archived and the run starts empty.
+        """
+        self.screen_intensity = np.zeros(HEIGHT)
+        self.particles.clear()
+        self.tracker = self.make_tracker()
+        if self.hit_log is not None: self.hit_log.close()
+        self.hit_log = None
+        self.pyramid.reset()
+        if self.particle_mode != "wave":
+            observed = f"which-path-{self.which_path:.2f}" if self.observer_on else "unobserved"
+            path = log_path("test3", self.particle_mode, self.slit_mode, observed, directory=self.log_dir)
+            if clear: archive(path)
+            self.hit_log = open_log(path, ("y",), self.run_settings())
+            # Rebuild the screen from the logged hits (brightness only saturates, so order does not matter)
+            log = HitLog(path)
+            rows, _ = log.histogram("y", HEIGHT, (0, HEIGHT))
+            self.screen_intensity = np.minimum(255, self.hit_brightness(rows))
+            self.tracker.add_counts(rows)
+            self.pyramid.add_counts(log.histogram("y", self.pyramid.bins, (0, HEIGHT))[0])
+        # The wave pattern only depends on the setup, so it is evaluated once here
+        self.wave_target = self.get_probability(np.arange(HEIGHT)) * 255 if self.particle_mode == "wave" else None
+        self.wave_settled = False
+        self.graph_stale = True
+
+    # --- STATIC LAYERS ---
+    def draw_scene(self, surface):
+        """ Everything under the particles: source, beam fan, barrier, observer, detector. """
+        surface.fill(BG_COLOR)
+
+        # --- DRAW SOURCE (THE GUN) ---
+        mid = HEIGHT // 2
+        if self.particle_mode == "classical":
+            # Tennis Cannon
+            pygame.draw.circle(surface, (50, 50, 50), (GUN_X, mid + 10), 15) # Wheel
+            pygame.draw.rect(surface, (80, 80, 80), (GUN_X-10, mid-15, 60, 30)) # Barrel
+            pygame.draw.rect(surface, (40, 40, 40), (GUN_X+40, mid-18, 10, 36)) # Muzzle
+
+        elif self.particle_mode == "wave":
+            # Laser Pointer
+            pygame.draw.rect(surface, (30, 30, 30), (GUN_X, mid-10, 50, 20))
+            pygame.draw.line(surface, WAVE_COLOR, (GUN_X+50, mid), (GUN_X+55, mid), 3) # Emitter
+            # Draw Beam Fan
+            if self.is_firing:
+                s = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+                pygame.draw.polygon(s, (0, 200, 255, 30), [(GUN_X+50, mid), (BARRIER_X, mid-60), (BARRIER_X, mid+60)])
+                # Fan after slits
+                if self.slit_mode == "single":
+                     pygame.draw.polygon(s, (0, 200, 255, 20), [(BARRIER_X, mid-SLIT_WIDTH), (BARRIER_X, mid+SLIT_WIDTH), (SCREEN_X, HEIGHT), (SCREEN_X, 0)])
+                else:
+                     top, bot = mid - (SLIT_DISTANCE//2), mid + (SLIT_DISTANCE//2)
+                     pygame.draw.polygon(s, (0, 200, 255, 15), [(BARRIER_X, top), (BARRIER_X, top), (SCREEN_X, HEIGHT), (SCREEN_X, 0)])
+                     pygame.draw.polygon(s, (0, 200, 255, 15), [(BARRIER_X, bot), (BARRIER_X, bot), (SCREEN_X, HEIGHT), (SCREEN_X, 0)])
+                surface.blit(s, (0,0))
+
+        elif self.particle_mode == "quantum":
+            # Electron Gun (Sci-Fi)
+            pygame.draw.polygon(surface, (60, 60, 70), [(GUN_X, mid-20), (GUN_X, mid+20), (GUN_X+50, mid)])
+            pygame.draw.circle(surface, ELECTRON_COLOR, (GUN_X+20, mid), 5) # Core
+
+        # --- DRAW BARRIER ---
+        pygame.draw.line(surface, (70, 70, 80), (BARRIER_X, 0), (BARRIER_X, HEIGHT), 8)
+        if self.slit_mode == "single":
+            pygame.draw.line(surface, BG_COLOR, (BARRIER_X, mid - SLIT_WIDTH), (BARRIER_X, mid + SLIT_WIDTH), 10)
         else:
-            # Interference (Double Slit Stripes)
-            alpha = (k * SLIT_DISTANCE * math.sin(theta)) / 2
-            interference = math.cos(alpha)**2
-            return diffraction * interference
-
-def spawn_particle():
-    # Visual Source Logic
-    start_y = HEIGHT // 2
-    
-    # 1. Classical (Tennis Ball Cannon - Messy)
-    if particle_mode == "classical":
-        vy = random.uniform(-6, 6)
-        col, rad = TENNIS_COLOR, 5
-        
-    # 2. Quantum (Electron Gun - Precise)
-    elif particle_mode == "quantum":
-        vy = random.uniform(-4, 4)
-        col, rad = ELECTRON_COLOR, 3
-        
-    particles.append({
-        "x": GUN_X + 40, "y": start_y, # Start at tip of gun
-        "vx": 10, "vy": vy,
-        "state": "to_slit",
-        "color": col, "radius": rad
-    })
-
-def reset_simulation():
-    global screen_intensity, particles
-    screen_intensity = np.zeros(HEIGHT)
-    particles = []
-
-# --- MAIN LOOP ---
-running = True
-clock = pygame.time.Clock()
-
-while running:
-    # 1. EVENT HANDLING
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT: running = False
-        
+            top, bot = mid - (SLIT_DISTANCE//2), mid + (SLIT_DISTANCE//2)
+            pygame.draw.line(surface, BG_COLOR, (BARRIER_X, top - SLIT_WIDTH), (BARRIER_X, top + SLIT_WIDTH), 10)
+            pygame.draw.line(surface, BG_COLOR, (BARRIER_X, bot - SLIT_WIDTH), (BARRIER_X, bot + SLIT_WIDTH), 10)
+
+        # Observer Eye
+        if self.particle_mode == "quantum" and self.observer_on:
+            eye_y = mid - 100
+            pygame.draw.ellipse(surface, OBSERVER_COLOR, (BARRIER_X+20, eye_y, 40, 20), 2)
+            pygame.draw.circle(surface, OBSERVER_COLOR, (BARRIER_X+40, eye_y+10), 5)
+            surface.blit(self.font.render("OBSERVING", True, OBSERVER_COLOR), (BARRIER_X+10, eye_y-20))
+
+        # --- DRAW SCREEN ---
+        pygame.draw.line(surface, (150, 150, 150), (SCREEN_X, 0), (SCREEN_X, HEIGHT), 2)
+
+    def draw_ui(self, surface):
+        """ Buttons, drawn on top of the particles. """
+        def draw_btn(rect, text, active):
+            bg = (80, 80, 100) if active else (40, 40, 50)
+            border = (255, 255, 255) if active else (100, 100, 100)
+            pygame.draw.rect(surface, bg, rect, border_radius=5)
+            pygame.draw.rect(surface, border, rect, 2, border_radius=5)
+            surface.blit(self.font.render(text, True, (255,255,255)), (rect[0]+10, rect[1]+10))
+
+        # Row 1: Source
+        draw_btn((30, 50, 130, 40), "Tennis Cannon", self.particle_mode=="classical")
+        draw_btn((170, 50, 130, 40), "Laser Beam", self.particle_mode=="wave")
+        draw_btn((310, 50, 130, 40), "Electron Gun", self.particle_mode=="quantum")
+
+        # Row 2: Slits
+        draw_btn((30, 110, 130, 40), "Single Slit", self.slit_mode=="single")
+        draw_btn((170, 110, 130, 40), "Double Slit", self.slit_mode=="double")
+
+        # Observer, with how well it tells the slits apart
+        if self.particle_mode == "quantum":
+            draw_btn((310, 110, 130, 40), "Eye: " + ("ON" if self.observer_on else "OFF"), self.observer_on)
+            if self.observer_on:
+                x, y, w, h = WHICH_PATH_SLIDER
+                dragged = self.slider_which_path is not None
+                which_path = self.slider_which_path if dragged else self.which_path
+                pygame.draw.rect(surface, (60, 60, 70), WHICH_PATH_SLIDER, border_radius=5)
+                pygame.draw.rect(surface, OBSERVER_COLOR, (x, y, int(w * which_path), h), border_radius=5)
+                pygame.draw.circle(surface, (255, 255, 255), (x + int(w * which_path), y + h // 2), 8)
+                label = f"which-path {which_path:.2f}  fringes {fringe_visibility(which_path):.2f}"
+                if dragged: label += "  (release to apply)"
+                surface.blit(self.font.render(label, True, TEXT_COLOR), (x, y + 16))
+
+        # Fire
+        fire_col = (200, 50, 50) if self.is_firing else (0, 150, 100)
+        pygame.draw.rect(surface, fire_col, (50, 500, 150, 50), border_radius=10)
+        surface.blit(self.big_font.render("STOP" if self.is_firing else "FIRE", True, (255,255,255)), (90, 510))
+        pygame.draw.rect(surface, (80, 80, 80), (220, 500, 150, 50), border_radius=10)
+        surface.blit(self.big_font.render("CLEAR", True, (255,255,255)), (255, 510))
+
+    # --- PHYSICS STEP ---
+    def physics_step(self):
+        """ Advances the simulation by one fixed step (timestep.dt of simulated time). """
+        particles = self.particles
+        # Spawn Particles
+        if self.is_firing and self.particle_mode != "wave":
+            self.spawner.rate = SPAWN_RATES[self.particle_mode]
+            self.spawn_particles(self.spawner.take(self.timestep.dt))
+
+        # Move Particles and test them against the barrier and the screen in one
+        # kernel pass over the particle arrays (numba when installed, numpy otherwise)
+        y, vx, vy = particles.y, particles.vx, particles.vy
+        events = advance(particles.x, y, vx, vy, particles.state, 1.0, BARRIER_X, SCREEN_X, self.slit_gaps())
+
+        # A. Hit Barrier: particles inside a hole were snapped to its center, the rest hit the wall
+        through = np.flatnonzero(events == PASSED)
+        if len(through):
+            # Check for Observer Effect: measured particles are marked; how much
+            # interference survives depends on the measurement's distinguishability
+            if self.particle_mode == "quantum" and self.observer_on:
+                particles.color[through] = OBSERVED
+            # Classical samples the Gaussian piles, Quantum the (partially washed out) interference
+            target_y = self.landing_sampler().sample(len(through)) + HEIGHT / 2
+            retarget(y, vx, vy, through, target_y, SCREEN_X - BARRIER_X)
+
+        # B. Hit Screen
+        landed = events == LANDED
+        if landed.any():
+            y_hit = np.clip(y[landed], 0, HEIGHT-1)
+            y_idx = y_hit.astype(int)
+            added = self.hit_brightness(np.bincount(y_idx, minlength=HEIGHT))
+            self.screen_intensity = np.minimum(255, self.screen_intensity + added)
+            if self.tracker is not None: self.tracker.add(y_idx)
+            if self.hit_log is not None: self.hit_log.append(y_hit)
+            self.pyramid.add(y_hit)
+            self.graph_stale = True
+
+        particles.remove(landed | (events == BLOCKED))
+
+        # Wave Mode Logic: ease every row toward the precomputed pattern at once,
+        # and stop touching it once it has settled
+        if self.particle_mode == "wave" and self.is_firing and not self.wave_settled:
+            self.screen_intensity += (self.wave_target - self.screen_intensity) * WAVE_EASING
+            if np.abs(self.wave_target - self.screen_intensity).max() < WAVE_TOLERANCE:
+                self.screen_intensity = self.wave_target.copy()
+                self.wave_settled = True
+            self.graph_stale = True
+
+    # --- EVENT HANDLING ---
+    def handle_event(self, event):
+        view = self.view
+        if event.type == pygame.QUIT: self.running = False
+
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_t:
+            self.turbo = not self.turbo
+            self.timestep.speed = TURBO_SPEED if self.turbo else 1
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            self.profiler.toggle()
+
+        # Screen zoom: wheel zooms about the cursor, drag pans, Z resets
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_z:
+            view.reset(); self.graph_stale = True
+        if event.type == pygame.MOUSEWHEEL:
+            mx, my = pygame.mouse.get_pos()
+            if mx >= SCREEN_X:
+                view.zoom(ZOOM_STEP ** event.y, about=view.at(my / HEIGHT)); self.graph_stale = True
+        if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self.drag_y = None
+            # Releasing the slider on another level switches to that level's run
+            level, self.slider_which_path = self.slider_which_path, None
+            if self.dragging_which_path and level is not None and level != self.which_path:
+                self.set_modes(which_path=level)
+            self.dragging_which_path = False
+        if event.type == pygame.MOUSEMOTION and self.drag_y is not None:
+            view.pan((self.drag_y - event.pos[1]) / HEIGHT * view.span); self.graph_stale = True
+            self.drag_y = event.pos[1]
+
         if event.type == pygame.MOUSEBUTTONDOWN:
             mx, my = pygame.mouse.get_pos()
-            
+            if event.button == 1 and mx >= SCREEN_X:
+                self.drag_y = my
+            if event.button == 1 and self.particle_mode == "quantum" and self.observer_on:
+                if pygame.Rect(WHICH_PATH_SLIDER).inflate(16, 16).collidepoint(mx, my):
+                    self.dragging_which_path = True
+
             # MODE BUTTONS (Top Row)
             if 30 < mx < 160 and 50 < my < 90:
-                particle_mode = "classical"; observer_on = False; reset_simulation()
+                self.set_modes(particle_mode="classical", observer_on=False)
             if 170 < mx < 300 and 50 < my < 90:
-                particle_mode = "wave"; observer_on = False; reset_simulation()
+                self.set_modes(particle_mode="wave", observer_on=False)
             if 310 < mx < 440 and 50 < my < 90:
-                particle_mode = "quantum"; reset_simulation()
-            
+                self.set_modes(particle_mode="quantum")
+
             # SLIT BUTTONS (Second Row)
             if 30 < mx < 160 and 110 < my < 150:
-                slit_mode = "single"; reset_simulation()
+                self.set_modes(slit_mode="single")
             if 170 < mx < 300 and 110 < my < 150:
-                slit_mode = "double"; reset_simulation()
+                self.set_modes(slit_mode="double")
 
             # OBSERVER (Only Quantum)
-            if particle_mode == "quantum" and 310 < mx < 440 and 110 < my < 150:
-                observer_on = not observer_on; reset_simulation()
+            if self.particle_mode == "quantum" and 310 < mx < 440 and 110 < my < 150:
+                self.set_modes(observer_on=not self.observer_on)
 
             # FIRE CONTROLS (Bottom)
-            if 50 < mx < 200 and 500 < my < 550: is_firing = not is_firing
-            if 220 < mx < 370 and 500 < my < 550: reset_simulation()
-
-    # 2. PHYSICS ENGINE
-    
-    # Spawn Particles
-    if is_firing and particle_mode != "wave":
-        rate = 2 if particle_mode == "classical" else 10
-        for _ in range(rate): spawn_particle()
-
-    # Move Particles
-    for p in particles[:]:
-        p["x"] += p["vx"]
-        p["y"] += p["vy"]
-        
-        # A. Hit Barrier
-        if p["state"] == "to_slit" and p["x"] >= BARRIER_X:
-            mid = HEIGHT // 2
-            passed = False
-            
-            # Define Slit Geometry
-            if slit_mode == "single":
-                # One center hole
-                if (mid - SLIT_WIDTH) < p["y"] < (mid + SLIT_WIDTH): 
-                    passed = True; p["y"] = mid # Snap to center
-            else:
-                # Two holes
-                top = mid - (SLIT_DISTANCE // 2)
-                bot = mid + (SLIT_DISTANCE // 2)
-                if (top - SLIT_WIDTH) < p["y"] < (top + SLIT_WIDTH): 
-                    passed = True; p["y"] = top
-                elif (bot - SLIT_WIDTH) < p["y"] < (bot + SLIT_WIDTH): 
-                    passed = True; p["y"] = bot
-            
-            if passed:
-                p["state"] = "to_screen"
-                
-                # Check for Observer Effect
-                if particle_mode == "quantum" and observer_on:
-                    # Measured! Behave classically (random spread)
-                    p["color"] = OBSERVER_COLOR
-                    # Simple angle spread logic
-                    dx = SCREEN_X - BARRIER_X
-                    spread = random.gauss(0, 20)
-                    target_y = p["y"] + spread * 5
-                    p["vy"] = (target_y - p["y"]) / (dx / p["vx"])
-                
+            if 50 < mx < 200 and 500 < my < 550: self.is_firing = not self.is_firing
+            if 220 < mx < 370 and 500 < my < 550: self.reset_simulation(clear=True)
+
+        # WHICH-PATH SLIDER: snapped to the precomputed levels. Dragging only moves the
+        # knob; on release the sampler, hit log and tracker switch to the new level
+        # together (the sampler is a table lookup, so the switch is instant).
+        if event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION) and self.dragging_which_path:
+            x, _, w, _ = WHICH_PATH_SLIDER
+            self.slider_which_path = self.which_path_table().snap((event.pos[0] - x) / w)
+
+    def set_modes(self, **modes):
+        """ Changes any of particle_mode, slit_mode, observer_on, which_path and switches to that setup's run. """
+        for name, value in modes.items():
+            setattr(self, name, value)
+        self.reset_simulation()
+
+    # --- DRAWING ---
+    def draw(self):
+        screen, layers, view = self.screen, self.layers, self.view
+        particles, font = self.particles, self.font
+        # Source, barrier, beam fan and buttons come from cached layers (rebuilt
+        # when a setting changes); only what moved this frame is redrawn and pushed.
+        layers.begin((self.particle_mode, self.slit_mode, self.observer_on, self.which_path,
+                      self.slider_which_path, self.is_firing))
+
+        # --- DRAW PARTICLES ---
+        if self.particle_mode != "wave":
+            # Drawn between the last two physics steps (velocity is constant within a step)
+            back = self.timestep.alpha - 1
+            draw_x, draw_y = particles.x + particles.vx * back, particles.y + particles.vy * back
+            draw_particles(screen, draw_x, draw_y, particles.color, PARTICLE_COLORS, PARTICLE_RADII)
+            layers.mark_points(draw_x, draw_y, max(PARTICLE_RADII))
+
+        # --- DRAW SCREEN (RESULT) ---
+        # One 100 px band per pair of rows, rendered as a single array only when
+        # the intensities changed; otherwise the last render is blitted again
+        if self.graph_stale:
+            bright = self.screen_intensity
+            if view.zoomed:
+                # Each pair of rows shows its slice of the view: hits binned from the
+                # pyramid, or the exact pattern for the wave, both scaled to the view
+                if self.particle_mode == "wave":
+                    centers = view.at((np.arange(HEIGHT // 2) + 0.5) / (HEIGHT // 2))
+                    progress = self.screen_intensity.sum() / max(self.wave_target.sum(), 1e-9)
+                    bright = np.repeat(np.minimum(255, self.get_probability(centers) * 255 * progress), 2)
                 else:
-                    # Not Measured (or Classical) -> Use Probability Function
-                    # Classical uses the 'get_probability' which returns Gaussian
-                    # Quantum uses 'get_probability' which returns Wave Interference
-                    while True:
-                        ry = random.randint(0, HEIGHT-1)
-                        if random.random() < get_probability(ry):
-                            target_y = ry
-                            break
-                    dx = SCREEN_X - BARRIER_X
-                    p["vy"] = (target_y - p["y"]) / (dx / p["vx"])
-            else:
-                particles.remove(p) # Hit wall
+                    counts = self.pyramid.window(view.lo, view.hi, HEIGHT // 2)[0]
+                    bright = np.repeat(counts / max(counts.max(), 1e-9) * 255, 2)
+            band_len = np.where(bright > 5, 101, 0)
+            band_col = np.zeros((HEIGHT, 3))
+            if self.particle_mode == "classical": band_col[:, 0] = band_col[:, 1] = bright
+            elif self.particle_mode == "wave": band_col[:, 1] = band_col[:, 2] = bright
+            else: band_col[:, 1] = bright # Green for electron
+            self.graph.render(paired_rows(band_len), paired_rows(band_col))
+            self.graph_stale = False
+        screen.blit(self.graph.surface, (SCREEN_X, 0))
+        layers.mark((SCREEN_X, 0, self.graph.width, self.graph.height))
 
-        # B. Hit Screen
-        elif p["state"] == "to_screen" and p["x"] >= SCREEN_X:
-            y_idx = int(np.clip(p["y"], 0, HEIGHT-1))
-            val = 80 if particle_mode == "classical" else 30
-            screen_intensity[y_idx] = min(255, screen_intensity[y_idx] + val)
-            if y_idx > 0: screen_intensity[y_idx-1] = min(255, screen_intensity[y_idx-1] + val/2)
-            if y_idx < HEIGHT-1: screen_intensity[y_idx+1] = min(255, screen_intensity[y_idx+1] + val/2)
-            if p in particles: particles.remove(p)
-
-    # Wave Mode Logic (Instant Math)
-    if particle_mode == "wave" and is_firing:
-        for y in range(HEIGHT):
-            intensity = get_probability(y)
-            target = intensity * 255
-            current = screen_intensity[y]
-            screen_intensity[y] = current + (target - current) * 0.1
-
-    # 3. DRAWING
-    screen.fill(BG_COLOR)
-
-    # --- DRAW SOURCE (THE GUN) ---
-    mid = HEIGHT // 2
-    if particle_mode == "classical":
-        # Tennis Cannon
-        pygame.draw.circle(screen, (50, 50, 50), (GUN_X, mid + 10), 15) # Wheel
-        pygame.draw.rect(screen, (80, 80, 80), (GUN_X-10, mid-15, 60, 30)) # Barrel
-        pygame.draw.rect(screen, (40, 40, 40), (GUN_X+40, mid-18, 10, 36)) # Muzzle
-    
-    elif particle_mode == "wave":
-        # Laser Pointer
-        pygame.draw.rect(screen, (30, 30, 30), (GUN_X, mid-10, 50, 20)) 
-        pygame.draw.line(screen, WAVE_COLOR, (GUN_X+50, mid), (GUN_X+55, mid), 3) # Emitter
-        # Draw Beam Fan
-        if is_firing:
-            s = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            pygame.draw.polygon(s, (0, 200, 255, 30), [(GUN_X+50, mid), (BARRIER_X, mid-60), (BARRIER_X, mid+60)])
-            # Fan after slits
-            if slit_mode == "single":
-                 pygame.draw.polygon(s, (0, 200, 255, 20), [(BARRIER_X, mid-SLIT_WIDTH), (BARRIER_X, mid+SLIT_WIDTH), (SCREEN_X, HEIGHT), (SCREEN_X, 0)])
-            else:
-                 top, bot = mid - (SLIT_DISTANCE//2), mid + (SLIT_DISTANCE//2)
-                 pygame.draw.polygon(s, (0, 200, 255, 15), [(BARRIER_X, top), (BARRIER_X, top), (SCREEN_X, HEIGHT), (SCREEN_X, 0)])
-                 pygame.draw.polygon(s, (0, 200, 255, 15), [(BARRIER_X, bot), (BARRIER_X, bot), (SCREEN_X, HEIGHT), (SCREEN_X, 0)])
-            screen.blit(s, (0,0))
-
-    elif particle_mode == "quantum":
-        # Electron Gun (Sci-Fi)
-        pygame.draw.polygon(screen, (60, 60, 70), [(GUN_X, mid-20), (GUN_X, mid+20), (GUN_X+50, mid)])
-        pygame.draw.circle(screen, ELECTRON_COLOR, (GUN_X+20, mid), 5) # Core
-
-    # --- DRAW BARRIER ---
-    pygame.draw.line(screen, (70, 70, 80), (BARRIER_X, 0), (BARRIER_X, HEIGHT), 8)
-    if slit_mode == "single":
-        pygame.draw.line(screen, BG_COLOR, (BARRIER_X, mid - SLIT_WIDTH), (BARRIER_X, mid + SLIT_WIDTH), 10)
-    else:
-        top, bot = mid - (SLIT_DISTANCE//2), mid + (SLIT_DISTANCE//2)
-        pygame.draw.line(screen, BG_COLOR, (BARRIER_X, top - SLIT_WIDTH), (BARRIER_X, top + SLIT_WIDTH), 10)
-        pygame.draw.line(screen, BG_COLOR, (BARRIER_X, bot - SLIT_WIDTH), (BARRIER_X, bot + SLIT_WIDTH), 10)
-
-    # Observer Eye
-    if particle_mode == "quantum" and observer_on:
-        eye_y = mid - 100
-        pygame.draw.ellipse(screen, OBSERVER_COLOR, (BARRIER_X+20, eye_y, 40, 20), 2)
-        pygame.draw.circle(screen, OBSERVER_COLOR, (BARRIER_X+40, eye_y+10), 5)
-        screen.blit(font.render("OBSERVING", True, OBSERVER_COLOR), (BARRIER_X+10, eye_y-20))
-
-    # --- DRAW PARTICLES ---
-    if particle_mode != "wave":
-        for p in particles:
-            pygame.draw.circle(screen, p["color"], (int(p["x"]), int(p["y"])), p["radius"])
-
-    # --- DRAW SCREEN (RESULT) ---
-    pygame.draw.line(screen, (150, 150, 150), (SCREEN_X, 0), (SCREEN_X, HEIGHT), 2)
-    for y in range(0, HEIGHT, 2):
-        bright = screen_intensity[y]
-        if bright > 5:
-            if particle_mode == "classical": col = (bright, bright, 0)
-            elif particle_mode == "wave": col = (0, bright, bright)
-            else: col = (0, bright, 0) # Green for electron
-            pygame.draw.line(screen, col, (SCREEN_X, y), (SCREEN_X + 100, y), 2)
-
-    # --- UI ---
-    def draw_btn(rect, text, active):
-        bg = (80, 80, 100) if active else (40, 40, 50)
-        border = (255, 255, 255) if active else (100, 100, 100)
-        pygame.draw.rect(screen, bg, rect, border_radius=5)
-        pygame.draw.rect(screen, border, rect, 2, border_radius=5)
-        screen.blit(font.render(text, True, (255,255,255)), (rect[0]+10, rect[1]+10))
-
-    # Row 1: Source
-    draw_btn((30, 50, 130, 40), "Tennis Cannon", particle_mode=="classical")
-    draw_btn((170, 50, 130, 40), "Laser Beam", particle_mode=="wave")
-    draw_btn((310, 50, 130, 40), "Electron Gun", particle_mode=="quantum")
-    
-    # Row 2: Slits
-    draw_btn((30, 110, 130, 40), "Single Slit", slit_mode=="single")
-    draw_btn((170, 110, 130, 40), "Double Slit", slit_mode=="double")
-    
-    # Observer
-    if particle_mode == "quantum":
-        draw_btn((310, 110, 130, 40), "Eye: " + ("ON" if observer_on else "OFF"), observer_on)
-
-    # Fire
-    fire_col = (200, 50, 50) if is_firing else (0, 150, 100)
-    pygame.draw.rect(screen, fire_col, (50, 500, 150, 50), border_radius=10)
-    screen.blit(big_font.render("STOP" if is_firing else "FIRE", True, (255,255,255)), (90, 510))
-    pygame.draw.rect(screen, (80, 80, 80), (220, 500, 150, 50), border_radius=10)
-    screen.blit(big_font.render("CLEAR", True, (255,255,255)), (255, 510))
-
-    pygame.display.flip()
-    clock.tick(60)
-
-pygame.quit()
\ No newline at end of file
+        # Live fit against the theoretical pattern
+        tracker = self.tracker
+        if self.turbo:
+            layers.mark(screen.blit(font.render(f"{TURBO_SPEED}x speed (T)", True, TEXT_COLOR), (470, 40)))
+        if tracker is not None and tracker.n:
+            fit = (f"hits {tracker.n}   chi2/dof {tracker.reduced_chi2:.2f}   KL {tracker.kl:.4f}   "
+                   f"visibility {tracker.visibility:.2f} (theory {tracker.theory_visibility:.2f})")
+            layers.mark(screen.blit(font.render(fit, True, TEXT_COLOR), (470, 20)))
+        if view.zoomed:
+            zoom = f"{view.magnification:.1f}x  rows {view.lo:.1f}-{view.hi:.1f}  (Z resets)"
+            layers.mark(screen.blit(font.render(zoom, True, TEXT_COLOR), (SCREEN_X - 300, HEIGHT - 30)))
+
+        # Frame profiler overlay (F3)
+        if self.profiler.visible:
+            layers.mark(self.profiler.draw(screen, font, (400, HEIGHT - 110)))
+
+    # --- FRAME ---
+    def frame(self, frame_seconds, events=()):
+        """ One frame: handles `events`, runs the physics steps `frame_seconds` of real time cover, draws. """
+        profiler = self.profiler
+        for event in events:
+            self.handle_event(event)
+        profiler.lap("events")
+        for _ in range(self.timestep.advance(frame_seconds)):
+            self.physics_step()
+        profiler.lap("physics")
+        self.draw()
+        profiler.lap("draw")
+        self.layers.finish()
+        profiler.lap("flip")
+        profiler.end(len(self.particles))
+
+    def run(self):
+        """ The interactive loop, until the window is closed. """
+        clock = pygame.time.Clock()
+        while self.running:
+            frame_seconds = clock.tick(TURBO_FPS if self.turbo else RENDER_FPS) / 1000
+            self.profiler.lap("wait")
+            self.frame(frame_seconds, pygame.event.get())
+        self.close()
+        self.profiler.dump(trace_path("test3"))
+        pygame.quit()
+
+    def close(self):
+        if self.hit_log is not None: self.hit_log.close()
+
+
+if __name__ == "__main__":
+    SlitSimulator().run()
@@ -1,6 +1,17 @@
 from ursina import *
-import random
-import math
+import atexit
+import numpy as np
+from slit_lab.decoherence import fringe_visibility, mixture_table
+from slit_lab.detector import DetectorTexture, ProfilePlot
+from slit_lab.hitlog import HitLog, archive, log_path, open_log
+from slit_lab.kernels import LANDED, PASSED, advance, barrier_gaps_array, retarget
+from slit_lab.particles import ParticleStore, TO_SLIT
+from slit_lab.physics import barrier_gaps
+from slit_lab.points import PointCloud, SplatRing
+from slit_lab.profiling import FrameProfiler, trace_path
+from slit_lab.pyramid import HistogramPyramid, ZoomView
+from slit_lab.sampler import wave_sampler
+from slit_lab.timestep import Spawner
 
 # --- APP SETUP ---
 app = Ursina()
@@ -14,6 +25,28 @@ BARRIER_Z = 0
 SCREEN_Z = 20
 SLIT_WIDTH = 0.8
 SLIT_DIST = 4.0
+WAVELENGTH = 2.0
+WHICH_PATH_STEP = 0.125 # [,]/[.] change the observer's distinguishability by this much
+SPEED = 10            # Forward speed (units per second)
+MAX_PARTICLES = 50000 # Capacity of the particle point cloud
+FIRE_RATES = {1: 60, 2: 60, 3: 300, 4: 300, 5: 300, 6: 300, 7: 300} # Particles per second per stage ([+]/[-] scale it)
+STAGE_LOOK = {1: (0, 0.5), 2: (0, 0.5), 3: (1, 0.8), 4: (2, 0.3), 5: (2, 0.3), 6: (2, 0.3), 7: (2, 0.3)} # (palette index, size)
+# Barrier layout of each stage (slit_lab.physics names); 6 and 7 are electrons through more slits
+STAGE_BARRIER = {1: "single", 2: "double", 3: "double", 4: "double", 5: "double", 6: "triple", 7: "grating"}
+BARRIER_HALF_WIDTH = 21 # The wall spans x = -21..21
+
+# Particle palette, indexed by the store's color field: marble, wave blob, electron, observed
+PALETTE = np.array([tuple(color.red), tuple(color.blue), tuple(color.green), tuple(color.red)], dtype=np.float32)
+OBSERVED = 3
+
+# Detector image: (columns, rows) across the screen wall, refreshed a few times per second
+DETECTOR_RES = (600, 75)
+DETECTOR_HZ = 5
+
+# Zoomable profile on the HUD: hits along x, also kept at 2**ZOOM_LEVELS bins across the wall
+ZOOM_LEVELS = 12
+ZOOM_STEP = 1.5       # Magnification per [Z] press
+PROFILE_RES = (512, 96)
 
 # --- SCENE SETUP ---
 # Dark Lab Environment
@@ -28,154 +61,181 @@ gun = Entity(model='cube', scale=(1, 1, 3), color=color.gray, position=(0, 0, GU
 gun_barrel = Entity(parent=gun, model='cylinder', rotation_x=90, scale=0.5, z=1, color=color.red)
 
 # 3. THE BARRIER (We build it from parts so we can open/close gaps)
-# We use 3 separate wall pieces: Left, Center, Right
-barrier_left = Entity(model='cube', scale=(20, 5, 1), position=(-11, 0, BARRIER_Z), color=color.rgb(50, 50, 70))
-barrier_right = Entity(model='cube', scale=(20, 5, 1), position=(11, 0, BARRIER_Z), color=color.rgb(50, 50, 70))
-barrier_center = Entity(model='cube', scale=(3, 5, 1), position=(0, 0, BARRIER_Z), color=color.rgb(50, 50, 70))
+# One wall piece between each pair of gaps, rebuilt by build_barrier() when the layout changes
+barrier_pieces = []
 
-# 4. THE DETECTOR SCREEN (The Histogram)
-# Instead of infinite dots (laggy), we use 60 vertical bars to show accumulation
+# 4. THE DETECTOR SCREEN (The Heatmap)
+# Hits accumulate in a numpy image shown as one texture on the wall's front
+# face; there is no entity per bin or per hit.
 screen_wall = Entity(model='cube', scale=(40, 5, 0.5), position=(0, 0, SCREEN_Z), color=color.black)
-bars = []
-for i in range(60):
-    # Create a bar for each "bin" on the screen
-    x_pos = (i - 30) * 0.6
-    bar = Entity(model='cube', position=(x_pos, -2, SCREEN_Z - 0.5), scale=(0.5, 0, 0.5), color=color.green)
-    bars.append(bar)
+detector = DetectorTexture(DETECTOR_RES, x_range=(-20, 20), y_range=(-2.5, 2.5), upload_hz=DETECTOR_HZ)
+detector_face = Entity(parent=screen_wall, model='quad', z=-0.51, unlit=True,
+                       texture=Texture(detector.texture, filtering='bilinear'))
+
+# Fringe profile of any window of the wall, binned from the pyramid when shown
+pyramid = HistogramPyramid(-20, 20, ZOOM_LEVELS)
+view = ZoomView(-20, 20, min_span=32 * pyramid.bin_width)
+profile = ProfilePlot(PROFILE_RES)
+profile_panel = Entity(parent=camera.ui, model='quad', position=(0, -0.37), scale=(1.2, 0.2),
+                       texture=Texture(profile.texture, filtering=None))
 
 # 5. THE OBSERVER EYE (Hidden by default)
 observer_eye = Entity(model='sphere', color=color.yellow, scale=1.5, position=(5, 3, BARRIER_Z-2), visible=False)
 Entity(parent=observer_eye, model='sphere', color=color.black, scale=0.4, z=0.4) # Pupil
 observer_beam = Entity(model='cube', color=color.rgba(255, 255, 0, 50), scale=(0.1, 0.1, 10), position=(5, 3, BARRIER_Z), visible=False)
 
+# 6. PARTICLES AND SPLATS
+# All particles are one point cloud and all splats one ring buffer of points,
+# so firing never creates or destroys scene-graph nodes.
+particle_cloud = PointCloud(scene, MAX_PARTICLES, thickness=STAGE_LOOK[1][1])
+splats = SplatRing(scene, capacity=4096, lifetime=1.0, thickness=0.3)
+
 # --- GAME STATE ---
 state = {
     'stage': 1,
     'firing': False,
-    'particles': [],
-    'hits': [0] * 60  # Data for the histogram
+    'rate_scale': 1.0,
+    'hit_log': None, # HitLogWriter of the current stage's run, see reset_sim()
+    'which_path': 1.0, # Stage 5: how well the observer tells the slits apart (0..1)
 }
+# Particle arrays: x is sideways, the store's y field holds the depth (z),
+# vx the sideways and vy the forward speed
+particles = ParticleStore(capacity=MAX_PARTICLES)
+spawner = Spawner(FIRE_RATES[1])
+rng = np.random.default_rng()
+# Frame timings: "engine" is everything between two update() calls (rendering, input)
+profiler = FrameProfiler(("engine", "spawn", "physics", "upload"))
 
 # --- TEXT UI ---
-Text(text="CONTROLS: [1-5] Change Stage | [SPACE] Fire | [R] Reset | [Right Click+WASD] Fly", position=(-0.85, 0.45), scale=1)
+Text(text="CONTROLS: [1-7] Change Stage | [SPACE] Fire | [+/-] Rate | [R] Reset | [F3] Profile | [Right Click+WASD] Fly", position=(-0.85, 0.45), scale=1)
 stage_text = Text(text="STAGE 1: Marbles (Single Slit)", position=(-0.85, 0.4), scale=1.5, color=color.yellow)
+profile_text = Text(text="", position=(-0.6, -0.24), scale=1)
+profiler_text = Text(text="", position=(0.3, 0.32), scale=1, color=color.yellow, visible=False) # [F3]
 
 # --- PHYSICS LOGIC ---
-def get_impact_x(stage):
+def get_impact_x(stage, n=1):
+    """ Landing x for `n` particles that passed the barrier. """
     # 1. Determine Physics Mode
-    is_classical = (stage == 1 or stage == 2 or stage == 5)
+    is_classical = (stage == 1 or stage == 2)
+    if stage == 5:
+        # Partial which-path measurement: precomputed blend of the fringes and
+        # the washed-out pattern for the observer's distinguishability
+        return which_path_table().sampler(state['which_path']).sample(n)
     
     if is_classical:
         # Classical Gaussian (Two Piles)
         spread = 2.0
         if stage == 1: 
-            return random.gauss(0, spread) # Center pile
+            return rng.normal(0, spread, n) # Center pile
         else:
             # Randomly pick Left or Right slit
-            center = -SLIT_DIST/2 if random.random() < 0.5 else SLIT_DIST/2
-            return random.gauss(center, spread)
+            center = np.where(rng.random(n) < 0.5, -SLIT_DIST/2, SLIT_DIST/2)
+            return rng.normal(center, spread)
     else:
         # Quantum Interference (Stripes)
-        # Rejection Sampling for correct Wave Distribution
-        while True:
-            x = random.uniform(-15, 15)
-            theta = math.atan(x / (SCREEN_Z - BARRIER_Z))
-            
-            # Physics Math
-            lam = 2.0 # Wavelength
-            alpha = (math.pi * SLIT_DIST * math.sin(theta)) / lam
-            beta = (math.pi * SLIT_WIDTH * math.sin(theta)) / lam
-            
-            diff = 1.0 if beta == 0 else (math.sin(beta)/beta)**2
-            inter = math.cos(alpha)**2
-            
-            prob = diff * inter # Double Slit Pattern
-            
-            if random.random() < prob:
-                return x
+        # Inverse-CDF sampling of the stage's barrier pattern (tabulated once)
+        sampler = wave_sampler(STAGE_BARRIER[stage], WAVELENGTH, SLIT_WIDTH, SLIT_DIST, SCREEN_Z - BARRIER_Z, -15, 15)
+        return sampler.sample(n)
+
+def which_path_table():
+    return mixture_table(WAVELENGTH, SLIT_WIDTH, SLIT_DIST, SCREEN_Z - BARRIER_Z, -15, 15)
+
+def slit_snaps():
+    """
+    Visual: Snap to nearest slit to look realistic. (low, high, snap) rows for
+    the step kernel; every particle passes (the first matching row wins).
+    """
+    # Snap to the nearest slit: each row reaches up to the midpoint to the next slit
+    centers = [c for c, _ in barrier_gaps(STAGE_BARRIER[state['stage']], SLIT_WIDTH, SLIT_DIST)]
+    bounds = [(a + b) / 2 for a, b in zip(centers, centers[1:])] + [np.inf]
+    return barrier_gaps_array([(-np.inf, high, c) for c, high in zip(centers, bounds)])
+
+def build_barrier(mode):
+    """ Rebuilds the wall pieces around the gaps of the barrier layout `mode`. """
+    for piece in barrier_pieces:
+        destroy(piece)
+    barrier_pieces.clear()
+    edges = [-BARRIER_HALF_WIDTH]
+    for center, half_gap in barrier_gaps(mode, SLIT_WIDTH, SLIT_DIST):
+        edges += [center - half_gap, center + half_gap]
+    edges.append(BARRIER_HALF_WIDTH)
+    for left, right in zip(edges[::2], edges[1::2]):
+        barrier_pieces.append(Entity(model='cube', scale=(right - left, 5, 1), position=((left + right) / 2, 0, BARRIER_Z),
+                                     color=color.rgb(50, 50, 70)))
 
 # --- UPDATE LOOP ---
 def update():
-    # 1. SPAWN PARTICLES
+    profiler.lap("engine")
+    # 1. SPAWN PARTICLES (rate is per second, independent of the frame rate)
     if state['firing']:
-        rate = 1 if state['stage'] <= 2 else 5 # Faster for electrons
-        for _ in range(rate):
-            spawn_particle()
-
-    # 2. MOVE PARTICLES
-    for p in state['particles']:
-        p.z += 10 * time.dt # Move forward
-        
-        # Check if passed barrier
-        if not p.passed_barrier and p.z > BARRIER_Z:
-            p.passed_barrier = True
-            
-            # Visual: Snap to nearest slit to look realistic
-            if state['stage'] == 1:
-                p.x = 0 # Center slit
-            else:
-                # Snap to left or right slit based on current X
-                if p.x < 0: p.x = -SLIT_DIST/2
-                else: p.x = SLIT_DIST/2
-
-            # OBSERVER EFFECT: Turn Red if observed
-            if state['stage'] == 5:
-                p.color = color.red
-                
-            # CALCULATE DESTINY
-            # We calculate the final X now and interpolate towards it
-            p.target_x = get_impact_x(state['stage'])
-            
-            # Set velocity vector to hit that target
-            dist_z = SCREEN_Z - BARRIER_Z
-            dist_x = p.target_x - p.x
-            p.vx = dist_x / (dist_z / (10)) # delta_x / time_to_hit
-
-        # Move X based on calculated velocity
-        if p.passed_barrier:
-            p.x += p.vx * time.dt
-        
-        # Check Screen Hit
-        if p.z >= SCREEN_Z:
-            register_hit(p.x)
-            destroy(p)
-            state['particles'].remove(p)
-
-def spawn_particle():
-    # Visuals based on stage
-    if state['stage'] <= 2:
-        col = color.red # Marbles
-        scl = 0.5
-    elif state['stage'] == 3:
-        col = color.blue # Waves
-        scl = 0.8 # Big blobs
-    else:
-        col = color.green # Electrons
-        scl = 0.3
+        spawn_particles(spawner.take(time.dt))
+    profiler.lap("spawn")
 
-    # Initial X spread (aiming at slits)
-    start_x = random.uniform(-3, 3) 
-    
-    p = Entity(model='sphere', color=col, scale=scl, position=(start_x, 0, GUN_Z))
-    p.passed_barrier = False
-    p.vx = 0
-    state['particles'].append(p)
-
-def register_hit(x):
-    # Find which bar corresponds to this X
-    # Range is -15 to 15 mapped to 0 to 59
-    idx = int((x + 15) * 2)
-    if 0 <= idx < 60:
-        # Grow the bar
-        bars[idx].scale_y += 0.5
-        bars[idx].y += 0.25 # Shift up so it grows from bottom
-        
-        # Color the bar based on height (Heatmap style)
-        if bars[idx].scale_y > 10: bars[idx].color = color.white
-        
-        # Optional: Spawn a temporary "Splat" mark
-        s = Entity(model='quad', color=bars[idx].color, position=(x, random.uniform(-2, 2), SCREEN_Z-0.6), scale=0.3)
-        destroy(s, delay=1) # Remove after 1 second
+    # 2. MOVE PARTICLES: one kernel pass over the particle arrays moves them
+    # and flags the ones crossing the barrier or reaching the screen
+    x, vx = particles.x, particles.vx
+    events = advance(particles.y, x, particles.vy, vx, particles.state, time.dt, BARRIER_Z, SCREEN_Z, slit_snaps())
+
+    # Particles that passed the barrier this frame were snapped to their slit
+    crossing = np.flatnonzero(events == PASSED)
+    if len(crossing):
+        # OBSERVER EFFECT: Turn Red if observed
+        if state['stage'] == 5:
+            particles.color[crossing] = OBSERVED
+
+        # CALCULATE DESTINY
+        # We calculate the final X now and set the sideways velocity to hit it
+        target_x = get_impact_x(state['stage'], len(crossing))
+        retarget(x, particles.vy, vx, crossing, target_x, SCREEN_Z - BARRIER_Z) # delta_x / time_to_hit
+
+    # Check Screen Hit
+    landed = events == LANDED
+    if landed.any():
+        register_hits(x[landed])
+        particles.remove(landed)
+    profiler.lap("physics")
+
+    # 3. UPLOAD TO THE GPU BUFFERS (one copy each, no per-particle nodes)
+    positions = np.column_stack([particles.x, np.zeros(len(particles)), particles.y])
+    particle_cloud.update(positions, PALETTE[particles.color])
+    splats.update(time.dt)
+    if detector.tick(time.dt):
+        draw_profile() # Same refresh rate as the wall
+    profiler.lap("upload")
+    profiler.end(len(particles))
+    # Text entities are rebuilt on every change, so the overlay is refreshed a few times a second
+    if profiler.visible and profiler.frames % 15 == 0:
+        profiler_text.text = "\n".join(profiler.summary())
+
+def spawn_particles(count):
+    count = min(count, MAX_PARTICLES - len(particles))
+    if count <= 0:
+        return
+    # Initial X spread (aiming at slits), wide enough to reach the outermost one
+    spread = max(3, max(abs(c) for c, _ in barrier_gaps(STAGE_BARRIER[state['stage']], SLIT_WIDTH, SLIT_DIST)) + 1)
+    particles.spawn(count,
+        x=rng.uniform(-spread, spread, count), y=GUN_Z,
+        vx=0, vy=SPEED,
+        state=TO_SLIT,
+        color=STAGE_LOOK[state['stage']][0],
+    )
+
+def register_hits(xs):
+    # The slits are tall, so the hit height on the wall is spread over its height
+    ys = rng.uniform(-2, 2, len(xs))
+    detector.add(xs, ys)
+    pyramid.add(xs)
+    state['hit_log'].append(xs, ys)
+
+    # Temporary "Splat" marks, faded out by the ring buffer after 1 second
+    splat_positions = np.column_stack([xs, ys, np.full(len(xs), SCREEN_Z-0.6)])
+    splats.add(splat_positions, np.tile(np.float32(tuple(color.green)), (len(xs), 1)))
+
+def draw_profile():
+    counts, _ = pyramid.window(view.lo, view.hi, PROFILE_RES[0])
+    profile.draw(counts)
+    profile_text.text = (f"x {view.lo:.2f} .. {view.hi:.2f} ({view.magnification:.1f}x)   "
+                         "[Z/X] Zoom | [Arrows] Pan | [0] Full width")
 
 # --- INPUT HANDLING ---
 def input(key):
@@ -183,15 +243,45 @@ def input(key):
         state['firing'] = not state['firing']
     
     if key == 'r':
-        reset_sim()
+        reset_sim(clear=True)
+
+    # FIRING RATE
+    if key in ['+', '=']:
+        state['rate_scale'] = min(state['rate_scale'] * 2, 256)
+        spawner.rate = FIRE_RATES[state['stage']] * state['rate_scale']
+    if key == '-':
+        state['rate_scale'] = max(state['rate_scale'] / 2, 1 / 8)
+        spawner.rate = FIRE_RATES[state['stage']] * state['rate_scale']
+
+    # PROFILE ZOOM
+    if key in ['z', 'x', 'left arrow', 'right arrow', '0']:
+        if key == 'z': view.zoom(ZOOM_STEP)
+        if key == 'x': view.zoom(1 / ZOOM_STEP)
+        if key == 'left arrow': view.pan(-0.2 * view.span)
+        if key == 'right arrow': view.pan(0.2 * view.span)
+        if key == '0': view.reset()
+        draw_profile()
+
+    # OBSERVER STRENGTH (stage 5)
+    if key in [',', '.'] and state['stage'] == 5:
+        step = WHICH_PATH_STEP if key == '.' else -WHICH_PATH_STEP
+        state['which_path'] = which_path_table().snap(state['which_path'] + step)
+        set_stage(5)
+
+    # FRAME PROFILER
+    if key == 'f3':
+        profiler.toggle()
+        profiler_text.visible = profiler.visible
 
     # STAGE SWITCHING
-    if key in ['1', '2', '3', '4', '5']:
+    if key in ['1', '2', '3', '4', '5', '6', '7']:
         set_stage(int(key))
 
 def set_stage(num):
     state['stage'] = num
     reset_sim()
+    spawner.rate = FIRE_RATES[num] * state['rate_scale']
+    particle_cloud.set_thickness(STAGE_LOOK[num][1])
     
     # Text Update
     names = [
@@ -199,37 +289,68 @@ def set_stage(num):
         "2. MARBLES (Double Slit)",
         "3. WAVES (Interference)",
         "4. ELECTRONS (Quantum Mystery)",
-        "5. OBSERVER (Wave Collapse)"
+        "5. OBSERVER (Wave Collapse)",
+        "6. ELECTRONS (Triple Slit)",
+        "7. ELECTRONS (Grating, 5 Slits)"
     ]
     stage_text.text = f"STAGE {names[num-1]}"
+    if num == 5:
+        D = state['which_path']
+        stage_text.text += f"  which-path {D:.2f}, fringes {fringe_visibility(D):.2f} [,/.]"
     
     # Visual Updates
-    # Barrier Logic
-    if num == 1:
-        # Close the side gaps? No, Single slit usually means center is open.
-        # Let's just adjust the center block to close side gaps?
-        # Simpler: Just rely on physics snapping.
-        barrier_center.visible = False # Open center
-    else:
-        barrier_center.visible = True # Close center (force left/right)
+    # Barrier Logic: the wall is cut at the same gaps the particles snap to
+    build_barrier(STAGE_BARRIER[num])
 
     # Observer Logic
     if num == 5:
         observer_eye.visible = True
         observer_beam.visible = True
-        observer_eye.look_at(barrier_center)
+        observer_eye.look_at(Vec3(0, 0, BARRIER_Z)) # Middle of the barrier
     else:
         observer_eye.visible = False
         observer_beam.visible = False
 
-def reset_sim():
-    for p in state['particles']: destroy(p)
-    state['particles'] = []
-    
-    for b in bars:
-        b.scale_y = 0
-        b.y = -2
-        b.color = color.green
+def reset_sim(clear=False):
+    """
+    Switches to the current stage's run, resumed from its hit log. With
+    `clear` the log is archived and the detector starts empty.
+    """
+    particles.clear()
+    particle_cloud.clear()
+    splats.clear()
+    detector.reset()
+    pyramid.reset()
+
+    if state['hit_log'] is not None:
+        state['hit_log'].close()
+    run = f"stage{state['stage']}"
+    if state['stage'] == 5:
+        run += f"_which-path-{state['which_path']:.2f}"
+    path = log_path("test4", run)
+    if clear:
+        archive(path)
+    settings = {'stage': state['stage'], 'barrier': STAGE_BARRIER[state['stage']], 'slit_width': SLIT_WIDTH, 'slit_dist': SLIT_DIST,
+                'screen_dist': SCREEN_Z - BARRIER_Z, 'wavelength': WAVELENGTH}
+    if state['stage'] == 5:
+        settings['which_path'] = state['which_path']
+    state['hit_log'] = open_log(path, ("x", "y"), settings)
+    # Replay the logged hits onto the detector
+    for hits in HitLog(path).chunks():
+        detector.add(hits["x"], hits["y"])
+        pyramid.add(hits["x"])
+    draw_profile()
+
+def close_hit_log():
+    if state['hit_log'] is not None:
+        state['hit_log'].close()
+
+def dump_profile():
+    profiler.dump(trace_path("test4"))
 
 # --- RUN ---
+build_barrier(STAGE_BARRIER[state['stage']])
+reset_sim()
+atexit.register(close_hit_log)
+atexit.register(dump_profile)
 app.run()
\ No newline at end of file